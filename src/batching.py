@@ -0,0 +1,151 @@
+"""Batch lookups made at about the same time into a single query.
+
+Handlers looking rows up one at a time (in a loop, or from many messages
+handled at once) cost a round trip to the database per lookup. A
+BatchLoader instead collects every key requested within a short window
+(by default, until the event loop's next iteration), loads them all with
+a single call, & gives each caller the value for its own key:
+
+    loader = BatchLoader(load_many, default=lambda: None)
+
+    # one call to load_many(['a', 'b'])
+    a, b = await asyncio.gather(loader.load('a'), loader.load('b'))
+
+`load_many` is given a list of unique keys & returns a dictionary of the
+values found; keys it doesn't return get a value from `default`. If it
+fails, every caller in the batch gets its exception. A caller being
+cancelled doesn't cancel the batch, nor does its deadline bound the batch,
+see `request_context`.
+"""
+
+import asyncio
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+import metrics
+import request_context
+
+
+BATCH_SIZE = metrics.Histogram(
+    'batch_loader_keys',
+    'Keys loaded by each batched call, by loader.',
+    ['loader'],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+DEFAULT_MAX_BATCH_SIZE = 1000
+
+
+class BatchLoader(Generic[K, V]):
+    """Load values for keys requested at about the same time at once.
+
+    Waits `window` seconds after the first key of a batch is requested
+    before loading it, or until the loop's next iteration if 0. A batch
+    reaching `max_batch_size` keys is loaded right away.
+    """
+
+    name: str
+    window: float
+    max_batch_size: int
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    _pending: Dict[K, 'asyncio.Future[V]']
+    _scheduled: Optional[asyncio.Handle]
+    _batches: Set['asyncio.Task[None]']
+
+    def __init__(
+        self,
+        load_many: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        default: Callable[[], V],
+        window: float = 0.0,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        name: str = 'unknown',
+    ) -> None:
+        self.name = name
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._load_many = load_many
+        self._default = default
+        self._pending = {}
+        self._scheduled = None
+        # batches in flight, referenced so they aren't garbage collected
+        self._batches = set()
+        self._size = BATCH_SIZE.labels(name)
+
+    async def load(self, key: K) -> V:
+        """Get the value for a key, loaded in a batch with others."""
+        future = self._pending.get(key)
+
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._scheduled is None and self.window > 0:
+                self._scheduled = loop.call_later(self.window, self._dispatch)
+            elif self._scheduled is None:
+                self._scheduled = loop.call_soon(self._dispatch)
+
+        # shielded, since the same key's future is shared by every caller
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+
+        batch, self._pending = self._pending, {}
+        # without the deadline of the caller completing the batch, since
+        # it's shared
+        task = request_context.shared_context().run(
+            asyncio.ensure_future, self._load(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _load(self, batch: Dict[K, 'asyncio.Future[V]']) -> None:
+        self._size.observe(len(batch))
+
+        try:
+            values = await self._load_many(list(batch))
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+
+            raise
+        except Exception as err:  # pylint: disable=broad-except
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(err)
+                    # retrieved here, in case every caller was cancelled
+                    future.exception()
+
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(
+                    values[key] if key in values else self._default())
+
+
+def group_by(rows: List[Any], column: str) -> Dict[Any, List[Any]]:
+    """Group rows by their value in a column, e.g. to fan out a batch."""
+    groups: Dict[Any, List[Any]] = {}
+
+    for row in rows:
+        groups.setdefault(row[column], []).append(row)
+
+    return groups
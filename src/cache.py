@@ -0,0 +1,267 @@
+"""Cache results of Model reads in memory.
+
+Identical reads are common, & each one otherwise costs a round trip to the
+database. Caching a Model keeps the results of its read methods in a
+bounded LRU cache, each for a TTL given per method, & clears the cache
+whenever one of the Model's create, update, or delete methods is called:
+
+    example_model = cache_model(
+        ExampleItem(database),
+        ttls={'all_by_string': 5, 'one_by_id': 30})
+
+Reads are keyed by method & arguments; reads given unhashable arguments
+(e.g. a dict) aren't cached. Cached results are shared by every caller, so
+they must not be modified.
+
+Writes clear the cache of the process they're made in immediately. Tables
+with a trigger calling `notify_model_change` (see `models/_notify.sql`)
+also notify every other process of each statement changing them, once
+committed: a Model whose Client can `listen` (see `database.Client`)
+clears its cache when its table changes, or when notifications may have
+been missed. Without the trigger, results may be stale for up to their TTL
+when the same table is written to elsewhere.
+
+A cached Model should read from the primary database, not a replica (see
+`database.read_client`): a read made right after its cache is cleared may
+reach a replica that hasn't applied the change yet, & cache the stale
+result for the rest of its TTL.
+"""
+
+from collections import OrderedDict
+from functools import wraps
+import json
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import metrics
+from model_hooks import after_writes, changed, table_name, wrap_read
+
+
+CACHE_REQUESTS = metrics.Counter(
+    'model_cache_requests_total',
+    'Model reads looked up in the cache, by result (hit, miss, or bypass '
+    'for reads that can\'t be cached).',
+    ['model', 'method', 'result'])
+CACHE_INVALIDATIONS = metrics.Counter(
+    'model_cache_invalidations_total',
+    'Times a Model\'s cache was cleared, by source (a write in this '
+    'process, or a notification of a change from any process).',
+    ['model', 'source'])
+CACHE_SIZE = metrics.Gauge(
+    'model_cache_entries',
+    'Results currently cached for each Model.',
+    ['model'])
+
+M = TypeVar('M')
+
+# channel notified of changes by the `notify_model_change` trigger
+CHANNEL = 'model_change'
+
+DEFAULT_MAX_SIZE = 1024
+
+# returned by LRUCache.get for keys that aren't cached, since None could be
+# a cached result
+MISSING = object()
+
+
+class LRUCache:
+    """A cache of at most `max_size` entries, each expiring after a TTL.
+
+    Once full, setting a new entry evicts the least recently used one.
+    """
+
+    max_size: int
+    generation: int
+    _entries: 'OrderedDict[Hashable, Tuple[float, Any]]'
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        # incremented on every clear, so results read before a clear can
+        # be recognized & not cached after it
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._clock = clock
+
+    def __len__(self) -> int:
+        """Count the values cached, including any expired."""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Get a cached value, or MISSING if not cached or expired."""
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return MISSING
+
+        expires, value = entry
+
+        if expires <= self._clock():
+            del self._entries[key]
+            return MISSING
+
+        self._entries.move_to_end(key)
+
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Cache a value for ttl seconds."""
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._entries.clear()
+        self.generation += 1
+
+
+class ModelCache:
+    """The cache of a single Model's reads."""
+
+    name: str
+    table: str
+    entries: LRUCache
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = DEFAULT_MAX_SIZE,
+        table: str = '',
+    ) -> None:
+        self.name = name
+        self.table = table or name
+        self.entries = LRUCache(max_size)
+        self._size = CACHE_SIZE.labels(name)
+        self._write_invalidations = CACHE_INVALIDATIONS.labels(name, 'write')
+        self._notify_invalidations = CACHE_INVALIDATIONS.labels(
+            name, 'notify')
+
+    def read(
+        self,
+        method: str,
+        read: Callable[..., Awaitable[Any]],
+        ttl: float,
+    ) -> Callable[..., Awaitable[Any]]:
+        """Wrap a read method to cache its results for ttl seconds."""
+        hits = CACHE_REQUESTS.labels(self.name, method, 'hit')
+        misses = CACHE_REQUESTS.labels(self.name, method, 'miss')
+        bypasses = CACHE_REQUESTS.labels(self.name, method, 'bypass')
+
+        @wraps(read)
+        async def cached(*args: Any, **kwargs: Any) -> Any:
+            key = (method, args, tuple(sorted(kwargs.items())))
+
+            try:
+                value = self.entries.get(key)
+            except TypeError:
+                # unhashable arguments
+                bypasses.inc()
+                return await read(*args, **kwargs)
+
+            if value is not MISSING:
+                hits.inc()
+                return value
+
+            misses.inc()
+            generation = self.entries.generation
+            value = await read(*args, **kwargs)
+
+            # skip caching a result read while a write cleared the cache,
+            # it may be stale already
+            if generation == self.entries.generation:
+                self.entries.set(key, value, ttl)
+                self._size.set(len(self.entries))
+
+            return value
+
+        return cached
+
+    def written(self) -> None:
+        """Clear the cache after its table was written to."""
+        self.invalidate()
+        self._write_invalidations.inc()
+
+    def changed(self, payload: Optional[str]) -> bool:
+        """Clear the cache if notified of a change to its table.
+
+        Any change clears every result, since a changed row may be part of
+        any of them. Given None, notifications may have been missed, so
+        the cache is cleared too. Returns whether it was cleared.
+        """
+        if payload is not None:
+            try:
+                table = json.loads(payload).get('table')
+            except (ValueError, AttributeError):
+                return False
+
+            if table != self.table:
+                return False
+
+        self.invalidate()
+        self._notify_invalidations.inc()
+
+        return True
+
+    def invalidate(self) -> None:
+        """Clear every cached result."""
+        self.entries.clear()
+        self._size.set(0)
+
+
+def cache_model(
+    model: M,
+    ttls: Dict[str, float],
+    max_size: int = DEFAULT_MAX_SIZE,
+    name: str = '',
+) -> M:
+    """Cache a Model's reads, given a TTL in seconds for each read method.
+
+    Named after the Model's table, unless given a name. Returns the Model,
+    with its read methods cached & its write methods clearing the cache.
+    If the Model's Client can listen for notifications, the cache is also
+    cleared when notified its table changed, as are other layers told of
+    changes (see `model_hooks.after_changes`); this must be called before
+    the Client connects.
+    """
+    table = table_name(model)
+    model_cache = ModelCache(name or table, max_size, table)
+
+    for method, ttl in ttls.items():
+        def cache_read(
+            read: Callable[..., Awaitable[Any]],
+            method: str = method,
+            ttl: float = ttl,
+        ) -> Callable[..., Awaitable[Any]]:
+            return model_cache.read(method, read, ttl)
+
+        wrap_read(model, method, cache_read)
+
+    after_writes(model, model_cache.written)
+
+    listen = getattr(getattr(model, 'client', None), 'listen', None)
+
+    def notified(payload: Optional[str]) -> None:
+        if model_cache.changed(payload):
+            changed(model)
+
+    if listen is not None:
+        listen(CHANNEL, notified)
+
+    setattr(model, 'cache', model_cache)
+
+    return model
@@ -0,0 +1,202 @@
+"""Share one in-flight query between concurrent identical Model reads.
+
+When many callers read the same thing at once (e.g. right after a cached
+result expires, or a deploy empties every cache), each would otherwise
+send the database an identical query. Coalescing a Model's read methods
+runs only the first of any concurrent calls with the same method &
+arguments; every other call waits for that one's result instead:
+
+    example_model = coalesce_model(
+        ExampleItem(database),
+        methods=['all_by_string', 'one_by_id'])
+
+Every caller gets the same result, or the same exception if the query
+fails, so results must not be modified. A caller being cancelled doesn't
+cancel the query for the others; the query is only cancelled once every
+caller waiting for it has been. Nor is it bounded by the deadline of the
+caller that started it, see `request_context`. Calls given unhashable
+arguments (e.g. a dict) aren't coalesced.
+
+A write to the Model makes calls started after it run a new query, rather
+than wait for one that may have started before the write. So does a change
+made by another process, once the Model's cache is notified of it.
+
+Coalescing composes with caching, see `cache`: a cached Model whose reads
+are coalesced sends one query per expired result, however many callers
+missed the cache:
+
+    example_model = cache_model(coalesce_model(...), ttls={...})
+"""
+
+import asyncio
+from functools import wraps
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Tuple,
+    TypeVar,
+)
+
+import metrics
+from model_hooks import after_changes, after_writes, table_name, wrap_read
+import request_context
+
+
+COALESCED_CALLS = metrics.Counter(
+    'model_coalesced_calls_total',
+    'Model reads that waited for an identical read already in flight, '
+    'instead of querying the database.',
+    ['model', 'method'])
+
+M = TypeVar('M')
+
+
+class _Flight:
+    """A call in flight & how many callers are waiting for it."""
+
+    task: 'asyncio.Task[Any]'
+    waiters: int
+
+    def __init__(self, task: 'asyncio.Task[Any]') -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one call at a time per key, sharing its result."""
+
+    _flights: Dict[Hashable, _Flight]
+
+    def __init__(self) -> None:
+        self._flights = {}
+
+    def __len__(self) -> int:
+        """Count the calls in progress."""
+        return len(self._flights)
+
+    def _land(self, key: Hashable, flight: _Flight) -> None:
+        # a forgotten flight may have been replaced by a newer one
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _done(self, key: Hashable, flight: _Flight) -> None:
+        self._land(key, flight)
+
+        # retrieve any exception, in case every caller was cancelled
+        # before it was raised
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def _start(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[Any]],
+    ) -> _Flight:
+        async def run() -> Any:
+            return await call()
+
+        # without the deadline of the caller starting it, since it's shared
+        flight = _Flight(
+            request_context.shared_context().run(asyncio.create_task, run()))
+        self._flights[key] = flight
+        flight.task.add_done_callback(lambda _: self._done(key, flight))
+
+        return flight
+
+    async def do(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[Any]],
+    ) -> Tuple[bool, Any]:
+        """Get the result of call, or of the call in flight for key.
+
+        Returns whether the caller waited for a call already in flight,
+        along with the result.
+        """
+        flight = self._flights.get(key)
+        coalesced = flight is not None
+
+        if flight is None:
+            flight = self._start(key, call)
+
+        flight.waiters += 1
+
+        try:
+            # shielded, so cancelling one caller doesn't cancel the others
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+
+            if flight.waiters == 0:
+                flight.task.cancel()
+                # so later callers start anew, rather than wait for a
+                # cancelled call
+                self._land(key, flight)
+
+            raise
+
+        flight.waiters -= 1
+
+        return coalesced, result
+
+    def forget(self) -> None:
+        """Make calls started from now on run anew, instead of waiting."""
+        self._flights.clear()
+
+
+def coalesce_model(
+    model: M,
+    methods: Iterable[str],
+    name: str = '',
+) -> M:
+    """Coalesce concurrent identical calls to a Model's read methods.
+
+    Named after the Model's table in metrics, unless given a name. Returns
+    the Model, with the given read methods coalesced.
+    """
+    name = name or table_name(model)
+    flights = SingleFlight()
+
+    def coalesce(
+        method: str,
+        read_method: Callable[..., Awaitable[Any]],
+    ) -> Callable[..., Awaitable[Any]]:
+        coalesced_calls = COALESCED_CALLS.labels(name, method)
+
+        @wraps(read_method)
+        async def coalesced(*args: Any, **kwargs: Any) -> Any:
+            key = (method, args, tuple(sorted(kwargs.items())))
+
+            try:
+                hash(key)
+            except TypeError:
+                return await read_method(*args, **kwargs)
+
+            was_coalesced, result = await flights.do(
+                key, lambda: read_method(*args, **kwargs))
+
+            if was_coalesced:
+                coalesced_calls.inc()
+
+            return result
+
+        return coalesced
+
+    for method in methods:
+        def coalesce_read(
+            read: Callable[..., Awaitable[Any]],
+            method: str = method,
+        ) -> Callable[..., Awaitable[Any]]:
+            return coalesce(method, read)
+
+        wrap_read(model, method, coalesce_read)
+
+    after_writes(model, flights.forget)
+    # changes made elsewhere, notified to a cache, see `cache`
+    after_changes(model, flights.forget)
+
+    return model
@@ -0,0 +1,54 @@
+"""Hold query results as tuples, naming each column once.
+
+A row read as a dictionary repeats every column name, both in memory & in
+every row of an encoded response. A Columnar result instead holds the
+column names once & each row as a tuple of values, in the same order, &
+is encoded as:
+
+    {"columns": ["_id", "string"], "rows": [["...", "a"], ["...", "b"]]}
+
+`records` turns a result (or its encoded form) back into a dictionary per
+row, for callers that need them.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+
+@dataclass
+class Columnar:
+    """Rows of a query result as tuples, with the names of their columns."""
+
+    columns: Tuple[str, ...]
+    rows: List[Tuple[Any, ...]]
+
+    def __len__(self) -> int:
+        """Count the rows."""
+        return len(self.rows)
+
+    @classmethod
+    def from_dicts(cls, rows: Sequence[Mapping[str, Any]]) -> 'Columnar':
+        """Build from rows read as dictionaries, all with the same keys."""
+        if not rows:
+            return cls((), [])
+
+        columns = tuple(rows[0].keys())
+
+        return cls(
+            columns,
+            [tuple(row[column] for column in columns) for row in rows])
+
+
+def records(result: Any) -> List[Dict[str, Any]]:
+    """Get a dictionary per row from a Columnar or its encoded form."""
+    columns: Iterable[str]
+    rows: Iterable[Sequence[Any]]
+
+    if isinstance(result, Columnar):
+        columns, rows = result.columns, result.rows
+    else:
+        columns, rows = result['columns'], result['rows']
+
+    columns = tuple(columns)
+
+    return [dict(zip(columns, row)) for row in rows]
@@ -0,0 +1,405 @@
+"""Compile TypedDict definitions into validators & row classes.
+
+A TypedDict (like a Model's ModelData) only describes a shape to type
+checkers; nothing checks it at runtime. Compiling one generates Python
+source specialized to its fields, once, at import time:
+
+    validator: checks an incoming payload is an object with the expected
+        fields, each of the expected type, & returns a copy of it; UUIDs
+        are coerced to their canonical string form & ints to floats where
+        floats are expected
+    row class: a class with a slot per field, smaller in memory than a
+        dictionary per row, encoded as an object in responses
+
+Neither inspects type hints when called, unlike a validator walking them
+on every call:
+
+    validate_item = compile_validator(ExampleItemData)
+    ExampleItemRow = compile_row(ExampleItemData)
+
+    item = validate_item(payload)  # raises ValidationError if malformed
+
+Validators support str, int, float, bool, UUID, Any, List, Dict,
+Optional, Union, nested TypedDicts, & isinstance checks for any other
+class.
+"""
+
+from abc import ABC, abstractmethod
+from itertools import count
+import keyword
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+from uuid import UUID
+
+from columnar import Columnar
+from serializers import SERIALIZERS
+
+
+# the TypedDict a validator checks payloads against
+D = TypeVar('D')
+
+Validator = Callable[[Any], D]
+
+# types checked exactly, so booleans aren't accepted as ints
+_EXACT_TYPES = {str: 'a string', int: 'an integer', bool: 'a boolean'}
+
+
+class ValidationError(ValueError):
+    """A payload doesn't match the shape it's validated against."""
+
+    path: str
+    reason: str
+
+    def __init__(self, path: str, reason: str) -> None:
+        super().__init__(f'`{path}`: {reason}' if path else reason)
+        self.path = path
+        self.reason = reason
+
+
+def _is_typed_dict(hint: Any) -> bool:
+    return isinstance(hint, type) \
+        and issubclass(hint, dict) \
+        and hasattr(hint, '__annotations__')
+
+
+class _Compiler:
+    """Generate the source of a validator, binding what it uses by name."""
+
+    namespace: Dict[str, Any]
+
+    def __init__(self) -> None:
+        self.namespace = {
+            'ValidationError': ValidationError,
+            'UUID': UUID,
+        }
+        self._names = count()
+
+    def name(self, prefix: str) -> str:
+        """Get a name unique within the generated source."""
+        return f'{prefix}{next(self._names)}'
+
+    def bind(self, value: Any) -> str:
+        """Make a value available to the generated source by name."""
+        name = self.name('_bound')
+        self.namespace[name] = value
+
+        return name
+
+    def fail(self, path: str, message: str) -> str:
+        """Build a line raising a ValidationError."""
+        return f'raise ValidationError({path}, {message!r})'
+
+    # pylint: disable=too-many-return-statements
+    def check(self, var: str, hint: Any, path: str) -> List[str]:
+        """Lines checking (& coercing) var in place, unindented.
+
+        `path` is an expression giving the path to var, for errors.
+        """
+        origin = get_origin(hint)
+
+        if hint is Any:
+            return []
+
+        if origin is Union:
+            return self._check_union(var, hint, path)
+
+        if hint is UUID:
+            return [
+                f'if type({var}) is str:',
+                '    try:',
+                f'        {var} = str(UUID({var}))',
+                '    except ValueError:',
+                f'        {self.fail(path, "expected a UUID")}',
+                f'elif type({var}) is UUID:',
+                f'    {var} = str({var})',
+                'else:',
+                f'    {self.fail(path, "expected a UUID")}',
+            ]
+
+        if hint is float:
+            return [
+                f'if type({var}) is int:',
+                f'    {var} = float({var})',
+                f'elif type({var}) is not float:',
+                f'    {self.fail(path, "expected a number")}',
+            ]
+
+        if hint in _EXACT_TYPES:
+            return [
+                f'if type({var}) is not {hint.__name__}:',
+                f'    {self.fail(path, "expected " + _EXACT_TYPES[hint])}',
+            ]
+
+        if origin is list:
+            return self._check_list(var, hint, path)
+
+        if origin is dict or hint is dict:
+            return self._check_dict(var, hint, path)
+
+        if _is_typed_dict(hint):
+            validate = self.bind(compile_validator(hint))
+
+            return [
+                'try:',
+                f'    {var} = {validate}({var})',
+                'except ValidationError as err:',
+                '    raise ValidationError(',
+                f'        {path} + ("." + err.path if err.path else ""),',
+                '        err.reason) from None',
+            ]
+
+        if isinstance(hint, type):
+            return [
+                f'if not isinstance({var}, {self.bind(hint)}):',
+                f'    {self.fail(path, f"expected a {hint.__name__}")}',
+            ]
+
+        raise TypeError(f'Unable to compile a validator for {hint}')
+
+    def _check_union(self, var: str, hint: Any, path: str) -> List[str]:
+        options = [arg for arg in get_args(hint) if arg is not type(None)]
+
+        if len(options) < len(get_args(hint)):
+            # Optional: None, or the other options
+            inner = self.check(
+                var,
+                Union[tuple(options)] if len(options) > 1 else options[0],
+                path)
+
+            if not inner:
+                return []
+
+            return [f'if {var} is not None:'] + _indent(inner)
+
+        # other unions are only checked against each option's class
+        classes = tuple(
+            get_origin(option) or option for option in options)
+
+        if Any in classes:
+            return []
+
+        names = ', '.join(option.__name__ for option in classes)
+
+        return [
+            f'if not isinstance({var}, {self.bind(classes)}):',
+            f'    {self.fail(path, f"expected one of {names}")}',
+        ]
+
+    def _check_list(self, var: str, hint: Any, path: str) -> List[str]:
+        lines = [
+            f'if type({var}) is not list:',
+            f'    {self.fail(path, "expected an array")}',
+        ]
+        (item_hint,) = get_args(hint) or (Any,)
+        item, index, items = (
+            self.name('_item'), self.name('_index'), self.name('_items'))
+        inner = self.check(
+            item, item_hint, f'{path} + "[" + str({index}) + "]"')
+
+        if not inner:
+            return lines
+
+        return lines + [
+            f'{items} = []',
+            f'for {index}, {item} in enumerate({var}):',
+        ] + _indent(inner + [f'{items}.append({item})']) + [
+            f'{var} = {items}',
+        ]
+
+    def _check_dict(self, var: str, hint: Any, path: str) -> List[str]:
+        lines = [
+            f'if type({var}) is not dict:',
+            f'    {self.fail(path, "expected an object")}',
+        ]
+        _, value_hint = get_args(hint) or (Any, Any)
+        key, value, values = (
+            self.name('_key'), self.name('_value'), self.name('_values'))
+        inner = self.check(value, value_hint, f'{path} + "." + str({key})')
+
+        if not inner:
+            return lines
+
+        return lines + [
+            f'{values} = {{}}',
+            f'for {key}, {value} in {var}.items():',
+        ] + _indent(inner + [f'{values}[{key}] = {value}']) + [
+            f'{var} = {values}',
+        ]
+
+
+def _indent(lines: List[str], depth: int = 1) -> List[str]:
+    return [('    ' * depth) + line for line in lines]
+
+
+def _exec(source: str, name: str, namespace: Dict[str, Any]) -> None:
+    # pylint: disable=exec-used
+    exec(compile(source, f'<compiled {name}>', 'exec'), namespace)
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def compile_validator(
+    data_type: Type[D],
+    required: Optional[Iterable[str]] = None,
+) -> Validator[D]:
+    """Compile a validator for payloads shaped like a TypedDict.
+
+    Fields are required as the TypedDict defines them, unless given the
+    names of the only `required` fields. Payloads with fields it doesn't
+    define are invalid.
+    """
+    hints = get_type_hints(data_type)
+    required_fields = set(
+        required if required is not None
+        else getattr(data_type, '__required_keys__', hints))
+    compiler = _Compiler()
+    known = compiler.bind(frozenset(hints))
+    lines = [
+        'def validate(data):',
+        '    if type(data) is not dict:',
+        f'        {compiler.fail(repr(""), "expected an object")}',
+        '    result = {}',
+    ]
+
+    for field, hint in hints.items():
+        var = compiler.name('_field')
+        check = compiler.check(var, hint, repr(field))
+
+        if field in required_fields:
+            lines += _indent([
+                f'if {field!r} not in data:',
+                f'    {compiler.fail(repr(field), "is required")}',
+                f'{var} = data[{field!r}]',
+            ] + check + [f'result[{field!r}] = {var}'])
+        else:
+            lines += _indent([
+                f'if {field!r} in data:',
+            ] + _indent(
+                [f'{var} = data[{field!r}]']
+                + check
+                + [f'result[{field!r}] = {var}']))
+
+    lines += _indent([
+        'if len(result) != len(data):',
+        f'    unknown = ", ".join(sorted(map(str, data.keys() - {known})))',
+        '    raise ValidationError("", "unknown fields: " + unknown)',
+        'return result',
+    ])
+
+    _exec('\n'.join(lines), data_type.__name__, compiler.namespace)
+    validate: Validator[D] = compiler.namespace['validate']
+    validate.__qualname__ = validate.__name__ = \
+        f'validate_{data_type.__name__}'
+
+    return validate
+
+
+class Row(ABC):
+    """A row with a slot per field, see `compile_row`."""
+
+    __slots__ = ()
+
+    fields: ClassVar[Tuple[str, ...]] = ()
+
+    @abstractmethod
+    def __init__(self, *values: Any) -> None:
+        """Set each field to its value, in order."""
+
+    @abstractmethod
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the row as a dictionary."""
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate over the row's values, in order of its fields."""
+        return (getattr(self, field) for field in self.fields)
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare rows of the same class by their values."""
+        return type(other) is type(self) and tuple(other) == tuple(self)
+
+    def __repr__(self) -> str:
+        """Show the row's values, by field."""
+        values = ', '.join(
+            f'{field}={getattr(self, field)!r}' for field in self.fields)
+
+        return f'{type(self).__name__}({values})'
+
+    @classmethod
+    @abstractmethod
+    def from_dict(cls, row: Dict[str, Any]) -> 'Row':
+        """Build from a row read as a dictionary."""
+
+    @classmethod
+    def from_columnar(cls, result: Columnar) -> List['Row']:
+        """Build a row for each of a Columnar result's rows."""
+        if tuple(result.columns) == cls.fields:
+            return [cls(*values) for values in result.rows]
+
+        indexes = [result.columns.index(field) for field in cls.fields]
+
+        if len(indexes) == 1:
+            return [cls(values[indexes[0]]) for values in result.rows]
+
+        get = itemgetter(*indexes)
+
+        return [cls(*get(values)) for values in result.rows]
+
+
+def compile_row(data_type: Type[Any], name: str = '') -> Type[Row]:
+    """Compile a Row class with a slot for each field of a TypedDict.
+
+    Named after the TypedDict, ending in Row instead of Data, unless given
+    a name.
+    """
+    fields = tuple(get_type_hints(data_type))
+
+    for field in fields:
+        if not field.isidentifier() or keyword.iskeyword(field):
+            raise ValueError(f'Field `{field}` can\'t be a slot name.')
+
+    name = name or data_type.__name__.replace('Data', '') + 'Row'
+    arguments = ', '.join(fields)
+    source = '\n'.join([
+        f'def __init__(self, {arguments}):',
+        *_indent([f'self.{field} = {field}' for field in fields]),
+        '',
+        'def as_dict(self):',
+        '    return {' + ', '.join(
+            f'{field!r}: self.{field}' for field in fields) + '}',
+        '',
+        'def from_dict(cls, row):',
+        '    return cls(' + ', '.join(
+            f'row[{field!r}]' for field in fields) + ')',
+    ])
+    namespace: Dict[str, Any] = {}
+    _exec(source, name, namespace)
+
+    row_class: Type[Row] = type(name, (Row,), {
+        '__slots__': fields,
+        '__module__': data_type.__module__,
+        'fields': fields,
+        '__init__': namespace['__init__'],
+        'as_dict': namespace['as_dict'],
+        'from_dict': classmethod(namespace['from_dict']),
+    })
+
+    return row_class
+
+
+SERIALIZERS.register(Row, lambda row: row.as_dict())
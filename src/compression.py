@@ -0,0 +1,97 @@
+"""Decide whether & how to compress message bodies.
+
+Compressing a message costs CPU time on both ends, which only pays off
+when it shrinks the message enough to save more time on the wire. Small
+bodies (like a short string reply) barely shrink at all, so a
+CompressionPolicy leaves any body smaller than its `min_size` as is &
+compresses the rest at its `level`.
+
+The encoding used is named with the same tokens as HTTP's
+`Content-Encoding` header, to be sent in an AMQP message's
+`content_encoding` property so consumers know how to decode it:
+
+    identity: not compressed
+    gzip: compressed with gzip
+    deflate: compressed with zlib
+
+Messages without a `content_encoding` are assumed to be gzip compressed,
+as every message was before encodings were marked.
+"""
+
+import gzip
+import zlib
+from typing import Optional, Tuple
+
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+DEFLATE = 'deflate'
+ENCODINGS = (IDENTITY, GZIP, DEFLATE)
+
+# encoding of messages that don't name one
+DEFAULT_ENCODING = GZIP
+
+
+class CompressionPolicy:
+    """Compress bodies of at least `min_size` bytes with `encoding`.
+
+    Level ranges from 1 (fastest) to 9 (smallest), the default of 6 is
+    zlib's own default & usually compresses nearly as well as 9 in a
+    fraction of the time.
+    """
+
+    min_size: int
+    level: int
+    encoding: str
+
+    def __init__(
+        self,
+        min_size: int = 1024,
+        level: int = 6,
+        encoding: str = GZIP,
+    ) -> None:
+        if encoding not in (GZIP, DEFLATE):
+            raise ValueError(
+                f'Unknown compression `{encoding}`, must be one of '
+                f'{GZIP}, {DEFLATE}')
+
+        if not 1 <= level <= 9:
+            raise ValueError('Compression level must be between 1 & 9')
+
+        self.min_size = min_size
+        self.level = level
+        self.encoding = encoding
+
+    def compress(self, body: bytes) -> Tuple[bytes, str]:
+        """Compress body if it's large enough, return it & its encoding."""
+        if len(body) < self.min_size:
+            return body, IDENTITY
+
+        if self.encoding == GZIP:
+            return gzip.compress(body, compresslevel=self.level), GZIP
+
+        return zlib.compress(body, self.level), DEFLATE
+
+
+# compress everything, as JSONGzipRPC & JSONGzipMaster do
+ALWAYS_GZIP = CompressionPolicy(min_size=0, level=9)
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def decompress(body: bytes, encoding: Optional[str]) -> bytes:
+    """Decompress a body according to the encoding it's marked with."""
+    encoding = encoding or DEFAULT_ENCODING
+
+    if encoding == IDENTITY:
+        return body
+
+    if encoding == GZIP:
+        return gzip.decompress(body)
+
+    if encoding == DEFLATE:
+        return zlib.decompress(body)
+
+    raise ValueError(
+        f'Unknown content encoding `{encoding}`, must be one of '
+        f'{", ".join(ENCODINGS)}')
@@ -0,0 +1,808 @@
+"""A database Client that runs compiled queries as prepared statements.
+
+Composing a query with psycopg2's `sql` module (parsing `sql.SQL` & quoting
+every Identifier & Literal) on every call costs measurable CPU at high
+request rates. Instead, a Query is composed once with placeholders where
+its parameters go, rendered to text the first time it's run, & run with
+bound parameters from then on.
+
+A Client also prepares each Query on a connection the first time it's run
+there, so Postgres parses & plans it only once per connection, then runs
+it with `EXECUTE`. Prepared statements belong to a connection, so each
+pooled connection tracks its own.
+
+Client extends db_wrapper's Client, so it can be used by Models in its
+place:
+
+    query = Query(sql.SQL('SELECT * FROM {table} WHERE string = {string}')
+        .format(table=sql.Identifier('example_item'),
+                string=sql.Placeholder()))
+
+    rows = await run(client, query, ('match me',))
+
+A Client can also listen for notifications sent with Postgres' `NOTIFY`,
+on a connection of its own. Callbacks are given each notification's
+payload, or None when the listening connection was lost & reconnected,
+since notifications sent in the meantime are missed:
+
+    client.listen('model_change', lambda payload: print(payload))
+
+Queries can also return a `columnar.Columnar` result, each row a tuple
+instead of a dictionary repeating every column name:
+
+    result = await run(client, query, ('match me',), columnar=True)
+
+Given `raw_json=True`, a Client reads `json` & `jsonb` columns as
+`raw_json.RawJSON`, their text unparsed, instead of as dictionaries. Any
+Client can write a RawJSON, its text sent as is.
+
+A Client runs queries on a pool of connections, so they don't wait for
+each other, & can route reads to a read replica, with a pool of its own:
+
+    client = Client(params, pool=PoolOptions(max_size=20),
+                    replica_params=replica_params)
+    reader = ExampleItemReader(read_client(client), table)  # on replica
+
+Time spent waiting for a free connection is recorded as a metric, by pool
+(see `POOL_WAIT`) & by the fingerprint of the query that waited, as is
+every query's latency, see `query_stats`. Queries sharing state held by a
+connection between them (like a cursor) can hold one connection with
+`session`.
+
+Queries made while handling a request with a deadline (see
+`request_context`) run with a `statement_timeout` of the time left until
+it, so Postgres stops working on them once the caller has given up, &
+raise DeadlineExceeded instead.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from hashlib import md5
+from logging import getLogger
+import re
+import time
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    cast,
+)
+from weakref import WeakKeyDictionary
+
+import aiopg
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extensions import (
+    QuotedString,
+    connection as Connection,
+    new_type,
+    register_adapter,
+    register_type,
+)
+from psycopg2.extras import RealDictCursor
+
+import db_wrapper as db
+
+from columnar import Columnar
+import metrics
+import query_stats
+from raw_json import RawJSON
+import request_context
+from request_context import DeadlineExceeded
+
+
+LOGGER = getLogger(__name__)
+
+# psycopg2 placeholders & escaped percent signs
+_PLACEHOLDER = re.compile(r'%%|%s')
+
+# seconds between checks that the listening connection is still open, &
+# between attempts to reconnect it
+LISTEN_CHECK_INTERVAL = 5.0
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+Listener = Callable[[Optional[str]], None]
+
+# type oids of json & jsonb
+_JSON_OIDS = (114, 3802)
+
+# error code of PREPARE given a name already prepared on the connection
+_DUPLICATE_PREPARED_STATEMENT = '42P05'
+# error code of a query cancelled by its statement_timeout
+_QUERY_CANCELED = '57014'
+
+# names of a Client's pools
+PRIMARY = 'primary'
+REPLICA = 'replica'
+
+POOL_WAIT = metrics.Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting for a free pooled connection, by pool.',
+    ['pool'])
+POOL_TIMEOUTS = metrics.Counter(
+    'db_pool_timeouts_total',
+    'Queries that gave up waiting for a free pooled connection, by pool.',
+    ['pool'])
+POOL_CONNECTIONS = metrics.Gauge(
+    'db_pool_connections',
+    'Open pooled connections, by pool & state (idle or used).',
+    ['pool', 'state'])
+
+
+def _cast_raw_json(value: Optional[str], _: Any) -> Optional[RawJSON]:
+    return RawJSON(value) if value is not None else None
+
+
+RAW_JSON = new_type(_JSON_OIDS, 'RAW_JSON', _cast_raw_json)
+
+register_adapter(RawJSON, lambda value: QuotedString(value.text))
+
+
+class Query:
+    """A query composed once, run with positional parameters.
+
+    Parameters are given by `sql.Placeholder()` in the composed query.
+    """
+
+    composed: sql.Composable
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    _text: Optional[str]
+    _prepare_text: Optional[str]
+    name: Optional[str]
+
+    def __init__(self, composed: sql.Composable) -> None:
+        self.composed = composed
+        self._text = None
+        self._prepare_text = None
+        self.name = None
+
+    def text(self, connection: Connection) -> str:
+        """Render query once, with %s placeholders for its parameters."""
+        if self._text is None:
+            self._text = self.composed.as_string(connection) or ''
+
+        return self._text
+
+    def prepare_text(self, connection: Connection) -> str:
+        """Render query once as a PREPARE statement, with $n parameters."""
+        if self._prepare_text is None:
+            text = self.text(connection)
+            count = 0
+
+            def number(match: 're.Match[str]') -> str:
+                nonlocal count
+
+                if match.group() == '%%':
+                    return '%'
+
+                count += 1
+
+                return f'${count}'
+
+            # statements are named by their text, so the same query is only
+            # prepared once per connection, however many Query objects
+            # hold it
+            self.name = f'q_{md5(text.encode("utf8")).hexdigest()}'
+            self._prepare_text = \
+                f'PREPARE {self.name} AS {_PLACEHOLDER.sub(number, text)}'
+
+        return self._prepare_text
+
+    def bind(self, params: Sequence[Any]) -> sql.Composable:
+        """Compose query with parameters as literals, for other Clients."""
+        literals = iter([sql.Literal(param) for param in params])
+
+        def replace(part: sql.Composable) -> sql.Composable:
+            if isinstance(part, sql.Placeholder):
+                return next(literals)
+
+            if isinstance(part, sql.Composed):
+                children = cast(List[sql.Composable], part.seq)
+
+                return sql.Composed([replace(child) for child in children])
+
+            return part
+
+        return replace(self.composed)
+
+
+@dataclass
+class PoolOptions:
+    """Sizing of a Client's connection pools.
+
+    Each pool opens `min_size` connections when the Client connects & more
+    as queries need them, up to `max_size`. A query waits for a free
+    connection for up to `acquire_timeout` seconds, then raises
+    PoolTimeout.
+    """
+
+    min_size: int = 1
+    max_size: int = 10
+    acquire_timeout: float = 10.0
+
+
+class PoolTimeout(asyncio.TimeoutError):
+    """No pooled connection was free within the acquire timeout."""
+
+
+def _dsn(params: db.ConnectionParameters) -> Dict[str, Any]:
+    return {
+        'host': params.host,
+        'user': params.user,
+        'password': params.password,
+        'dbname': params.database,
+    }
+
+
+def _bound_by_deadline(text: str) -> str:
+    """Limit a query to the time left until the current deadline, if any.
+
+    Raises DeadlineExceeded if it has already passed.
+    """
+    left = request_context.remaining()
+
+    if left is None:
+        return text
+
+    if left <= 0:
+        raise DeadlineExceeded(
+            'Query wasn\'t run, its request\'s deadline had passed')
+
+    # statements sent together run in one (implicit) transaction, which
+    # SET LOCAL lasts until, so the timeout doesn't outlive the query
+    return f'SET LOCAL statement_timeout = {max(1, int(left * 1000))}; ' \
+        + text
+
+
+def _count_connections(name: str, pool: aiopg.Pool) -> None:
+    POOL_CONNECTIONS.labels(name, 'idle').set(pool.freesize)
+    POOL_CONNECTIONS.labels(name, 'used').set(pool.size - pool.freesize)
+
+
+class Client(db.Client):
+    """A db_wrapper Client running Queries as prepared statements, pooled.
+
+    Each query runs on a connection acquired from a pool of connections to
+    the primary server, sized by `pool`. Given `replica_params`, queries
+    made through `client.replica` (which Models' read methods are given,
+    see `read_client`) run on a second pool, of connections to a read
+    replica; otherwise they run on the primary too.
+
+    Give `prepare=False` to run Queries with bound parameters, without
+    preparing them, or `raw_json=True` to read `json` & `jsonb` columns as
+    RawJSON. Every query's latency & rows returned are recorded, see
+    `query_stats`; queries slower than `slow_query_threshold` seconds, if
+    given, are also logged.
+    """
+
+    connection_params: db.ConnectionParameters
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    replica_params: Optional[db.ConnectionParameters]
+    pool: PoolOptions
+    prepare: bool
+    raw_json: bool
+    replica: 'ReadClient'
+    _pools: Dict[str, aiopg.Pool]
+    slow_query_threshold: Optional[float]
+    _prepared: 'WeakKeyDictionary[aiopg.Connection, Set[str]]'
+    _waited: 'WeakKeyDictionary[aiopg.Connection, float]'
+    _listeners: Dict[str, List[Listener]]
+    _listen_connection: Optional[aiopg.Connection]
+    _listen_task: Optional['asyncio.Task[None]']
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    def __init__(
+        self,
+        connection_params: db.ConnectionParameters,
+        prepare: bool = True,
+        raw_json: bool = False,
+        pool: Optional[PoolOptions] = None,
+        replica_params: Optional[db.ConnectionParameters] = None,
+        slow_query_threshold: Optional[float] = None,
+    ) -> None:
+        super().__init__(connection_params)
+        self.connection_params = connection_params
+        self.replica_params = replica_params
+        self.pool = pool or PoolOptions()
+        self.prepare = prepare
+        self.raw_json = raw_json
+        self.slow_query_threshold = slow_query_threshold
+        self.replica = ReadClient(self)
+        self._pools = {}
+        self._prepared = WeakKeyDictionary()
+        self._waited = WeakKeyDictionary()
+        self._listeners = {}
+        self._listen_connection = None
+        self._listen_task = None
+
+    def listen(self, channel: str, callback: Listener) -> None:
+        """Call callback with each notification sent on a channel.
+
+        Must be called before connecting. Callbacks run on the event loop,
+        so must not block it.
+        """
+        if self._listen_connection is not None:
+            raise RuntimeError(
+                'Channels must be listened to before the Client connects.')
+
+        self._listeners.setdefault(channel, []).append(callback)
+
+    async def _open(self) -> aiopg.Connection:
+        return await aiopg.connect(**_dsn(self.connection_params))
+
+    async def _on_connect(self, connection: aiopg.Connection) -> None:
+        if self.raw_json:
+            register_type(RAW_JSON, connection.raw)
+
+    async def _create_pool(
+        self,
+        params: db.ConnectionParameters,
+    ) -> aiopg.Pool:
+        return await aiopg.create_pool(
+            minsize=self.pool.min_size,
+            maxsize=self.pool.max_size,
+            on_connect=self._on_connect,
+            **_dsn(params))
+
+    async def connect(self) -> None:
+        """Connect to the database, opening each pool's connections."""
+        self._pools[PRIMARY] = await self._create_pool(self.connection_params)
+
+        if self.replica_params is not None:
+            self._pools[REPLICA] = await self._create_pool(
+                self.replica_params)
+
+        for name, pool in self._pools.items():
+            _count_connections(name, pool)
+
+        if self._listeners:
+            self._listen_connection = await self._open_listener()
+            self._listen_task = asyncio.create_task(self._listen())
+
+    async def disconnect(self) -> None:
+        """Disconnect from the database."""
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            self._listen_task = None
+
+        if self._listen_connection is not None:
+            await self._listen_connection.close()
+            self._listen_connection = None
+
+        pools, self._pools = self._pools, {}
+
+        for pool in pools.values():
+            pool.close()
+            await pool.wait_closed()
+
+    async def _open_listener(self) -> aiopg.Connection:
+        connection = await self._open()
+
+        async with connection.cursor() as cursor:
+            for channel in self._listeners:
+                await cursor.execute(
+                    sql.SQL('LISTEN {channel};').format(
+                        channel=sql.Identifier(channel)))
+
+        return connection
+
+    async def _reopen_listener(self) -> None:
+        """Reconnect the listening connection, retrying until it succeeds."""
+        if self._listen_connection is not None:
+            await self._listen_connection.close()
+
+        while True:
+            try:
+                self._listen_connection = await self._open_listener()
+                break
+            except (psycopg2.Error, OSError):
+                LOGGER.exception('Failed to reconnect listening connection')
+                await asyncio.sleep(LISTEN_CHECK_INTERVAL)
+
+        # anything sent while disconnected was missed
+        for channel in self._listeners:
+            self._notify(channel, None)
+
+    def _notify(self, channel: str, payload: Optional[str]) -> None:
+        for callback in self._listeners.get(channel, []):
+            try:
+                callback(payload)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception(
+                    f'Listener failed to handle notification on {channel}')
+
+    async def _listen(self) -> None:
+        while True:
+            connection = self._listen_connection
+
+            if connection is None:
+                return
+
+            try:
+                notification = await asyncio.wait_for(
+                    connection.notifies.get(), LISTEN_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                if connection.closed:
+                    await self._reopen_listener()
+                continue
+            except psycopg2.Error:
+                await self._reopen_listener()
+                continue
+
+            self._notify(notification.channel, notification.payload)
+
+    @asynccontextmanager
+    async def _acquire(
+        self,
+        readonly: bool = False,
+    ) -> AsyncIterator[aiopg.Connection]:
+        """Hold a connection from a pool, the replica's if readonly."""
+        name = REPLICA if readonly and REPLICA in self._pools else PRIMARY
+        pool = self._pools.get(name)
+
+        if pool is None:
+            raise RuntimeError('Client must be connected to run queries.')
+
+        start = time.perf_counter()
+
+        try:
+            connection = await asyncio.wait_for(
+                pool.acquire(), self.pool.acquire_timeout)
+        except asyncio.TimeoutError:
+            POOL_TIMEOUTS.labels(name).inc()
+            raise PoolTimeout(
+                f'No {name} connection was free within '
+                f'{self.pool.acquire_timeout} seconds.') from None
+        finally:
+            waited = time.perf_counter() - start
+            POOL_WAIT.labels(name).observe(waited)
+
+        # recorded with the connection's first query
+        self._waited[connection] = waited
+        _count_connections(name, pool)
+
+        try:
+            yield connection
+        finally:
+            pool.release(connection)
+            _count_connections(name, pool)
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    async def _query(
+        self,
+        connection: aiopg.Connection,
+        query: Any,
+        params: Optional[Sequence[Any]],
+        returning: bool,
+        columnar: bool = False,
+        statement: Optional[str] = None,
+        after_wait: bool = True,
+    ) -> Any:
+        """Run a query on a connection, recording its latency & rows.
+
+        Recorded by the fingerprint of `statement` if given (e.g. the text
+        of a Query run with `EXECUTE`), or else of the query's template.
+        Also records the time the connection was waited for, if this is
+        its first query since, unless not `after_wait` (e.g. a `PREPARE`
+        run before the query that waited).
+        """
+        text = query if isinstance(query, str) \
+            else query.as_string(connection.raw)
+        bounded = _bound_by_deadline(text)
+        rows: Optional[List[Any]] = None
+        start = time.perf_counter()
+
+        try:
+            async with connection.cursor(
+                    cursor_factory=None if columnar else RealDictCursor
+            ) as cursor:
+                try:
+                    await cursor.execute(bounded, params)
+                except psycopg2.Error as err:
+                    if bounded is not text \
+                            and err.pgcode == _QUERY_CANCELED:
+                        raise DeadlineExceeded(
+                            'Query was cancelled, its request\'s deadline '
+                            'passed while it ran') from err
+
+                    raise
+
+                if not returning:
+                    return []
+
+                rows = await cursor.fetchall()
+
+                if columnar:
+                    return Columnar(
+                        tuple(column.name for column in cursor.description),
+                        rows)
+
+                result: List[Any] = rows
+
+                return result
+        finally:
+            duration = time.perf_counter() - start
+
+            if statement is None:
+                statement = text if isinstance(query, str) \
+                    else query_stats.template(query, connection.raw)
+
+            query_stats.record(
+                statement,
+                duration,
+                len(rows) if rows is not None else None,
+                self._waited.pop(connection, None) if after_wait else None,
+                self.slow_query_threshold)
+
+    async def _run(
+        self,
+        connection: aiopg.Connection,
+        query: Query,
+        params: Sequence[Any],
+        columnar: bool,
+    ) -> Any:
+        raw = connection.raw
+
+        if not self.prepare:
+            return await self._query(
+                connection, query.text(raw), params, True, columnar)
+
+        prepare_text = query.prepare_text(raw)
+        prepared = self._prepared.setdefault(connection, set())
+
+        if query.name not in prepared:
+            try:
+                await self._query(
+                    connection, prepare_text, None, False, after_wait=False)
+            except psycopg2.Error as err:
+                # prepared by a run cancelled before it could be recorded
+                if err.pgcode != _DUPLICATE_PREPARED_STATEMENT:
+                    raise
+
+            prepared.add(query.name)  # type: ignore
+
+        if params:
+            placeholders = ','.join(['%s'] * len(params))
+
+            return await self._query(
+                connection,
+                f'EXECUTE {query.name} ({placeholders})',
+                params,
+                True,
+                columnar,
+                statement=query.text(raw))
+
+        return await self._query(
+            connection,
+            f'EXECUTE {query.name}',
+            None,
+            True,
+            columnar,
+            statement=query.text(raw))
+
+    async def execute(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+        readonly: bool = False,
+    ) -> None:
+        """Execute a query."""
+        async with self._acquire(readonly) as connection:
+            await self._query(connection, query, params, returning=False)
+
+    async def execute_and_return(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+        readonly: bool = False,
+    ) -> List[Any]:
+        """Execute a query & return its result, a dictionary per row."""
+        async with self._acquire(readonly) as connection:
+            result: List[Any] = await self._query(
+                connection, query, params, returning=True)
+
+        return result
+
+    async def execute_columnar(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+        readonly: bool = False,
+    ) -> Columnar:
+        """Execute a query & return its result, a tuple per row."""
+        async with self._acquire(readonly) as connection:
+            result: Columnar = await self._query(
+                connection, query, params, returning=True, columnar=True)
+
+        return result
+
+    async def run(
+        self,
+        query: Query,
+        params: Sequence[Any] = (),
+        columnar: bool = False,
+        readonly: bool = False,
+    ) -> Any:
+        """Run a Query with given parameters & return its result.
+
+        Returns a dictionary per row, or a Columnar result if columnar.
+        """
+        async with self._acquire(readonly) as connection:
+            return await self._run(connection, query, params, columnar)
+
+    @asynccontextmanager
+    async def session(
+        self,
+        readonly: bool = False,
+    ) -> AsyncIterator['Session']:
+        """Hold one pooled connection, for queries sharing its state.
+
+        Queries are usually each run on whichever connection is free, but
+        some state (like a cursor) only exists on the connection that made
+        it. The Session given runs every query on the same connection,
+        until the block exits.
+        """
+        async with self._acquire(readonly) as connection:
+            yield Session(self, connection)
+
+
+class Session:
+    """Queries run by a Client on one held connection, see Client.session."""
+
+    client: Client
+    connection: aiopg.Connection
+
+    def __init__(self, client: Client, connection: aiopg.Connection) -> None:
+        self.client = client
+        self.connection = connection
+
+    async def execute(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+    ) -> None:
+        """Execute a query."""
+        # pylint: disable=protected-access
+        await self.client._query(
+            self.connection, query, params, returning=False)
+
+    async def execute_and_return(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+    ) -> List[Any]:
+        """Execute a query & return its result, a dictionary per row."""
+        # pylint: disable=protected-access
+        result: List[Any] = await self.client._query(
+            self.connection, query, params, returning=True)
+
+        return result
+
+    async def run(
+        self,
+        query: Query,
+        params: Sequence[Any] = (),
+        columnar: bool = False,
+    ) -> Any:
+        """Run a Query with given parameters & return its result."""
+        # pylint: disable=protected-access
+        return await self.client._run(
+            self.connection, query, params, columnar)
+
+
+class ReadClient(db.Client):
+    """A Client's queries, run on its read replica if it has one.
+
+    Given to Models' read methods by `read_client`, so reads go to the
+    replica & writes to the primary. Connected by the Client it belongs to.
+    Replicas apply the primary's writes after a delay, so a read made just
+    after a write may not see it.
+    """
+
+    primary: Client
+
+    def __init__(self, primary: Client) -> None:
+        super().__init__(primary.replica_params or primary.connection_params)
+        self.primary = primary
+
+    async def connect(self) -> None:
+        """Do nothing, the Client this belongs to connects it."""
+
+    async def disconnect(self) -> None:
+        """Do nothing, the Client this belongs to disconnects it."""
+
+    async def execute(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+    ) -> None:
+        """Execute a query."""
+        await self.primary.execute(query, params, readonly=True)
+
+    async def execute_and_return(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+    ) -> List[Any]:
+        """Execute a query & return its result, a dictionary per row."""
+        return await self.primary.execute_and_return(
+            query, params, readonly=True)
+
+    async def execute_columnar(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+    ) -> Columnar:
+        """Execute a query & return its result, a tuple per row."""
+        return await self.primary.execute_columnar(
+            query, params, readonly=True)
+
+    async def run(
+        self,
+        query: Query,
+        params: Sequence[Any] = (),
+        columnar: bool = False,
+    ) -> Any:
+        """Run a Query with given parameters & return its result."""
+        return await self.primary.run(query, params, columnar, readonly=True)
+
+    def session(self) -> AsyncContextManager[Session]:
+        """Hold one pooled connection, see Client.session."""
+        return self.primary.session(readonly=True)
+
+
+def read_client(client: db.Client) -> db.Client:
+    """Get the client a Model's read methods should run queries with.
+
+    That's a `database.Client`'s replica, or any other client itself.
+    """
+    if isinstance(client, Client):
+        return client.replica
+
+    return client
+
+
+@asynccontextmanager
+async def session(client: db.Client) -> AsyncIterator[Any]:
+    """Run queries on one connection, for state held between them.
+
+    Yields a Session of a `database.Client` (or its replica), or any other
+    client itself, since it already runs every query on one connection.
+    """
+    if isinstance(client, (Client, ReadClient)):
+        async with client.session() as held:
+            yield held
+    else:
+        yield client
+
+
+async def run(
+    client: db.Client,
+    query: Query,
+    params: Sequence[Any] = (),
+    columnar: bool = False,
+) -> Any:
+    """Run a Query with given parameters on any db_wrapper Client.
+
+    Returns a dictionary per row, or a Columnar result if columnar.
+    Clients that aren't a `database.Client` get the query composed with
+    its parameters on every call, & their rows converted if columnar.
+    """
+    if isinstance(client, (Client, ReadClient)):
+        return await client.run(query, params, columnar)
+
+    result: List[Any] = await client.execute_and_return(query.bind(params))
+
+    return Columnar.from_dicts(result) if columnar else result
@@ -1,13 +1,16 @@
 """Extended JSON encoding to encode API responses properly."""
 
 import logging
-from typing import cast, Any
-from uuid import UUID
+from typing import cast, Any, Awaitable, Callable, Optional
 
 from amqp_worker.connection import Channel
 from amqp_worker.serializer import ResponseEncoder, JSONEncoderTypes
-from amqp_worker.rpc_worker import JSONGzipRPC
-from amqp_worker.queue_worker import JSONGzipMaster
+
+from compression import CompressionPolicy
+import msgpack_codec
+from patterns import RPC, Master, JSON_CONTENT_TYPE
+import raw_json
+from serializers import SERIALIZERS
 
 
 LOGGER = logging.getLogger(__name__)
@@ -22,33 +25,33 @@ LOGGER = logging.getLogger(__name__)
 class ExtendedJSONEncoder(ResponseEncoder):
     """Extend JSONEncoder to handle additional data types.
 
-    Now handles the following new types:
+    Handles every type with a serializer registered in
+    `serializers.SERIALIZERS` (including uuid.UUID, datetime, Decimal,
+    bytes, enums, & dataclasses), see `serializers` for how each is encoded.
+    Register a serializer there to add support for a new type.
 
-    -------------------------------
-    | python             | json   |
-    |--------------------|--------|
-    | uuid.UUID          | string | -> to str, then to JSON string
-    -------------------------------
+    `raw_json.RawJSON` values are spliced into the output as is, without
+    being parsed.
 
     All others fall back to default JSONEncoder rules.
     """
 
-    def default(self, o: Any) -> JSONEncoderTypes:
-        """
-        Add serialization for new types.
+    def encode(self, o: Any) -> str:
+        """Encode o as JSON, splicing in any RawJSON values."""
+        with raw_json.fragments() as found:
+            text: str = super().encode(o)
 
-        Adds support for pydantic.BaseModel, datetime.date, uuid.UUID, &
-        decimal.Decimal.
-        """
-        LOGGER.debug('Using custom serializer...')
-        LOGGER.debug(f'o: {o}')
-        LOGGER.debug(f'type: {type(o)}')
+        return raw_json.splice(text, found)
 
+    def default(self, o: Any) -> JSONEncoderTypes:
+        """Add serialization for types with a registered serializer."""
         # first parse for extended types:
+        serializer = SERIALIZERS.find(type(o))
+
+        if serializer is not None:
+            result: JSONEncoderTypes = serializer(o)
 
-        if isinstance(o, UUID):
-            LOGGER.debug('o is instance of UUID')
-            return str(o)
+            return result
 
         # then, fall back to ResponseEncoder.default method
         return ResponseEncoder.default(self, o)
@@ -56,7 +59,7 @@ class ExtendedJSONEncoder(ResponseEncoder):
 
 async def json_gzip_rpc_factory(
     channel: Channel
-) -> JSONGzipRPC:
+) -> RPC:
     """
     Build a Pattern using JSONEncoder Extension.
 
@@ -64,8 +67,8 @@ async def json_gzip_rpc_factory(
     default Pattern with default JSONEncoder.
     """
     pattern = cast(
-        JSONGzipRPC,
-        await JSONGzipRPC.create(channel))
+        RPC,
+        await RPC.create(channel))
     # replace default encoder with extended JSON encoder
     pattern.json_encoder = ExtendedJSONEncoder()
 
@@ -74,15 +77,80 @@ async def json_gzip_rpc_factory(
 
 def json_gzip_queue_factory(
     channel: Channel
-) -> JSONGzipMaster:
+) -> Master:
     """
     Build a Pattern using JSONEncoder Extension.
 
     Intended to be passed to an AMQP Worker on initialization to replace
     default Pattern with default JSONEncoder.
     """
-    pattern = JSONGzipMaster(channel)
+    pattern = Master(channel)
     # replace default encoder with extended JSON encoder
     pattern.json_encoder = ExtendedJSONEncoder()
 
     return pattern
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def adaptive_rpc_factory(
+    compression: CompressionPolicy,
+    offload_min_size: Optional[int] = None,
+    content_type: str = JSON_CONTENT_TYPE,
+) -> Callable[[Channel], Awaitable[RPC]]:
+    """
+    Build a Pattern factory compressing responses according to a policy.
+
+    Like `json_gzip_rpc_factory`, but responses smaller than the policy's
+    minimum size are sent uncompressed, & the rest are compressed at the
+    policy's level. Each response's encoding is marked in its
+    `content_encoding` property.
+
+    Given `offload_min_size`, responses encoded to at least that many bytes
+    are compressed in a thread pool, off the event loop.
+
+    Requests that don't name a content type are decoded (& replied to) as
+    `content_type`.
+    """
+    async def factory(channel: Channel) -> RPC:
+        pattern = await json_gzip_rpc_factory(channel)
+        pattern.compression = compression
+        pattern.offload_min_size = offload_min_size
+        pattern.content_type = content_type
+
+        return pattern
+
+    return factory
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def msgpack_rpc_factory(
+    compression: CompressionPolicy,
+    offload_min_size: Optional[int] = None,
+) -> Callable[[Channel], Awaitable[RPC]]:
+    """
+    Build a Pattern factory using MessagePack for messages without a type.
+
+    Like `adaptive_rpc_factory`, compressing responses according to a
+    policy. Requests naming JSON as their content type are still decoded &
+    replied to as JSON.
+    """
+    return adaptive_rpc_factory(
+        compression,
+        offload_min_size=offload_min_size,
+        content_type=msgpack_codec.CONTENT_TYPE)
+
+
+def msgpack_queue_factory(
+    channel: Channel
+) -> Master:
+    """
+    Build a Pattern using MessagePack for messages without a content type.
+
+    Tasks naming JSON as their content type are still decoded as JSON.
+    """
+    pattern = json_gzip_queue_factory(channel)
+    pattern.content_type = msgpack_codec.CONTENT_TYPE
+
+    return pattern
@@ -0,0 +1,155 @@
+"""Thread & process pools to run blocking or CPU bound route handlers in.
+
+Route handlers run on the event loop, so a synchronous handler that takes
+a long time (doing real computation, or blocking i/o) stalls every other
+route while it runs. Offloading a handler runs it in a thread pool or a
+process pool instead, leaving the loop free:
+
+    thread: for handlers that block on i/o or release the GIL, arguments &
+        return values are passed as is
+    process: for CPU bound handlers, arguments & return values are pickled
+        to be passed between processes
+
+A third pool, `codec`, is a thread pool reserved for compressing large
+messages off the event loop (see `patterns`), kept separate so slow
+handlers can't hold up replies from other routes.
+
+Pools are created when first used & are managed by the Runner, which sizes
+them with `configure`, starts them with `start`, & shuts them down with
+`shutdown` on exit.
+"""
+
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+)
+from functools import partial, wraps
+from logging import getLogger
+import multiprocessing
+import signal
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+LOGGER = getLogger(__name__)
+
+EXECUTORS = ('thread', 'process')
+CODEC = 'codec'
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+_sizes: Dict[str, Optional[int]] = {
+    'thread': None, 'process': None, CODEC: None}
+_pools: Dict[str, Executor] = {}
+# handlers run in the process pool are looked up by name in the pool's
+# processes, instead of pickling the handler itself on every call
+_handlers: Dict[str, Callable[..., Any]] = {}
+
+
+def configure(
+    thread_pool_size: Optional[int] = None,
+    process_pool_size: Optional[int] = None,
+    codec_pool_size: Optional[int] = None,
+) -> None:
+    """Set pool sizes, None uses concurrent.futures' defaults."""
+    _sizes['thread'] = thread_pool_size
+    _sizes['process'] = process_pool_size
+    _sizes[CODEC] = codec_pool_size
+
+
+def _ignore_interrupt() -> None:
+    # leave handling SIGINT to the Runner, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _noop() -> None:
+    pass
+
+
+def get_pool(executor: str) -> Executor:
+    """Get the named pool, creating it if it doesn't exist yet."""
+    pool = _pools.get(executor)
+
+    if pool is not None:
+        return pool
+
+    if executor == 'thread':
+        pool = ThreadPoolExecutor(
+            max_workers=_sizes['thread'], thread_name_prefix='handler')
+    elif executor == 'process':
+        # forked processes inherit the registered handlers
+        pool = ProcessPoolExecutor(
+            max_workers=_sizes['process'],
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_ignore_interrupt)
+    elif executor == CODEC:
+        pool = ThreadPoolExecutor(
+            max_workers=_sizes[CODEC], thread_name_prefix=CODEC)
+    else:
+        raise ValueError(
+            f'Unknown executor `{executor}`, must be one of '
+            f'{", ".join(EXECUTORS)}')
+
+    _pools[executor] = pool
+
+    return pool
+
+
+def start() -> None:
+    """Start the process pool, if any handlers will run in it.
+
+    Starting the pool's processes before any connections are opened or
+    other threads started keeps them from inheriting either.
+    """
+    if _handlers:
+        get_pool('process').submit(_noop).result()
+
+
+def shutdown() -> None:
+    """Shut down all pools, waiting for work in progress to finish."""
+    for pool in _pools.values():
+        pool.shutdown(wait=True)
+
+    _pools.clear()
+
+
+def _call_handler(
+    name: str,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+) -> Any:
+    return _handlers[name](*args, **kwargs)
+
+
+def offload(
+    executor: str,
+    name: str,
+    handler: Callable[..., Any],
+) -> Callable[..., Awaitable[Any]]:
+    """Wrap a synchronous route handler to run it in the named pool."""
+    if asyncio.iscoroutinefunction(handler):
+        raise TypeError(
+            f'Route `{name}` is offloaded to a {executor} pool, so its '
+            'handler must be a synchronous function.')
+
+    if executor not in EXECUTORS:
+        raise ValueError(
+            f'Unknown executor `{executor}`, must be one of '
+            f'{", ".join(EXECUTORS)}')
+
+    if executor == 'process':
+        _handlers[name] = handler
+
+    @wraps(handler)
+    async def offloaded(*args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+
+        if executor == 'process':
+            call = partial(_call_handler, name, args, kwargs)
+        else:
+            call = partial(handler, *args, **kwargs)
+
+        return await loop.run_in_executor(get_pool(executor), call)
+
+    return offloaded
@@ -6,6 +6,7 @@ routes defined at `./app/src/main.py`.
 """
 import asyncio
 import random
+from typing import Any, Dict, List, Tuple
 
 
 def do_a_quick_thing() -> int:
@@ -21,3 +22,29 @@ async def do_a_long_thing() -> str:
     await asyncio.sleep(1)
 
     return 'that took forever'
+
+
+def summarize_json(document: Any) -> Dict[str, int]:
+    """Contrived example of CPU bound work: summarize a JSON document.
+
+    Walks the entire document, counting every object key & every scalar
+    value, & measuring how deeply nested it is.
+    """
+    keys = 0
+    values = 0
+    depth = 0
+    stack: List[Tuple[Any, int]] = [(document, 0)]
+
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+
+        if isinstance(node, dict):
+            keys += len(node)
+            stack.extend((child, level + 1) for child in node.values())
+        elif isinstance(node, list):
+            stack.extend((child, level + 1) for child in node)
+        else:
+            values += 1
+
+    return {'keys': keys, 'values': values, 'depth': depth}
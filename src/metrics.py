@@ -0,0 +1,328 @@
+"""Collect service metrics & serve them to Prometheus.
+
+A minimal implementation of Prometheus' client data model (counters,
+gauges, & histograms, each optionally split by labels) & text exposition
+format, served over HTTP at `/metrics` by a small asyncio server running in
+the same event loop as the workers.
+
+Recording a value is a dictionary lookup & some arithmetic, so metrics are
+cheap enough to record on every message. Metrics are created on the
+module-level REGISTRY by default, which is what `serve` exports:
+
+    REQUESTS = Counter('requests_total', 'Requests received.', ['route'])
+
+    REQUESTS.labels('test').inc()
+"""
+
+from abc import ABC, abstractmethod
+import asyncio
+from bisect import bisect_left
+from logging import getLogger
+import math
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+
+LOGGER = getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (
+    64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class CounterValue:
+    """A single counter, only ever increases."""
+
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase counter by given amount."""
+        self.value += amount
+
+
+class GaugeValue:
+    """A single gauge, can be set, increased, or decreased."""
+
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase gauge by given amount."""
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        """Decrease gauge by given amount."""
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        """Set gauge to given value."""
+        self.value = value
+
+
+class HistogramValue:
+    """A single histogram, counts observations in cumulative buckets."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record an observed value."""
+        index = bisect_left(self.buckets, value)
+
+        if index < len(self.counts):
+            self.counts[index] += 1
+
+        self.sum += value
+        self.count += 1
+
+
+Value = TypeVar('Value', CounterValue, GaugeValue, HistogramValue)
+
+
+class Metric(ABC, Generic[Value]):
+    """A named metric with a value for each combination of label values."""
+
+    kind: str
+    name: str
+    description: str
+    label_names: Tuple[str, ...]
+    values: Dict[Tuple[str, ...], Value]
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        registry: Optional['Registry'] = None,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.values = {}
+
+        (registry if registry is not None else REGISTRY).register(self)
+
+    @abstractmethod
+    def _new_value(self) -> Value:
+        """Create the value for a new combination of label values."""
+
+    def labels(self, *label_values: str) -> Value:
+        """Get the value for the given label values, creating it if new."""
+        try:
+            return self.values[label_values]
+        except KeyError:
+            if len(label_values) != len(self.label_names):
+                raise ValueError(  # pylint: disable=raise-missing-from
+                    f'{self.name} requires labels {self.label_names}, '
+                    f'got {label_values}')
+
+            value = self._new_value()
+            self.values[label_values] = value
+
+            return value
+
+    def _label_dict(self, label_values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.label_names, label_values))
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        """Get every sample of this metric to export."""
+
+
+class Counter(Metric[CounterValue]):
+    """A metric that only increases, e.g. number of requests."""
+
+    kind = 'counter'
+
+    def _new_value(self) -> CounterValue:
+        return CounterValue()
+
+    def samples(self) -> Iterator[Sample]:
+        """Get every sample of this metric to export."""
+        for label_values, value in self.values.items():
+            yield self.name, self._label_dict(label_values), value.value
+
+
+class Gauge(Metric[GaugeValue]):
+    """A metric that goes up & down, e.g. number of requests in progress."""
+
+    kind = 'gauge'
+
+    def _new_value(self) -> GaugeValue:
+        return GaugeValue()
+
+    def samples(self) -> Iterator[Sample]:
+        """Get every sample of this metric to export."""
+        for label_values, value in self.values.items():
+            yield self.name, self._label_dict(label_values), value.value
+
+
+class Histogram(Metric[HistogramValue]):
+    """A metric counting observations in buckets, e.g. request latency."""
+
+    kind = 'histogram'
+    buckets: Tuple[float, ...]
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional['Registry'] = None,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, description, label_names, registry)
+
+    def _new_value(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def samples(self) -> Iterator[Sample]:
+        """Get every sample of this metric to export."""
+        for label_values, value in self.values.items():
+            labels = self._label_dict(label_values)
+            cumulative = 0
+
+            for bound, count in zip(self.buckets, value.counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket',
+                    {**labels, 'le': _format_value(bound)},
+                    cumulative)
+
+            yield f'{self.name}_bucket', {**labels, 'le': '+Inf'}, value.count
+            yield f'{self.name}_sum', labels, value.sum
+            yield f'{self.name}_count', labels, value.count
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_sample(sample: Sample) -> str:
+    name, labels, value = sample
+
+    if labels:
+        label_text = ','.join(
+            f'{key}="{_escape(label)}"' for key, label in labels.items())
+        return f'{name}{{{label_text}}} {_format_value(value)}'
+
+    return f'{name} {_format_value(value)}'
+
+
+class Registry:
+    """A collection of metrics to be exported together."""
+
+    metrics: Dict[str, Metric[Any]]
+
+    def __init__(self) -> None:
+        self.metrics = {}
+
+    def register(self, metric: Metric[Any]) -> None:
+        """Add a metric, raises an error if one has the same name already."""
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered.')
+
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus' text exposition format."""
+        lines: List[str] = []
+
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.description}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(_format_sample(sample) for sample in metric.samples())
+
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _response(status: str, content_type: str, body: bytes) -> bytes:
+    head = (
+        f'HTTP/1.1 {status}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        'Connection: close\r\n'
+        '\r\n')
+
+    return head.encode('ascii') + body
+
+
+def _handler(
+    registry: Registry
+) -> Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]:
+    async def handle(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            request_line = await reader.readline()
+            # ignore request headers & body, only the path matters
+            parts = request_line.decode('latin-1').split()
+
+            if len(parts) >= 2 and parts[0] == 'GET' \
+                    and parts[1].split('?')[0] == '/metrics':
+                writer.write(_response(
+                    '200 OK',
+                    'text/plain; version=0.0.4; charset=utf-8',
+                    registry.render().encode('utf8')))
+            else:
+                writer.write(_response(
+                    '404 Not Found', 'text/plain', b'Not Found'))
+
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(
+    port: int,
+    host: str = '0.0.0.0',
+    registry: Registry = REGISTRY,
+) -> asyncio.AbstractServer:
+    """Serve metrics at http://<host>:<port>/metrics in the running loop."""
+    server = await asyncio.start_server(_handler(registry), host, port)
+    LOGGER.info(f'Serving metrics at http://{host}:{port}/metrics')
+
+    return server
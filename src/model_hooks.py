@@ -0,0 +1,84 @@
+"""Wrap the methods of a Model instance, without subclassing it.
+
+Shared by layers added to a Model's queries after it's built, see `cache`
+& `coalesce`. Wrappers are set as attributes of the Model's query sets,
+shadowing the methods defined on their classes.
+
+Layers can also be told of changes to a Model's table made by other
+processes, by whichever layer learns of them (`cache` listens for them).
+"""
+
+from functools import wraps
+import inspect
+from typing import Any, Awaitable, Callable, Dict, List
+
+# a Model's query sets that write to its table
+WRITE_QUERY_SETS = ('create', 'update', 'delete')
+
+# attribute of a Model holding the callbacks given to after_changes
+_CHANGE_CALLBACKS = '_after_changes'
+
+
+def table_name(model: Any) -> str:
+    """Get the name of a Model's table."""
+    # a Model's table is an sql.Identifier
+    name: str = model.table.strings[-1]
+
+    return name
+
+
+def wrap_read(
+    model: Any,
+    method: str,
+    wrap: Callable[[Callable[..., Awaitable[Any]]], Callable[..., Any]],
+) -> None:
+    """Replace a Model's read method with wrap(method)."""
+    setattr(model.read, method, wrap(getattr(model.read, method)))
+
+
+def _public_methods(query_set: Any) -> Dict[str, Callable[..., Any]]:
+    return {
+        name: method
+        for name, method in inspect.getmembers(query_set)
+        if not name.startswith('_')
+        and inspect.iscoroutinefunction(method)}
+
+
+def after_writes(model: Any, callback: Callable[[], None]) -> None:
+    """Call callback after every call to a Model's write methods.
+
+    Called whether the write succeeds or fails, since a failed write may
+    still have changed the table.
+    """
+    def wrap(write: Callable[..., Awaitable[Any]]) -> Callable[..., Any]:
+        @wraps(write)
+        async def wrapped(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await write(*args, **kwargs)
+            finally:
+                callback()
+
+        return wrapped
+
+    for query_set in WRITE_QUERY_SETS:
+        writer = getattr(model, query_set)
+
+        for name, method in _public_methods(writer).items():
+            setattr(writer, name, wrap(method))
+
+
+def after_changes(model: Any, callback: Callable[[], None]) -> None:
+    """Call callback whenever a Model's table is changed by another process.
+
+    Called by whichever layer learns of such changes, see `changed`.
+    """
+    callbacks: List[Callable[[], None]] = getattr(
+        model, _CHANGE_CALLBACKS, [])
+    callbacks.append(callback)
+    setattr(model, _CHANGE_CALLBACKS, callbacks)
+
+
+def changed(model: Any) -> None:
+    """Call every callback given to after_changes for a Model."""
+    for callback in getattr(model, _CHANGE_CALLBACKS, []):
+        callback()
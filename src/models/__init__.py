@@ -1,4 +1,12 @@
 """Define Models & Associated data types."""
 
-from .example_item import ExampleItem, ExampleItemData
-from .simple import SimpleData
+from .bulk import BulkCreate, BulkModel
+from .example_item import (
+    ExampleItem,
+    ExampleItemData,
+    ExampleItemRow,
+    validate_example_item,
+)
+from .lookups import BatchRead
+from .paging import KeysetRead, Page
+from .simple import SimpleData, SimpleRow, validate_simple
@@ -0,0 +1,16 @@
+-- notifies listeners on the "model_change" channel whenever a statement
+-- changes a table's rows, with the table's name, e.g. {"table": "simple"}
+-- NOTE: run once per statement, not per row, so a statement changing many
+-- rows (e.g. a bulk insert) sends one notification; listeners clear every
+-- result read from the table, so they don't need to know which rows changed
+-- NOTE: kept in a file sorted before the tables' files, so it's defined
+-- before the triggers using it
+CREATE OR REPLACE FUNCTION "notify_model_change"() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'model_change',
+        json_build_object('table', TG_TABLE_NAME)::text);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,191 @@
+"""Create or upsert many rows with as few round trips as possible.
+
+Creating rows one at a time costs a round trip to the database per row.
+A BulkCreate instead inserts rows in batches, each batch a single
+`INSERT ... RETURNING` statement:
+
+    up to `RECORDSET_MIN_ROWS` rows: a multi-row `VALUES` list, a literal
+        per value
+    more: the batch is sent as a single JSON array & expanded into rows by
+        the database with `json_populate_recordset`, skipping composing a
+        literal per value, & split into batches of `RECORDSET_BATCH_SIZE`
+        rows so no single statement grows too large
+
+Every row in a call must have the same columns. Dictionary values are sent
+as JSON, RawJSON values as their text.
+"""
+
+import json
+from typing import Any, Iterator, List, Sequence, TypeVar
+
+from psycopg2 import sql
+from psycopg2.extras import Json
+
+from db_wrapper.model import ModelData, Model, Create, Client
+
+from database import read_client
+from raw_json import RawJSON, fragments, placeholder, splice
+
+from .lookups import BatchRead
+
+
+T = TypeVar('T', bound=ModelData)
+
+VALUES_BATCH_SIZE = 500
+RECORDSET_MIN_ROWS = 2000
+# each batch's rows are encoded into a single JSON literal, held in memory
+# & sent whole, so batches are kept to a few hundred KB for typical rows
+RECORDSET_BATCH_SIZE = 2000
+
+
+def _columns(items: Sequence[Any]) -> List[str]:
+    columns = list(items[0].keys())
+
+    for item in items:
+        if len(item) != len(columns) or any(
+                column not in item for column in columns):
+            raise ValueError(
+                'Every item created at once must have the same columns, '
+                f'expected {columns}, got {list(item.keys())}')
+
+    return columns
+
+
+def _batches(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _json_default(value: Any) -> Any:
+    # UUIDs, dates & other non-JSON types are sent as their string form
+    if isinstance(value, RawJSON):
+        return placeholder(value)
+
+    return str(value)
+
+
+def _literal(value: Any) -> sql.Literal:
+    if isinstance(value, dict):
+        return sql.Literal(Json(value))
+
+    return sql.Literal(value)
+
+
+class BulkCreate(Create[T]):
+    """Extend Model.create with methods to create many rows at once."""
+
+    def _values(
+        self,
+        columns: List[str],
+        batch: Sequence[T],
+    ) -> sql.Composable:
+        rows = sql.SQL(',').join(
+            sql.SQL('({})').format(sql.SQL(',').join(
+                _literal(item[column])
+                for column in columns))
+            for item in batch)
+
+        return sql.SQL('VALUES {rows}').format(rows=rows)
+
+    def _recordset(
+        self,
+        columns: List[str],
+        batch: Sequence[T],
+    ) -> sql.Composable:
+        with fragments() as found:
+            rows = splice(json.dumps(batch, default=_json_default), found)
+
+        return sql.SQL(
+            'SELECT {columns} '
+            'FROM json_populate_recordset(NULL::{table}, {rows})'
+        ).format(
+            columns=sql.SQL(',').join(map(sql.Identifier, columns)),
+            table=self._table,
+            rows=sql.Literal(rows))
+
+    async def _insert(
+        self,
+        items: Sequence[T],
+        on_conflict: sql.Composable,
+    ) -> List[T]:
+        if not items:
+            return []
+
+        columns = _columns(items)
+
+        if len(items) >= RECORDSET_MIN_ROWS:
+            build_rows, batch_size = self._recordset, RECORDSET_BATCH_SIZE
+        else:
+            build_rows, batch_size = self._values, VALUES_BATCH_SIZE
+
+        created: List[T] = []
+
+        for batch in _batches(items, batch_size):
+            query = sql.SQL(
+                'INSERT INTO {table} ({columns}) '
+                '{rows} '
+                '{on_conflict}'
+                'RETURNING *;'
+            ).format(
+                table=self._table,
+                columns=sql.SQL(',').join(map(sql.Identifier, columns)),
+                rows=build_rows(columns, batch),
+                on_conflict=on_conflict)
+
+            created.extend(await self._client.execute_and_return(query))
+
+        return created
+
+    async def many(self, items: Sequence[T]) -> List[T]:
+        """Create many rows, returning them once created."""
+        return await self._insert(items, sql.SQL(''))
+
+    async def upsert_many(
+        self,
+        items: Sequence[T],
+        key: Sequence[str] = ('_id',),
+    ) -> List[T]:
+        """Create many rows, or update those whose `key` already exists.
+
+        Returns every row created or updated.
+        """
+        if not items:
+            return []
+
+        updates = [column for column in _columns(items) if column not in key]
+        on_conflict = sql.SQL(
+            'ON CONFLICT ({key}) DO {action} '
+        ).format(
+            key=sql.SQL(',').join(map(sql.Identifier, key)),
+            action=sql.SQL('UPDATE SET {updates}').format(
+                updates=sql.SQL(',').join(
+                    sql.SQL('{column} = EXCLUDED.{column}').format(
+                        column=sql.Identifier(column))
+                    for column in updates)
+            ) if updates else sql.SQL('NOTHING'))
+
+        return await self._insert(items, on_conflict)
+
+
+class BulkModel(Model[T]):
+    """A Model whose create can create or upsert many rows at once.
+
+    Its read can also look rows up by `_id` in batches, see `lookups`, &
+    runs on the client's read replica, if it has one, unless `replica_reads`
+    is False (e.g. when its reads are cached).
+    """
+
+    create: BulkCreate[T]
+    read: BatchRead[T]
+
+    def __init__(
+        self,
+        client: Client,
+        table: str,
+        replica_reads: bool = True,
+    ) -> None:
+        super().__init__(client, table)
+        self.create = BulkCreate[T](self.client, self.table)
+        self.read = BatchRead[T](
+            read_client(self.client) if replica_reads else self.client,
+            self.table)
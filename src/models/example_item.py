@@ -1,11 +1,29 @@
 """An example implementation of custom object Model."""
 
 import json
-from typing import Any, List, Dict
+from typing import (
+    Any,
+    AsyncIterator,
+    List,
+    Dict,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from psycopg2 import sql
 
-from db_wrapper.model import ModelData, Model, Read, Create, Client
+from db_wrapper.model import ModelData, Model, Client
+
+from batching import BatchLoader, group_by
+from columnar import Columnar
+from compiled import compile_row, compile_validator
+from database import Query, read_client, run
+from raw_json import RawJSON
+
+from .bulk import BulkCreate
+from .lookups import BatchRead
+from .paging import DEFAULT_LIMIT, KeysetRead, Page
 
 
 class ExampleItemData(ModelData):
@@ -17,70 +35,147 @@ class ExampleItemData(ModelData):
 
     string: str
     integer: int
-    json: Dict[str, Any]
+    # a RawJSON if read by a Client with raw_json=True
+    json: Union[Dict[str, Any], RawJSON]
+
 
+# checks incoming items, only `_id` is required since other columns may be
+# left NULL
+validate_example_item = compile_validator(
+    ExampleItemData, required=('_id',))
+# holds a row in slots, instead of a dictionary per row
+ExampleItemRow = compile_row(ExampleItemData)
 
-class ExampleItemCreator(Create[ExampleItemData]):
+
+class ExampleItemCreator(BulkCreate[ExampleItemData]):
     """Add custom json loading to Model.create."""
 
     # pylint: disable=too-few-public-methods
 
-    async def one(self, item: ExampleItemData) -> ExampleItemData:
-        """Override default Model.create.one method."""
-        columns: List[sql.Identifier] = []
-        values: List[sql.Literal] = []
+    _insert_one: Dict[Tuple[str, ...], Query]
 
-        for column, value in item.items():
-            if column == 'json':
-                values.append(sql.Literal(json.dumps(value)))
-            else:
-                values.append(sql.Literal(value))
+    def __init__(self, client: Client, table: sql.Identifier) -> None:
+        super().__init__(client, table)
+        # an insert query is compiled once for each set of columns given
+        self._insert_one = {}
 
-            columns.append(sql.Identifier(column))
-
-        query = sql.SQL(
+    def _compile_insert_one(self, columns: Tuple[str, ...]) -> Query:
+        query = Query(sql.SQL(
             'INSERT INTO {table} ({columns}) '
             'VALUES ({values}) '
             'RETURNING *;'
         ).format(
             table=self._table,
-            columns=sql.SQL(',').join(columns),
-            values=sql.SQL(',').join(values),
-        )
+            columns=sql.SQL(',').join(map(sql.Identifier, columns)),
+            values=sql.SQL(',').join([sql.Placeholder()] * len(columns)),
+        ))
+        self._insert_one[columns] = query
+
+        return query
+
+    async def one(self, item: ExampleItemData) -> ExampleItemData:
+        """Override default Model.create.one method.
+
+        The `json` column may be given as a RawJSON, already serialized.
+        """
+        columns = tuple(item.keys())
+        query = self._insert_one.get(columns) \
+            or self._compile_insert_one(columns)
+        params = [
+            json.dumps(value)
+            if column == 'json' and not isinstance(value, RawJSON)
+            else value
+            for column, value in item.items()]
 
         result: List[ExampleItemData] = \
-            await self._client.execute_and_return(query)
+            await run(self._client, query, params)
 
         return result[0]
 
 
-class ExampleItemReader(Read[ExampleItemData]):
-    """Add custom method to Model.read."""
+class ExampleItemReader(
+    KeysetRead[ExampleItemData],
+    BatchRead[ExampleItemData],
+):
+    """Add custom methods to Model.read."""
 
-    async def all_by_string(self, string: str) -> List[ExampleItemData]:
-        """Read all rows with matching `string` value."""
-        query = sql.SQL(
+    _all_by_strings: Query
+    _by_string: BatchLoader[str, List[ExampleItemData]]
+
+    def __init__(self, client: Client, table: sql.Identifier) -> None:
+        super().__init__(client, table)
+        self._all_by_strings = Query(sql.SQL(
             'SELECT * '
             'FROM {table} '
-            'WHERE string = {string};'
+            'WHERE string = ANY({strings}::text[]);'
         ).format(
             table=self._table,
-            string=sql.Literal(string)
-        )
+            strings=sql.Placeholder()
+        ))
+        # calls made at about the same time are read with a single query
+        self._by_string = BatchLoader(
+            self._load_by_strings,
+            default=list,
+            name='example_item.by_string')
+
+    async def _load_by_strings(
+        self,
+        strings: List[str],
+    ) -> Dict[str, List[ExampleItemData]]:
+        rows: List[ExampleItemData] = await run(
+            self._client, self._all_by_strings, (strings,))
+
+        return group_by(rows, 'string')
+
+    async def all_by_string(self, string: str) -> List[ExampleItemData]:
+        """Read all rows with matching `string` value."""
+        return await self._by_string.load(string)
 
-        result: List[ExampleItemData] = await self \
-            ._client.execute_and_return(query)
+    async def columns_by_string(self, string: str) -> Columnar:
+        """Read all rows with matching `string` value, a tuple per row."""
+        result: Columnar = await run(
+            self._client, self._all_by_strings, ([string],), columnar=True)
 
         return result
 
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    async def page_by_string(
+        self,
+        string: str,
+        after: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> Page[ExampleItemData]:
+        """Read a page of rows with matching `string` value."""
+        return await self.page_where(
+            sql.SQL('string = {string}').format(string=sql.Literal(string)),
+            after,
+            limit)
+
+    def iter_by_string(
+        self,
+        string: str,
+        batch_size: int = DEFAULT_LIMIT,
+    ) -> AsyncIterator[ExampleItemData]:
+        """Read all rows with matching `string` value, a page at a time."""
+        return self.iter_where(
+            sql.SQL('string = {string}').format(string=sql.Literal(string)),
+            batch_size)
+
 
 class ExampleItem(Model[ExampleItemData]):
-    """Build an ExampleItem Model instance."""
+    """Build an ExampleItem Model instance.
+
+    Its read methods run on the client's read replica, if it has one,
+    unless `replica_reads` is False (e.g. when its reads are cached).
+    """
 
     read: ExampleItemReader
     create: ExampleItemCreator
 
-    def __init__(self, client: Client) -> None:
+    def __init__(self, client: Client, replica_reads: bool = True) -> None:
         super().__init__(client, 'example_item')
-        self.read = ExampleItemReader(self.client, self.table)
+        self.read = ExampleItemReader(
+            read_client(self.client) if replica_reads else self.client,
+            self.table)
         self.create = ExampleItemCreator(self.client, self.table)
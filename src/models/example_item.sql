@@ -4,3 +4,14 @@ CREATE TABLE IF NOT EXISTS "example_item" (
     "integer" smallint,
     "json" jsonb
 );
+
+-- allows paging through rows matching a string in order of _id
+CREATE INDEX IF NOT EXISTS "example_item_string_id_idx"
+    ON "example_item" ("string", "_id");
+
+-- notifies every instance caching reads of this table of changes to it,
+-- replacing the trigger if it was created before, when it ran for each row
+DROP TRIGGER IF EXISTS "example_item_notify_change" ON "example_item";
+CREATE TRIGGER "example_item_notify_change"
+    AFTER INSERT OR UPDATE OR DELETE ON "example_item"
+    FOR EACH STATEMENT EXECUTE FUNCTION "notify_model_change"();
@@ -0,0 +1,66 @@
+"""Batch a Model's point lookups into a single `= ANY(...)` query.
+
+Lookups made at about the same time, e.g. from a loop or from many
+messages handled at once, are collected by a BatchLoader (see `batching`)
+& read with one query, each caller getting only the rows for its own key:
+
+    # one query: SELECT * FROM example_item WHERE _id = ANY(...)
+    items = await asyncio.gather(*[
+        example_model.read.load_by_id(_id) for _id in ids])
+"""
+
+from typing import Any, Dict, List, Optional, TypeVar
+from uuid import UUID
+
+from psycopg2 import sql
+
+from db_wrapper.model import ModelData, Read, Client
+
+from batching import BatchLoader
+from database import Query, run
+
+
+T = TypeVar('T', bound=ModelData)
+
+
+class BatchRead(Read[T]):
+    """Extend Model.read with lookups by `_id` batched into one query."""
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    _by_id: BatchLoader[str, Optional[T]]
+    _all_by_ids: Query
+
+    def __init__(self, client: Client, table: sql.Identifier) -> None:
+        super().__init__(client, table)
+        # ids are sent as text, since psycopg2 sends a list of strings as a
+        # text array, which can't be compared to uuids without a cast
+        self._all_by_ids = Query(sql.SQL(
+            'SELECT * '
+            'FROM {table} '
+            'WHERE _id = ANY({ids}::text[]::uuid[]);'
+        ).format(
+            table=self._table,
+            ids=sql.Placeholder()
+        ))
+        self._by_id = BatchLoader(
+            self._load_by_ids,
+            default=lambda: None,
+            name=f'{table.strings[-1]}.by_id')
+
+    async def _load_by_ids(
+        self,
+        ids: List[str],
+    ) -> Dict[str, Optional[T]]:
+        rows: List[Any] = await run(self._client, self._all_by_ids, (ids,))
+
+        return {str(row['_id']): row for row in rows}
+
+    async def load_by_id(self, _id: str) -> Optional[T]:
+        """Read the row with a given `_id`, or None if there isn't one.
+
+        Batched with every other call made at about the same time. Raises
+        ValueError if `_id` isn't a UUID, rather than failing the batch.
+        """
+        # in the form rows' ids are returned in, so it finds its row
+        return await self._by_id.load(str(UUID(str(_id))))
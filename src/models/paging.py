@@ -0,0 +1,171 @@
+"""Read a Model's rows a page or a batch at a time.
+
+Reading every matching row at once holds them all in memory (on both the
+database & the service) & takes longer the more rows there are. Instead,
+a KeysetRead offers two ways to read rows incrementally:
+
+    keyset pagination: rows are read in order of `_id`, a page at a time,
+        each page starting after the last `_id` of the one before it,
+        making every page as fast to read as the first
+    server-side cursor: the query is run once & its results are fetched
+        from a cursor held by the database, a batch at a time, within a
+        transaction held open until they're all read
+
+A page is returned as a Page, including a continuation token to read the
+next page with, or None if it's the last one.
+"""
+
+import asyncio
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from dataclasses import dataclass
+from typing import AsyncIterator, Generic, List, Optional, TypeVar
+from uuid import UUID, uuid4
+
+from psycopg2 import sql
+
+from db_wrapper.model import ModelData, Read
+
+from database import session
+from request_context import shared_context
+
+
+T = TypeVar('T', bound=ModelData)
+
+DEFAULT_LIMIT = 100
+
+
+def encode_token(last_id: str) -> str:
+    """Build a continuation token from the last `_id` of a page."""
+    return urlsafe_b64encode(UUID(str(last_id)).bytes).decode('ascii')
+
+
+def decode_token(token: str) -> str:
+    """Get the last `_id` of a page from its continuation token."""
+    try:
+        return str(UUID(bytes=urlsafe_b64decode(token.encode('ascii'))))
+    except (DecodeError, ValueError):
+        # pylint: disable=raise-missing-from
+        raise ValueError(f'Invalid continuation token `{token}`')
+
+
+def _check_size(name: str, size: int) -> None:
+    if size < 1:
+        raise ValueError(f'{name} must be at least 1, not {size}')
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+@dataclass
+class Page(Generic[T]):
+    """A page of rows & the token to read the next page with, if any."""
+
+    items: List[T]
+    after: Optional[str]
+
+
+class KeysetRead(Read[T]):
+    """Extend Model.read with methods to read rows a page at a time."""
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    async def page_where(
+        self,
+        condition: sql.Composable,
+        after: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> Page[T]:
+        """Read a page of rows matching condition, in order of `_id`.
+
+        Starts after the page the `after` continuation token was given
+        with, or at the first row if not given. Raises ValueError if limit
+        is less than 1.
+        """
+        _check_size('Page limit', limit)
+
+        if after is not None:
+            condition = sql.SQL('{condition} AND _id > {last_id}').format(
+                condition=condition,
+                last_id=sql.Literal(decode_token(after)))
+
+        query = sql.SQL(
+            'SELECT * '
+            'FROM {table} '
+            'WHERE {condition} '
+            'ORDER BY _id '
+            'LIMIT {limit};'
+        ).format(
+            table=self._table,
+            condition=condition,
+            limit=sql.Literal(limit))
+
+        items: List[T] = await self._client.execute_and_return(query)
+        # a short page must be the last one
+        next_after = encode_token(str(items[-1]['_id'])) \
+            if items and len(items) == limit else None
+
+        return Page(items, next_after)
+
+    async def iter_where(
+        self,
+        condition: sql.Composable,
+        batch_size: int = DEFAULT_LIMIT,
+    ) -> AsyncIterator[T]:
+        """Read all rows matching condition, a page at a time.
+
+        No more than `batch_size` rows are held in memory at once.
+        """
+        page = await self.page_where(condition, limit=batch_size)
+
+        while True:
+            for row in page.items:
+                yield row
+
+            if page.after is None:
+                return
+
+            page = await self.page_where(
+                condition, after=page.after, limit=batch_size)
+
+    async def iter_cursor(
+        self,
+        query: sql.Composable,
+        batch_size: int = DEFAULT_LIMIT,
+    ) -> AsyncIterator[T]:
+        """Read a query's results from a server-side cursor, in batches.
+
+        The query must not end with a semicolon. The cursor is declared in
+        a transaction held open on one connection while reading, so rows
+        are read from the database as they're fetched, instead of all at
+        once. The transaction ends once iteration stops, even if the
+        request's deadline has passed by then. Raises ValueError if
+        batch_size is less than 1.
+        """
+        _check_size('Batch size', batch_size)
+        name = sql.Identifier(f'cursor_{uuid4().hex}')
+
+        # a cursor only exists on the connection that declared it
+        async with session(self._client) as client:
+            await client.execute(sql.SQL('BEGIN;'))
+
+            try:
+                await client.execute(sql.SQL(
+                    'DECLARE {name} NO SCROLL CURSOR FOR {query};'
+                ).format(name=name, query=query))
+
+                while True:
+                    batch: List[T] = await client.execute_and_return(
+                        sql.SQL('FETCH {size} FROM {name};').format(
+                            size=sql.Literal(batch_size), name=name))
+
+                    for row in batch:
+                        yield row
+
+                    if len(batch) < batch_size:
+                        return
+            finally:
+                # run without the deadline, in a task of its own, so the
+                # connection isn't returned to the pool mid transaction
+                await shared_context().run(
+                    asyncio.ensure_future,
+                    client.execute(sql.SQL('COMMIT;')))
@@ -4,6 +4,8 @@ from typing import List
 
 from db_wrapper.model import ModelData
 
+from compiled import compile_row, compile_validator
+
 
 class SimpleData(ModelData):
     """An example Item."""
@@ -15,3 +17,7 @@ class SimpleData(ModelData):
     string: str
     integer: int
     array: List[str]
+
+
+validate_simple = compile_validator(SimpleData, required=('_id',))
+SimpleRow = compile_row(SimpleData)
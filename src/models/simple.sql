@@ -4,3 +4,10 @@ CREATE TABLE IF NOT EXISTS "simple" (
     "integer" smallint,
     "array" varchar(255) []
 );
+
+-- notifies every instance caching reads of this table of changes to it,
+-- replacing the trigger if it was created before, when it ran for each row
+DROP TRIGGER IF EXISTS "simple_notify_change" ON "simple";
+CREATE TRIGGER "simple_notify_change"
+    AFTER INSERT OR UPDATE OR DELETE ON "simple"
+    FOR EACH STATEMENT EXECUTE FUNCTION "notify_model_change"();
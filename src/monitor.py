@@ -0,0 +1,155 @@
+"""Monitor an event loop for lag & callbacks that block it.
+
+Every route shares a single event loop, so a handler that blocks the loop
+(e.g. with synchronous i/o or a large JSON encode) stalls every other
+route until it finishes. A LoopMonitor detects this from a separate
+thread: it regularly schedules a callback on the loop & times how long the
+loop takes to run it. That delay is the loop's lag, recorded as a metric.
+Metrics are recorded back on the loop, since they aren't safe to update
+from the monitor's thread.
+
+If the loop doesn't run the callback within a threshold, the loop is
+blocked. The monitor then logs what the loop's thread is running at that
+moment, including the name of the route being handled, if any. Routes are
+identified by registering their handlers with `register_route`.
+"""
+
+import asyncio
+from logging import getLogger
+import sys
+import threading
+import time
+import traceback
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, Optional
+
+import metrics
+
+
+LOGGER = getLogger(__name__)
+
+LOOP_LAG = metrics.Histogram(
+    'event_loop_lag_seconds',
+    'Delay between scheduling a callback on the event loop & running it.')
+LOOP_STALLS = metrics.Counter(
+    'event_loop_stalls_total',
+    'Times the event loop was blocked longer than the slow callback '
+    'threshold, by route running at the time.',
+    ['route'])
+
+_LAG = LOOP_LAG.labels()
+
+ROUTES: Dict[CodeType, str] = {}
+
+
+def register_route(name: str, handler: Callable[..., Any]) -> None:
+    """Name the route a handler belongs to when it blocks the loop."""
+    code = getattr(handler, '__code__', None)
+
+    if code is not None:
+        ROUTES[code] = name
+
+
+def _find_route(frame: Optional[FrameType]) -> str:
+    """Find name of innermost registered route handler in a stack."""
+    while frame is not None:
+        route = ROUTES.get(frame.f_code)
+
+        if route is not None:
+            return route
+
+        frame = frame.f_back
+
+    return 'unknown'
+
+
+def _count_stall(route: str) -> None:
+    LOOP_STALLS.labels(route).inc()
+
+
+class LoopMonitor:
+    """Sample an event loop's lag & report when it's blocked.
+
+    Schedules a callback on the loop every `interval` seconds from a
+    separate thread. If the loop takes longer than `threshold` seconds to
+    run it, logs the stack of the loop's thread & the route it's running.
+    """
+
+    loop: asyncio.AbstractEventLoop
+    interval: float
+    threshold: float
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    _thread: Optional[threading.Thread]
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        threshold: float = 0.1,
+        interval: float = 0.5,
+    ) -> None:
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = interval
+        self._loop_thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _report_stall(self) -> None:
+        frame = sys._current_frames().get(  # pylint: disable=protected-access
+            self._loop_thread_id)
+        route = _find_route(frame)
+        stack = ''.join(traceback.format_stack(frame)) if frame else ''
+
+        self._on_loop(_count_stall, route)
+        LOGGER.warning(
+            f'Event loop blocked for more than {self.threshold}s while '
+            f'handling route `{route}`, currently running:\n{stack}')
+
+    def _on_loop(self, callback: Callable[..., Any], *args: Any) -> None:
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # loop is closed
+            pass
+
+    def _watch(self) -> None:
+        ran = threading.Event()
+
+        while not self._stopped.is_set():
+            ran.clear()
+            scheduled = time.monotonic()
+
+            try:
+                self.loop.call_soon_threadsafe(ran.set)
+            except RuntimeError:
+                # loop is closed
+                return
+
+            if not ran.wait(self.threshold):
+                self._report_stall()
+
+                # wait for loop to be unblocked, or monitor to be stopped
+                while not ran.wait(self.interval):
+                    if self._stopped.is_set():
+                        return
+
+            self._on_loop(_LAG.observe, time.monotonic() - scheduled)
+            self._stopped.wait(self.interval)
+
+    def start(self) -> None:
+        """Start monitoring, must be called from the loop's thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name='loop-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop monitoring."""
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + self.threshold)
+            self._thread = None
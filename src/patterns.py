@@ -0,0 +1,524 @@
+"""AMQP Patterns extended with the controls needed to run them in a Runner.
+
+amqp_worker's workers consume messages using aio_pika Patterns (an RPC
+for RPCWorker & a Master for QueueWorker). The extensions here allow a
+worker to stop consuming new messages while keeping its channel open, so
+messages already being handled can still be acknowledged & replied to.
+
+Each route can also be given its own prefetch count (the number of
+messages the broker will deliver to it before waiting for them to be
+acknowledged). Since a prefetch count set on a channel applies only to
+consumers started on it afterwards, every route's consumer is started
+right after setting that route's prefetch count, allowing each queue on
+the channel to have its own limit.
+
+Bodies are encoded as JSON by default, or MessagePack (see
+`msgpack_codec`) when a message's `content_type` asks for it or the
+pattern's `content_type` is set to it. Replies use their request's.
+
+Response bodies are compressed according to a CompressionPolicy (see
+`compression`), marking the encoding used in each message's
+`content_encoding` property. Request bodies are decompressed according to
+the same property, so consumers can choose whether to compress them too.
+
+A request's reply can also be streamed, sending it as a sequence of
+messages of type `chunk` (see `send_chunk`), ending with the final reply.
+
+Responses encoded to at least `offload_min_size` bytes are compressed in a
+thread pool, instead of on the event loop. Metrics are always recorded on
+the event loop, since they aren't safe to update from other threads.
+
+An RPC request can carry a deadline, in its `x-deadline` header, as the
+time (in seconds since the epoch) after which its caller stops waiting for
+a reply. A request received after its deadline is dropped without being
+handled. Otherwise its handler runs with the deadline set (see
+`request_context`) & is cancelled if it's still running when the deadline
+passes, replying with a DeadlineExceeded error.
+
+They also time (de)serialization of message bodies & measure their size,
+recording both as metrics, along with each route's compression ratio &
+time spent compressing its responses.
+"""
+
+import asyncio
+from contextvars import ContextVar
+from functools import partial
+import json
+from json import JSONEncoder
+from logging import getLogger
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aio_pika import IncomingMessage, Message
+from aio_pika.patterns.master import Worker
+from amqp_worker.rpc_worker import JSONGzipRPC
+from amqp_worker.queue_worker import JSONGzipMaster
+
+from compression import (
+    ALWAYS_GZIP,
+    DEFAULT_ENCODING,
+    CompressionPolicy,
+    decompress,
+)
+import executors
+import metrics
+import msgpack_codec
+import request_context
+from request_context import DeadlineExceeded
+
+
+LOGGER = getLogger(__name__)
+
+CODEC_DURATION = metrics.Histogram(
+    'amqp_codec_duration_seconds',
+    'Time spent encoding, decompressing, & decoding messages.',
+    ['stage'])
+PAYLOAD_SIZE = metrics.Histogram(
+    'amqp_payload_bytes',
+    'Size of message bodies received & sent, before & after compression.',
+    ['direction', 'encoding'],
+    buckets=metrics.BYTES_BUCKETS)
+COMPRESSION_DURATION = metrics.Histogram(
+    'amqp_compression_duration_seconds',
+    'Time spent compressing responses, by route.',
+    ['route'])
+COMPRESSION_RATIO = metrics.Histogram(
+    'amqp_compression_ratio',
+    'Size of responses after compression relative to before, by route & '
+    'encoding used (1 for responses left uncompressed).',
+    ['route', 'encoding'],
+    buckets=(.05, .1, .2, .3, .4, .5, .6, .7, .8, .9, 1))
+EXPIRED_REQUESTS = metrics.Counter(
+    'amqp_expired_requests_total',
+    'RPC requests dropped because their deadline passed before they were '
+    'handled, by route.',
+    ['route'])
+DEADLINES_EXCEEDED = metrics.Counter(
+    'amqp_deadlines_exceeded_total',
+    'RPC requests whose deadline passed while they were handled, by route.',
+    ['route'])
+
+_ENCODE = CODEC_DURATION.labels('encode')
+_DECOMPRESS = CODEC_DURATION.labels('decompress')
+_DECODE = CODEC_DURATION.labels('decode')
+_IN_JSON = PAYLOAD_SIZE.labels('in', 'identity')
+_OUT_JSON = PAYLOAD_SIZE.labels('out', 'identity')
+
+# a prefetch count of 0 means no limit
+UNLIMITED = 0
+
+# route label for messages serialized outside of a route
+UNKNOWN_ROUTE = 'unknown'
+
+JSON_CONTENT_TYPE = 'application/json'
+CONTENT_TYPES = (JSON_CONTENT_TYPE, msgpack_codec.CONTENT_TYPE)
+
+# message type of replies sent ahead of a request's final reply
+CHUNK = 'chunk'
+
+# header giving the time, in seconds since the epoch, a request expires at
+DEADLINE_HEADER = 'x-deadline'
+
+
+def encode(
+    encoder: JSONEncoder,
+    data: Any,
+    content_type: str = JSON_CONTENT_TYPE,
+) -> bytes:
+    """Encode data as JSON, or MessagePack if given its content type.
+
+    Types MessagePack doesn't support are converted by the JSON encoder.
+    """
+    start = time.perf_counter()
+
+    if content_type == msgpack_codec.CONTENT_TYPE:
+        encoded = msgpack_codec.pack(data, encoder.default)
+    else:
+        encoded = encoder.encode(data).encode('UTF8')
+
+    _ENCODE.observe(time.perf_counter() - start)
+    _OUT_JSON.observe(len(encoded))
+
+    return encoded
+
+
+def _timed_compress(
+    policy: CompressionPolicy,
+    encoded: bytes,
+) -> Tuple[bytes, str, float]:
+    """Compress an encoded body, returning how long it took too.
+
+    Records no metrics, so can run in another thread.
+    """
+    start = time.perf_counter()
+    body, encoding = policy.compress(encoded)
+
+    return body, encoding, time.perf_counter() - start
+
+
+def _record_compression(
+    route: str,
+    encoded: bytes,
+    body: bytes,
+    encoding: str,
+    duration: float,
+) -> None:
+    COMPRESSION_DURATION.labels(route).observe(duration)
+    COMPRESSION_RATIO.labels(route, encoding).observe(
+        len(body) / len(encoded) if encoded else 1)
+    PAYLOAD_SIZE.labels('out', encoding).observe(len(body))
+
+
+def compress(
+    policy: CompressionPolicy,
+    encoded: bytes,
+    route: str = UNKNOWN_ROUTE,
+) -> Tuple[bytes, str]:
+    """Compress an encoded body according to policy.
+
+    Returns the body & the encoding it was compressed with.
+    """
+    body, encoding, duration = _timed_compress(policy, encoded)
+    _record_compression(route, encoded, body, encoding, duration)
+
+    return body, encoding
+
+
+def serialize(
+    encoder: JSONEncoder,
+    data: Any,
+    policy: CompressionPolicy = ALWAYS_GZIP,
+    route: str = UNKNOWN_ROUTE,
+    content_type: str = JSON_CONTENT_TYPE,
+) -> Tuple[bytes, str]:
+    """Encode data, then compress it according to policy.
+
+    Returns the body & the encoding it was compressed with.
+    """
+    return compress(policy, encode(encoder, data, content_type), route)
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def deserialize(
+    body: bytes,
+    encoding: Optional[str] = None,
+    content_type: Optional[str] = None,
+) -> Any:
+    """Decompress a message body per its encoding, then decode it.
+
+    Bodies without an encoding are gzip compressed, & bodies without a
+    content type are JSON.
+    """
+    start = time.perf_counter()
+    decompressed = decompress(body, encoding)
+    decompressed_at = time.perf_counter()
+
+    if content_type == msgpack_codec.CONTENT_TYPE:
+        data = msgpack_codec.unpack(decompressed)
+    else:
+        data = json.loads(decompressed.decode('UTF8'))
+
+    _DECOMPRESS.observe(decompressed_at - start)
+    _DECODE.observe(time.perf_counter() - decompressed_at)
+    PAYLOAD_SIZE.labels('in', encoding or DEFAULT_ENCODING).observe(len(body))
+    _IN_JSON.observe(len(decompressed))
+
+    return data
+
+
+# the pattern, message, route, & content type of the request being handled
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+_REQUEST: ContextVar[Optional[Tuple['RPC', IncomingMessage, str, str]]] = \
+    ContextVar('request', default=None)
+
+
+async def send_chunk(data: Any) -> None:
+    """Send part of the reply to the request being handled.
+
+    Chunks are sent to the requester, in order, ahead of the request's
+    final reply, which marks the end of the stream. Must be called from
+    the handler of an RPC request.
+    """
+    request = _REQUEST.get()
+
+    if request is None:
+        raise RuntimeError(
+            'Chunks can only be sent while handling an RPC request')
+
+    pattern, message, route, content_type = request
+
+    if not message.reply_to:
+        return
+
+    body, encoding = await pattern.serialize_reply(route, data, content_type)
+    await pattern.reply(message, body, encoding, content_type, CHUNK)
+
+
+class RPC(JSONGzipRPC):
+    """JSONGzipRPC that can cancel its consumers independently.
+
+    Responses are compressed according to its `compression` policy &
+    encoded with the same content type as their request, or with its
+    `content_type` if the request doesn't name a supported one.
+    """
+
+    prefetch: Dict[str, int]
+    compression: CompressionPolicy
+    content_type: str
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    offload_min_size: Optional[int]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.prefetch = {}
+        self.compression = ALWAYS_GZIP
+        self.content_type = JSON_CONTENT_TYPE
+        self.offload_min_size = None
+
+    async def register(
+        self,
+        method_name: str,
+        func: Callable[..., Any],
+        **kwargs: Any
+    ) -> Any:
+        """Start consuming a route's queue with the route's prefetch count."""
+        await self.channel.set_qos(
+            prefetch_count=self.prefetch.get(method_name, UNLIMITED))
+
+        return await super().register(method_name, func, **kwargs)
+
+    def serialize(self, data: Any) -> bytes:
+        """Encode message as gzip compressed JSON.
+
+        Used for messages sent without a `content_encoding`, so they're
+        always compressed.
+        """
+        body, _ = serialize(self.json_encoder, data)
+
+        return body
+
+    def deserialize(self, data: bytes) -> Any:
+        """Decode request from gzip compressed JSON."""
+        return deserialize(data)
+
+    async def serialize_reply(
+        self,
+        route: str,
+        data: Any,
+        content_type: str,
+    ) -> Tuple[bytes, str]:
+        """Encode & compress a route's reply, returning it & its encoding.
+
+        A reply's size isn't known until it's encoded, so it's encoded
+        inline, then compressed in the codec thread pool if it's at least
+        `offload_min_size` bytes. Smaller replies are compressed inline,
+        skipping the cost of handing them to another thread.
+        """
+        encoded = encode(self.json_encoder, data, content_type)
+
+        if self.offload_min_size is None \
+                or len(encoded) < self.offload_min_size:
+            return compress(self.compression, encoded, route)
+
+        body, encoding, duration = \
+            await asyncio.get_running_loop().run_in_executor(
+                executors.get_pool(executors.CODEC),
+                partial(_timed_compress, self.compression, encoded))
+        _record_compression(route, encoded, body, encoding, duration)
+
+        return body, encoding
+
+    async def on_call_message(
+        self,
+        method_name: str,
+        message: IncomingMessage,
+    ) -> None:
+        """Handle a request & reply with a body compressed per policy.
+
+        Replaces aio_pika's RPC.on_call_message to decode requests & encode
+        replies using their `content_encoding` & `content_type`.
+        """
+        if method_name not in self.routes:
+            LOGGER.warning(f'Method {method_name} not registered in {self}')
+            return
+
+        deadline = request_context.parse_deadline(
+            (message.headers or {}).get(DEADLINE_HEADER))
+
+        if deadline is not None and deadline <= time.time():
+            # the caller has given up, so handling it would be wasted work
+            EXPIRED_REQUESTS.labels(method_name).inc()
+            LOGGER.info(
+                f'Dropped request to {method_name}, its deadline passed '
+                'before it was handled')
+            message.ack()
+            return
+
+        content_type = message.content_type \
+            if message.content_type in CONTENT_TYPES else self.content_type
+
+        request = _REQUEST.set((self, message, method_name, content_type))
+
+        try:
+            payload = deserialize(
+                message.body, message.content_encoding, content_type)
+
+            with request_context.deadline(deadline):
+                result = await self._execute_by(
+                    deadline, method_name, payload)
+
+            body, encoding = await self.serialize_reply(
+                method_name, result, content_type)
+            message_type = 'result'
+        except Exception as err:  # pylint: disable=broad-except
+            if isinstance(err, DeadlineExceeded):
+                DEADLINES_EXCEEDED.labels(method_name).inc()
+
+            body = self.serialize_exception(err)
+            encoding = DEFAULT_ENCODING
+            content_type = JSON_CONTENT_TYPE
+            message_type = 'error'
+        finally:
+            _REQUEST.reset(request)
+
+        if not message.reply_to:
+            LOGGER.info(
+                f'RPC message without "reply_to" header {message}, call '
+                'result will be lost')
+            message.ack()
+            return
+
+        try:
+            await self.reply(
+                message, body, encoding, content_type, message_type)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception(f'Failed to send reply to {message}')
+            message.reject(requeue=False)
+            return
+
+        message.ack()
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    async def _execute_by(
+        self,
+        deadline: Optional[float],
+        method_name: str,
+        payload: Any,
+    ) -> Any:
+        """Run a route's handler, cancelling it at the deadline, if any."""
+        call = self.execute(self.routes[method_name], payload)
+
+        if deadline is None:
+            return await call
+
+        try:
+            return await asyncio.wait_for(call, deadline - time.time())
+        except asyncio.TimeoutError:
+            if time.time() < deadline:
+                raise  # raised by the handler, not the deadline
+
+            raise DeadlineExceeded(
+                f'Request to {method_name} was cancelled, its deadline '
+                'passed while it was handled') from None
+
+    async def reply(
+        self,
+        message: IncomingMessage,
+        body: bytes,
+        encoding: str,
+        content_type: str,
+        message_type: str,
+    ) -> None:
+        """Publish a reply to a request."""
+        await self.channel.default_exchange.publish(
+            Message(
+                body,
+                content_encoding=encoding,
+                content_type=content_type,
+                delivery_mode=message.delivery_mode,
+                correlation_id=message.correlation_id,
+                timestamp=time.time(),
+                type=message_type),
+            message.reply_to,
+            mandatory=False)
+
+    async def cancel_consumers(self) -> None:
+        """Stop consuming new messages on every registered route."""
+        # aio_pika's RPC keeps a queue & consumer tag for every route
+        # registered, keyed by route handler
+        await asyncio.gather(*[
+            queue.cancel(self.consumer_tags[handler])
+            for handler, queue in self.queues.items()])
+
+
+class Master(JSONGzipMaster):
+    """JSONGzipMaster that can cancel its consumers independently.
+
+    Tasks are decoded according to their content type, or its
+    `content_type` if they don't name one.
+    """
+
+    consumers: List[Worker]
+    prefetch: Dict[str, int]
+    content_type: str
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.consumers = []
+        self.prefetch = {}
+        self.content_type = JSON_CONTENT_TYPE
+
+    def serialize(self, data: Any) -> bytes:
+        """Encode task as gzip compressed JSON."""
+        body, _ = serialize(self.json_encoder, data)
+
+        return body
+
+    def deserialize(self, data: bytes) -> Any:
+        """Decode task from gzip compressed JSON."""
+        return deserialize(data)
+
+    async def on_message(
+        self,
+        func: Callable[..., Any],
+        message: IncomingMessage,
+    ) -> Any:
+        """Handle a task, decoding it per its encoding & content type.
+
+        Replaces aio_pika's Master.on_message, which assumes every task is
+        encoded the same way.
+        """
+        content_type = message.content_type \
+            if message.content_type in CONTENT_TYPES else self.content_type
+
+        with message.process(
+                requeue=self._requeue,
+                reject_on_redelivered=self._reject_on_redelivered):
+            return await self.execute(func, deserialize(
+                message.body, message.content_encoding, content_type))
+
+    async def create_worker(
+        self,
+        queue_name: str,
+        func: Callable[..., Any],
+        **kwargs: Any
+    ) -> Worker:
+        """Create a consumer for a route & keep it to cancel later.
+
+        Consumer is started with the route's prefetch count.
+        """
+        await self.channel.set_qos(
+            prefetch_count=self.prefetch.get(queue_name, UNLIMITED))
+        consumer = await super().create_worker(queue_name, func, **kwargs)
+        self.consumers.append(consumer)
+
+        return consumer
+
+    async def cancel_consumers(self) -> None:
+        """Stop consuming new messages on every registered route."""
+        await asyncio.gather(*[
+            consumer.close() for consumer in self.consumers])
@@ -0,0 +1,165 @@
+"""Record how long each database query takes, grouped by its fingerprint.
+
+Labeling metrics with a query's text would make a new series for every
+value it's given, e.g. every string `all_by_string` is called with. A
+query is instead labeled by its fingerprint: its text with every literal
+value & parameter replaced by `?`, lists of them collapsed to one, &
+whitespace collapsed:
+
+    SELECT * FROM "example_item" WHERE string = 'a' AND integer IN (1, 2)
+
+    SELECT * FROM "example_item" WHERE string = ? AND integer IN (?)
+
+A composed query is fingerprinted by its template, rendered with `?` in
+place of each literal value, rather than its full text, which can be huge
+(e.g. a batch of rows inserted at once). Texts too long to be worth caching
+the fingerprint of are still normalized, but not cached, & truncated.
+
+Each query records its latency & the number of rows it returned, labeled
+by fingerprint, as is the time its connection was waited for, if it was
+the first query run on it. Queries taking longer than a threshold
+(including any time spent waiting for a free connection) are also logged
+as slow, with the route they were made while handling, see
+`request_context`.
+"""
+
+from functools import lru_cache
+from logging import getLogger
+import re
+from typing import Any, List, Optional, Set, cast
+
+from psycopg2 import sql
+
+import metrics
+import request_context
+
+
+LOGGER = getLogger(__name__)
+
+# most distinct fingerprints labeled, any more are labeled `other`, so
+# dynamically built queries can't grow the metrics without bound
+MAX_FINGERPRINTS = 500
+
+# longest text whose fingerprint is cached, & longest fingerprint
+MAX_TEXT_LENGTH = 2048
+
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+QUERY_DURATION = metrics.Histogram(
+    'db_query_duration_seconds',
+    'Time taken by database queries, by query fingerprint.',
+    ['query'])
+QUERY_ROWS = metrics.Histogram(
+    'db_query_rows',
+    'Rows returned by database queries, by query fingerprint.',
+    ['query'],
+    buckets=ROWS_BUCKETS)
+QUERY_POOL_WAIT = metrics.Histogram(
+    'db_query_pool_wait_seconds',
+    'Time spent waiting for a free pooled connection before running a '
+    'query, by query fingerprint.',
+    ['query'])
+SLOW_QUERIES = metrics.Counter(
+    'db_slow_queries_total',
+    'Database queries slower than the slow query threshold, by route.',
+    ['route'])
+
+_NORMALIZE = [
+    # string literals, including escaped quotes
+    (re.compile(r"[EeBbXxUu]?'(?:[^']|'')*'"), '?'),
+    # psycopg2 & PREPARE parameters
+    (re.compile(r'%s|\$\d+'), '?'),
+    # numbers, but not digits within names
+    (re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w.])'), '?'),
+    # generated names (statements, cursors) ending in a hex digest
+    (re.compile(r'_[0-9a-f]{32}\b'), '_?'),
+    # lists of values
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(?)'),
+    (re.compile(r'ARRAY\[\s*\?(?:\s*,\s*\?)*\s*\]', re.IGNORECASE), '?'),
+    (re.compile(r'\s+'), ' '),
+]
+
+_labeled: Set[str] = set()
+
+
+def template(query: sql.Composable, context: Any) -> str:
+    """Render a composed query with `?` for each literal value & parameter.
+
+    context is a connection or cursor, as given to `as_string`.
+    """
+    if isinstance(query, (sql.Literal, sql.Placeholder)):
+        return '?'
+
+    if isinstance(query, sql.Composed):
+        parts = cast(List[sql.Composable], query.seq)
+
+        return ''.join(template(part, context) for part in parts)
+
+    return query.as_string(context) or ''
+
+
+def _normalize(text: str) -> str:
+    for pattern, replacement in _NORMALIZE:
+        text = pattern.sub(replacement, text)
+
+    return text.strip().rstrip(';')
+
+
+_cached_normalize = lru_cache(maxsize=1024)(_normalize)
+
+
+def fingerprint(text: str) -> str:
+    """Normalize a query's text, so it's the same whatever its values."""
+    if len(text) > MAX_TEXT_LENGTH:
+        return _normalize(text)[:MAX_TEXT_LENGTH]
+
+    return _cached_normalize(text)
+
+
+def _label(query: str) -> str:
+    if query in _labeled:
+        return query
+
+    if len(_labeled) < MAX_FINGERPRINTS:
+        _labeled.add(query)
+
+        return query
+
+    return 'other'
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def record(
+    text: str,
+    duration: float,
+    rows: Optional[int],
+    waited: Optional[float] = None,
+    slow_threshold: Optional[float] = None,
+) -> None:
+    """Record a query's latency, rows returned, & connection wait, if any.
+
+    Logs the query as slow if it took longer than slow_threshold seconds,
+    counting the time it waited for a connection.
+    """
+    query = fingerprint(text)
+    label = _label(query)
+    QUERY_DURATION.labels(label).observe(duration)
+
+    if rows is not None:
+        QUERY_ROWS.labels(label).observe(rows)
+
+    if waited is not None:
+        QUERY_POOL_WAIT.labels(label).observe(waited)
+
+    waited = waited or 0.0
+
+    if slow_threshold is None or duration + waited <= slow_threshold:
+        return
+
+    route = request_context.current_route() or 'unknown'
+    SLOW_QUERIES.labels(route).inc()
+    LOGGER.warning(
+        f'Slow query in route {route}: {duration + waited:.3f}s '
+        f'({waited:.3f}s waiting for a connection), '
+        f'{"no" if rows is None else rows} rows returned: {query}')
@@ -0,0 +1,99 @@
+"""Pass JSON through without parsing & re-encoding it.
+
+A RawJSON holds a JSON document as text, already serialized. Encoding a
+response (see `encoder.ExtendedJSONEncoder`) splices its text into the
+output as is, instead of encoding a parsed copy of it. Reading `json` &
+`jsonb` columns as RawJSON (see `database.Client`) lets a large document
+go from the database to a response without ever being parsed; writing a
+RawJSON sends its text to the database as is.
+
+The standard library's JSON encoder can't emit raw text, so each RawJSON
+is encoded as a unique placeholder string, then the placeholders are
+replaced in the encoded output:
+
+    with fragments() as found:
+        text = json.dumps(data, default=placeholder)
+
+    text = splice(text, found)
+
+Outside of `fragments`, a placeholder is the parsed document instead,
+e.g. for encoders that can't splice text, like MessagePack.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import re
+import secrets
+from typing import Any, Iterator, List, Optional
+
+
+class RawJSON:
+    """A JSON document, already serialized."""
+
+    __slots__ = ('text',)
+
+    text: str
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def __repr__(self) -> str:
+        """Show the document's text."""
+        return f'RawJSON({self.text!r})'
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare documents by their text."""
+        return isinstance(other, RawJSON) and other.text == self.text
+
+    def __hash__(self) -> int:
+        """Hash the document's text."""
+        return hash(self.text)
+
+    def load(self) -> Any:
+        """Parse the document."""
+        return json.loads(self.text)
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+_FRAGMENTS: ContextVar[Optional[List[str]]] = ContextVar(
+    '_FRAGMENTS', default=None)
+
+# placeholders are wrapped in NUL characters, which JSON encodes as \u0000,
+# & include a random marker, so they can't be mistaken for any other string
+_MARKER = secrets.token_hex(8)
+_PLACEHOLDER = re.compile(
+    r'"\\u0000' + _MARKER + r':(\d+)\\u0000"')
+
+
+@contextmanager
+def fragments() -> Iterator[List[str]]:
+    """Collect the text of RawJSON values encoded within the context."""
+    found: List[str] = []
+    token = _FRAGMENTS.set(found)
+
+    try:
+        yield found
+    finally:
+        _FRAGMENTS.reset(token)
+
+
+def placeholder(value: RawJSON) -> Any:
+    """Encode a RawJSON as a placeholder to be spliced, see `fragments`."""
+    found = _FRAGMENTS.get()
+
+    if found is None:
+        return value.load()
+
+    found.append(value.text)
+
+    return f'\x00{_MARKER}:{len(found) - 1}\x00'
+
+
+def splice(text: str, found: List[str]) -> str:
+    """Replace the placeholders in encoded text with their fragments."""
+    if not found:
+        return text
+
+    return _PLACEHOLDER.sub(lambda match: found[int(match.group(1))], text)
@@ -0,0 +1,133 @@
+"""Track the route & deadline of the message the running code handles.
+
+Each route handler runs in its own context, so a ContextVar set when it
+starts is seen by everything it awaits (e.g. the database queries it
+makes), without passing the route down through every call:
+
+    with handling_route('example-items'):
+        await handler(data)
+
+    current_route()  # 'example-items', anywhere within handler
+
+A request can also carry a deadline, the time (in seconds since the
+epoch) after which its caller has given up waiting for a reply. Work done
+for it past then is wasted, so code handling it can check how long is
+left & stop early:
+
+    with deadline(time.time() + 5):
+        remaining()  # about 5
+        check_deadline()  # raises DeadlineExceeded once it's passed
+
+Work shared by several handlers (a batched or coalesced query) runs in a
+copy of the context of the handler that started it, with its route but
+without its deadline, see `shared_context`: one handler's deadline passing
+mustn't fail the work for the others, each of which stops waiting for it
+at its own deadline instead.
+"""
+
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+import time
+from typing import Any, Iterator, Optional
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+ROUTE: ContextVar[Optional[str]] = ContextVar('route', default=None)
+
+
+@contextmanager
+def handling_route(name: str) -> Iterator[None]:
+    """Mark code run within the block as handling the named route."""
+    token = ROUTE.set(name)
+
+    try:
+        yield
+    finally:
+        ROUTE.reset(token)
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def current_route() -> Optional[str]:
+    """Get the name of the route being handled, if any."""
+    return ROUTE.get()
+
+
+class DeadlineExceeded(Exception):
+    """A request's deadline passed before the work for it was done."""
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+DEADLINE: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+@contextmanager
+def deadline(at: Optional[float]) -> Iterator[None]:
+    """Give up on code run within the block at a time, if given."""
+    token = DEADLINE.set(at)
+
+    try:
+        yield
+    finally:
+        DEADLINE.reset(token)
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def remaining() -> Optional[float]:
+    """Get the seconds left until the current deadline, if there is one.
+
+    Negative once the deadline has passed.
+    """
+    at = DEADLINE.get()
+
+    if at is None:
+        return None
+
+    return at - time.time()
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    left = remaining()
+
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(
+            f'Deadline passed {-left:.3f} seconds ago')
+
+
+def shared_context() -> Context:
+    """Copy the current context, without its deadline, to run shared work in.
+
+    e.g. `shared_context().run(asyncio.ensure_future, query())`
+    """
+    context = copy_context()
+    context.run(DEADLINE.set, None)
+
+    return context
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def parse_deadline(value: Any) -> Optional[float]:
+    """Read a deadline sent as a number (or its text) of epoch seconds.
+
+    Returns None if there isn't one, or it isn't a number.
+    """
+    if isinstance(value, bytes):
+        value = value.decode('ascii', 'replace')
+
+    if isinstance(value, bool) or value is None:
+        return None
+
+    try:
+        at = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    # NaN & infinity aren't times
+    return at if at - at == 0 else None
@@ -0,0 +1,119 @@
+"""Serialize types JSON doesn't support natively to types it does.
+
+Serializers are registered by type & looked up by the exact type of the
+object being serialized. A type without its own serializer uses the
+serializer of the nearest type in its MRO that has one (so subclasses of
+datetime or Enum are covered too). Lookups are cached per type, making
+every lookup after the first a single dictionary access.
+
+Registering a serializer for a new type is a one-liner:
+
+    SERIALIZERS.register(IPv4Address, str)
+
+Types supported by default:
+
+    -------------------------------------------------
+    | python             | json                     |
+    |--------------------|--------------------------|
+    | uuid.UUID          | string                   |
+    | datetime.datetime  | string, ISO 8601         |
+    | datetime.date      | string, ISO 8601         |
+    | datetime.time      | string, ISO 8601         |
+    | decimal.Decimal    | string, to keep precision|
+    | bytes              | string, base64 encoded   |
+    | enum.Enum          | the member's value       |
+    | dataclasses        | object, one key per field|
+    | raw_json.RawJSON   | its text, as is          |
+    -------------------------------------------------
+"""
+
+from base64 import b64encode
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Type
+from uuid import UUID
+
+from raw_json import RawJSON, placeholder
+
+
+Serializer = Callable[[Any], Any]
+
+
+def _isoformat(value: Any) -> str:
+    result: str = value.isoformat()
+
+    return result
+
+
+def _base64(value: bytes) -> str:
+    return b64encode(value).decode('ascii')
+
+
+def _enum_value(value: Enum) -> Any:
+    return value.value
+
+
+def _dataclass_serializer(type_: Type[Any]) -> Serializer:
+    """Build a serializer for a dataclass, listing its fields once."""
+    names = tuple(field.name for field in fields(type_))
+
+    def serialize(value: Any) -> Dict[str, Any]:
+        return {name: getattr(value, name) for name in names}
+
+    return serialize
+
+
+class SerializerRegistry:
+    """A collection of serializers, keyed by the type they serialize."""
+
+    _serializers: Dict[type, Serializer]
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    _cache: Dict[type, Optional[Serializer]]
+
+    def __init__(self) -> None:
+        self._serializers = {}
+        self._cache = {}
+
+    def register(self, type_: type, serializer: Serializer) -> None:
+        """Serialize instances of the given type with the given function."""
+        self._serializers[type_] = serializer
+        # a new serializer may be nearer in the MRO of types already cached
+        self._cache.clear()
+
+    def _resolve(self, type_: type) -> Optional[Serializer]:
+        for base in type_.__mro__:
+            serializer = self._serializers.get(base)
+
+            if serializer is not None:
+                return serializer
+
+        if is_dataclass(type_):
+            return _dataclass_serializer(type_)
+
+        return None
+
+    def find(self, type_: type) -> Optional[Serializer]:
+        """Get the serializer for a type, or None if there isn't one."""
+        try:
+            return self._cache[type_]
+        except KeyError:
+            serializer = self._resolve(type_)
+            self._cache[type_] = serializer
+
+            return serializer
+
+
+SERIALIZERS = SerializerRegistry()
+
+SERIALIZERS.register(UUID, str)
+SERIALIZERS.register(datetime, _isoformat)
+SERIALIZERS.register(date, _isoformat)
+SERIALIZERS.register(time, _isoformat)
+SERIALIZERS.register(Decimal, str)
+SERIALIZERS.register(bytes, _base64)
+SERIALIZERS.register(Enum, _enum_value)
+# spliced into the output by encoders that collect fragments, see raw_json
+SERIALIZERS.register(RawJSON, placeholder)
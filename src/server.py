@@ -29,21 +29,37 @@ asynchronous event loop, handled here by the `register_database`,
 # standard library imports
 import logging
 import os
-from typing import Any, List, Dict, TypedDict
+from typing import Any, AsyncIterator, List, Dict, Optional, TypedDict
 
 # third party imports
 import amqp_worker as worker
 import db_wrapper as db
 
 # internal dependencies
+from cache import cache_model
+from coalesce import coalesce_model
+from columnar import Columnar
+from compiled import ValidationError, compile_validator
+from compression import CompressionPolicy
+from database import Client, PoolOptions
 from encoder import (
-    json_gzip_rpc_factory,
+    adaptive_rpc_factory,
     json_gzip_queue_factory,
+    msgpack_queue_factory,
+    msgpack_rpc_factory,
 )
-from start_server import Runner
+from start_server import Runner, get_loop_factory, LOOPS
+from workers import RPCWorker, QueueWorker
 
 # application logic
-from models import ExampleItem, ExampleItemData, SimpleData
+from models import (
+    BulkModel,
+    ExampleItem,
+    ExampleItemData,
+    Page,
+    SimpleData,
+    validate_example_item,
+)
 import lib
 
 #
@@ -71,6 +87,321 @@ def get_mode() -> str:
 MODE = get_mode()
 
 
+def get_loop() -> str:
+    """Determine which event loop implementation to run the application in.
+
+    Uses `LOOP` environment variable & falls back to 'auto' if no variable
+    exists. 'auto' uses uvloop if it's installed & the stock asyncio event
+    loop otherwise, 'uvloop' or 'asyncio' pick one explicitly. Raises an
+    error if anything else is specified.
+    """
+    env = os.getenv('LOOP', 'auto')  # default to 'auto'
+
+    if env in LOOPS:
+        return env
+
+    raise TypeError(
+        'LOOP must be either `auto`, `uvloop`, `asyncio`, or unset '
+        '(defaults to `auto`)')
+
+
+LOOP = get_loop()
+
+
+def get_processes() -> int:
+    """Determine how many worker processes to run the application in.
+
+    Uses `PROCESSES` environment variable & falls back to 1 if no variable
+    exists. Accepts a positive integer, or 'auto' to use one process per
+    available CPU, raises an error if anything else is specified.
+    """
+    env = os.getenv('PROCESSES', '1')  # default to a single process
+
+    if env == 'auto':
+        return os.cpu_count() or 1
+
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+
+    raise TypeError(
+        'PROCESSES must be a positive integer, `auto`, or unset '
+        '(defaults to `1`)')
+
+
+PROCESSES = get_processes()
+
+
+def get_drain_timeout() -> float:
+    """Determine how long to wait for running handlers on exit.
+
+    Uses `DRAIN_TIMEOUT` environment variable (in seconds) & falls back to
+    10 if no variable exists. Raises an error if it isn't a non-negative
+    number.
+    """
+    env = os.getenv('DRAIN_TIMEOUT', '10')  # default to 10 seconds
+
+    try:
+        timeout = float(env)
+    except ValueError:
+        timeout = -1
+
+    if timeout >= 0:
+        return timeout
+
+    raise TypeError(
+        'DRAIN_TIMEOUT must be a non-negative number of seconds, or unset '
+        '(defaults to `10`)')
+
+
+DRAIN_TIMEOUT = get_drain_timeout()
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def get_metrics_port() -> Optional[int]:
+    """Determine which port to serve metrics on, if any.
+
+    Uses `METRICS_PORT` environment variable & doesn't serve metrics if no
+    variable exists. Raises an error if it isn't a valid port number.
+    """
+    env = os.getenv('METRICS_PORT')  # default to not serving metrics
+
+    if env is None:
+        return None
+
+    if env.isdigit() and 0 < int(env) < 65536:
+        return int(env)
+
+    raise TypeError(
+        'METRICS_PORT must be a port number, or unset (defaults to not '
+        'serving metrics)')
+
+
+METRICS_PORT = get_metrics_port()
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def get_slow_callback_threshold() -> Optional[float]:
+    """Determine how long the event loop can be blocked before reporting it.
+
+    Uses `SLOW_CALLBACK_THRESHOLD` environment variable (in seconds) & falls
+    back to 0.1 if no variable exists. Setting it to 0 disables monitoring
+    the event loop. Raises an error if it isn't a non-negative number.
+    """
+    env = os.getenv('SLOW_CALLBACK_THRESHOLD', '0.1')  # default to 100ms
+
+    try:
+        threshold = float(env)
+    except ValueError:
+        threshold = -1
+
+    if threshold == 0:
+        return None
+
+    if threshold > 0:
+        return threshold
+
+    raise TypeError(
+        'SLOW_CALLBACK_THRESHOLD must be a non-negative number of seconds, '
+        'or unset (defaults to `0.1`)')
+
+
+SLOW_CALLBACK_THRESHOLD = get_slow_callback_threshold()
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def get_pool_size(name: str) -> Optional[int]:
+    """Determine the size of a pool for offloaded route handlers.
+
+    Uses the named environment variable & falls back to concurrent.futures'
+    default pool size if no variable exists. Raises an error if it isn't a
+    positive integer.
+    """
+    env = os.getenv(name)  # default to concurrent.futures' default
+
+    if env is None:
+        return None
+
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+
+    raise TypeError(
+        f'{name} must be a positive integer, or unset (defaults to '
+        'concurrent.futures\' default pool size)')
+
+
+THREAD_POOL_SIZE = get_pool_size('THREAD_POOL_SIZE')
+PROCESS_POOL_SIZE = get_pool_size('PROCESS_POOL_SIZE')
+
+
+def get_compression_min_size() -> int:
+    """Determine the smallest response size, in bytes, worth compressing.
+
+    Uses `COMPRESSION_MIN_SIZE` environment variable & falls back to 1024
+    if no variable exists. Setting it to 0 compresses every response.
+    Raises an error if it isn't a non-negative integer.
+    """
+    env = os.getenv('COMPRESSION_MIN_SIZE', '1024')  # default to 1KiB
+
+    if env.isdigit():
+        return int(env)
+
+    raise TypeError(
+        'COMPRESSION_MIN_SIZE must be a non-negative integer, or unset '
+        '(defaults to `1024`)')
+
+
+COMPRESSION_MIN_SIZE = get_compression_min_size()
+
+
+def get_compression_level() -> int:
+    """Determine the level to compress responses at.
+
+    Uses `COMPRESSION_LEVEL` environment variable & falls back to 6 if no
+    variable exists. Raises an error if it isn't an integer from 1 (fastest)
+    to 9 (smallest).
+    """
+    env = os.getenv('COMPRESSION_LEVEL', '6')  # default to zlib's default
+
+    if env.isdigit() and 1 <= int(env) <= 9:
+        return int(env)
+
+    raise TypeError(
+        'COMPRESSION_LEVEL must be an integer from 1 to 9, or unset '
+        '(defaults to `6`)')
+
+
+COMPRESSION_LEVEL = get_compression_level()
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def get_encode_offload_min_size() -> Optional[int]:
+    """Determine the response size, in bytes, to compress off the event loop.
+
+    Uses `ENCODE_OFFLOAD_MIN_SIZE` environment variable & falls back to
+    262144 (256KiB) if no variable exists. Setting it to 0 compresses every
+    response on the event loop. Raises an error if it isn't a non-negative
+    integer.
+    """
+    env = os.getenv('ENCODE_OFFLOAD_MIN_SIZE', '262144')  # default to 256KiB
+
+    if env == '0':
+        return None
+
+    if env.isdigit():
+        return int(env)
+
+    raise TypeError(
+        'ENCODE_OFFLOAD_MIN_SIZE must be a non-negative integer, or unset '
+        '(defaults to `262144`)')
+
+
+ENCODE_OFFLOAD_MIN_SIZE = get_encode_offload_min_size()
+
+
+def get_wire_format() -> str:
+    """Determine how to encode messages that don't name a content type.
+
+    Uses `WIRE_FORMAT` environment variable & falls back to 'json' if no
+    variable exists. 'json' decodes (& replies to) such messages as JSON,
+    'msgpack' as MessagePack; messages naming a content type are always
+    encoded as they ask. Raises an error if anything else is specified.
+    """
+    env = os.getenv('WIRE_FORMAT', 'json')  # default to 'json'
+
+    if env in ('json', 'msgpack'):
+        return env
+
+    raise TypeError(
+        'WIRE_FORMAT must be either `json`, `msgpack`, or unset '
+        '(defaults to `json`)')
+
+
+WIRE_FORMAT = get_wire_format()
+
+
+def get_db_pool_size(name: str, default: int) -> int:
+    """Determine a bound on the size of the database connection pools.
+
+    Uses the named environment variable & falls back to the given default
+    if no variable exists. Raises an error if it isn't a positive integer.
+    """
+    env = os.getenv(name, str(default))
+
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+
+    raise TypeError(
+        f'{name} must be a positive integer, or unset (defaults to '
+        f'`{default}`)')
+
+
+DB_POOL_MIN_SIZE = get_db_pool_size('DB_POOL_MIN_SIZE', 1)
+DB_POOL_MAX_SIZE = get_db_pool_size('DB_POOL_MAX_SIZE', 10)
+
+if DB_POOL_MIN_SIZE > DB_POOL_MAX_SIZE:
+    raise TypeError('DB_POOL_MIN_SIZE must not be more than DB_POOL_MAX_SIZE')
+
+
+def get_db_pool_acquire_timeout() -> float:
+    """Determine how long a query waits for a free database connection.
+
+    Uses `DB_POOL_ACQUIRE_TIMEOUT` environment variable (in seconds) & falls
+    back to 10 if no variable exists. Raises an error if it isn't a
+    positive number.
+    """
+    env = os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '10')  # default to 10s
+
+    try:
+        timeout = float(env)
+    except ValueError:
+        timeout = 0
+
+    if timeout > 0:
+        return timeout
+
+    raise TypeError(
+        'DB_POOL_ACQUIRE_TIMEOUT must be a positive number of seconds, or '
+        'unset (defaults to `10`)')
+
+
+DB_POOL_ACQUIRE_TIMEOUT = get_db_pool_acquire_timeout()
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def get_slow_query_threshold() -> Optional[float]:
+    """Determine how long a database query can take before logging it.
+
+    Uses `SLOW_QUERY_THRESHOLD` environment variable (in seconds) & falls
+    back to 0.5 if no variable exists. Setting it to 0 disables the slow
+    query log. Raises an error if it isn't a non-negative number.
+    """
+    env = os.getenv('SLOW_QUERY_THRESHOLD', '0.5')  # default to 500ms
+
+    try:
+        threshold = float(env)
+    except ValueError:
+        threshold = -1
+
+    if threshold == 0:
+        return None
+
+    if threshold > 0:
+        return threshold
+
+    raise TypeError(
+        'SLOW_QUERY_THRESHOLD must be a non-negative number of seconds, '
+        'or unset (defaults to `0.5`)')
+
+
+SLOW_QUERY_THRESHOLD = get_slow_query_threshold()
+CODEC_POOL_SIZE = get_pool_size('CODEC_POOL_SIZE')
+
+
 #
 # LOGGING
 #
@@ -97,8 +428,56 @@ db_connection_params = db.ConnectionParameters(
     password=os.getenv('DB_PASS', 'postgres'),
     database=os.getenv('DB_NAME', 'postgres'))
 
+# NOTE: set `DB_REPLICA_HOST` to run Models' read methods on a read replica
+# (e.g. a streaming replication standby), leaving the primary only writes;
+# it's connected to with the primary's user, password, & database name
+# unless `DB_REPLICA_USER`, `DB_REPLICA_PASS`, or `DB_REPLICA_NAME` are set.
+# Replicas apply writes a moment after the primary, so a read made right
+# after a write may not see it yet; cached Models read from the primary
+# instead (see `example_model` below), since a result read from a lagging
+# replica right after a change clears the cache would stay cached, stale,
+# for its whole TTL.
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+db_replica_params: Optional[db.ConnectionParameters] = None
+
+if os.getenv('DB_REPLICA_HOST'):
+    db_replica_params = db.ConnectionParameters(
+        host=os.getenv('DB_REPLICA_HOST'),
+        user=os.getenv('DB_REPLICA_USER', db_connection_params.user),
+        password=os.getenv(
+            'DB_REPLICA_PASS', db_connection_params.password),
+        database=os.getenv(
+            'DB_REPLICA_NAME', db_connection_params.database))
+
 # init db & connect
-database = db.Client(db_connection_params)
+# NOTE: this extends db_wrapper's Client to run compiled Queries as prepared
+# statements, see `database`; give it `prepare=False` to run them without
+# preparing them (e.g. behind a connection pooler that doesn't support
+# prepared statements)
+# NOTE: given `raw_json=True`, the Client reads json & jsonb columns as
+# RawJSON, their text spliced into responses as is instead of being parsed
+# into dictionaries & encoded again; leave it out if handlers need to read
+# or change the documents (or call `.load()` on them)
+# NOTE: queries run on pools of connections, one to the primary & one to the
+# replica (if any), each opening `DB_POOL_MIN_SIZE` connections up front &
+# up to `DB_POOL_MAX_SIZE` under load; a query waits up to
+# `DB_POOL_ACQUIRE_TIMEOUT` seconds for a free connection before failing.
+# Keep max size times PROCESSES under the server's `max_connections`.
+# NOTE: every query's latency, rows returned, & time spent waiting for a
+# connection are exported as metrics, labeled by its fingerprint (its text
+# without literal values); queries slower than `SLOW_QUERY_THRESHOLD`
+# seconds, counting time waiting for a connection, are also logged with the
+# route that made them
+database = Client(
+    db_connection_params,
+    raw_json=True,
+    pool=PoolOptions(
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT),
+    replica_params=db_replica_params,
+    slow_query_threshold=SLOW_QUERY_THRESHOLD)
 
 
 #
@@ -113,12 +492,43 @@ broker_connection_params = worker.ConnectionParameters(
     password=os.getenv('BROKER_PASS', 'guest'))
 
 # initialize Worker & assign to global variable
-response_and_request = worker.RPCWorker(
-    broker_connection_params,
-    pattern_factory=json_gzip_rpc_factory)
-service_to_service = worker.QueueWorker(
-    broker_connection_params,
-    pattern_factory=json_gzip_queue_factory)
+# NOTE: these extend amqp_worker's RPCWorker & QueueWorker to track the
+# handlers they're running, allowing the Runner to let them finish before
+# stopping the workers on exit
+# NOTE: responses smaller than `COMPRESSION_MIN_SIZE` are sent uncompressed,
+# since compressing them costs more time than it saves; each response marks
+# how it's encoded in its `content_encoding` property
+# NOTE: responses encoded to `ENCODE_OFFLOAD_MIN_SIZE` bytes or more are
+# compressed in a thread pool, so they don't block the event loop
+# NOTE: requests can carry a deadline in their `x-deadline` header (seconds
+# since the epoch); expired requests are dropped unhandled, & handlers still
+# running at their deadline are cancelled, their database queries bounded
+# by a matching `statement_timeout`, see `request_context`
+# NOTE: messages that don't name a content type are encoded as
+# `WIRE_FORMAT`, JSON or MessagePack; either way responses are compressed
+# per the same policy
+compression_policy = CompressionPolicy(
+    min_size=COMPRESSION_MIN_SIZE,
+    level=COMPRESSION_LEVEL)
+
+if WIRE_FORMAT == 'msgpack':
+    response_and_request = RPCWorker(
+        broker_connection_params,
+        pattern_factory=msgpack_rpc_factory(
+            compression_policy,
+            offload_min_size=ENCODE_OFFLOAD_MIN_SIZE))
+    service_to_service = QueueWorker(
+        broker_connection_params,
+        pattern_factory=msgpack_queue_factory)
+else:
+    response_and_request = RPCWorker(
+        broker_connection_params,
+        pattern_factory=adaptive_rpc_factory(
+            compression_policy,
+            offload_min_size=ENCODE_OFFLOAD_MIN_SIZE))
+    service_to_service = QueueWorker(
+        broker_connection_params,
+        pattern_factory=json_gzip_queue_factory)
 
 
 #
@@ -138,11 +548,33 @@ service_to_service = worker.QueueWorker(
 # If you don't need any queries beyond the built-in ones, you can simply
 # build a model from only a ModelData definition, database Client object, &
 # table name
-simple_model = db.Model[SimpleData](database, 'simple')
+# NOTE: a BulkModel is built the same way as db_wrapper's Model, adding
+# `create.many` & `create.upsert_many` to create many rows at once in
+# batches, instead of a round trip to the database per row
+simple_model = BulkModel[SimpleData](database, 'simple')
 
 # Otherwise, it's best to extend the model object with additional queries
 # in another file, then initialize it here
-example_model = ExampleItem(database)
+# NOTE: caching a Model keeps the results of the given read methods in
+# memory for the given TTL in seconds, clearing them whenever the Model is
+# written to; the table's trigger (see `models/example_item.sql`) notifies
+# every instance of writes made elsewhere, which the database Client listens
+# for on a connection of its own, so the TTL only bounds how stale results
+# get if notifications are lost
+# NOTE: ExampleItem's `read.all_by_string` & `read.load_by_id` batch calls
+# made at about the same time (e.g. from many messages handled at once)
+# into a single `= ANY(...)` query, see `models/lookups.py`
+# NOTE: coalescing a Model's reads makes concurrent calls with the same
+# arguments share a single query, so a burst of callers missing the cache at
+# once (e.g. when a popular result expires) sends only one query
+# NOTE: given `replica_reads=False`, its reads go to the primary, so a
+# result cached right after a change is never read from a replica that
+# hasn't applied the change yet
+example_model = cache_model(
+    coalesce_model(
+        ExampleItem(database, replica_reads=False),
+        methods=['all_by_string', 'one_by_id']),
+    ttls={'all_by_string': 30, 'one_by_id': 300})
 
 
 #
@@ -219,7 +651,12 @@ async def db_route(_: Any) -> List[Any]:
     return tables
 
 
-@response_and_request.route('example-items')
+# NOTE: routes can limit how many of their handlers run at once & how many
+# messages the broker delivers to them before they're acknowledged. This
+# keeps a slow route (like this one, waiting on the database) from starving
+# the others. Limits can also be set with environment variables, in this
+# case `ROUTE_EXAMPLE_ITEMS_MAX_CONCURRENCY` & `ROUTE_EXAMPLE_ITEMS_PREFETCH`
+@response_and_request.route('example-items', max_concurrency=10)
 async def model_route(query: str) -> List[ExampleItemData]:
     """Implement example handler that uses Model to interact with database."""
     # psycopg2's sql composition module (used to query built in
@@ -235,6 +672,111 @@ async def model_route(query: str) -> List[ExampleItemData]:
     return await example_model.read.all_by_string(query)
 
 
+# NOTE: a columnar response names each column once, then sends each row as
+# an array of values in the same order, instead of an object repeating
+# every column name; use it for routes returning many rows
+@response_and_request.route('example-items-columnar', max_concurrency=10)
+async def model_columnar_route(query: str) -> Columnar:
+    """Implement example handler returning rows as columns & tuples."""
+    if query is None:
+        raise Exception(
+            'No Message: no message body was sent when one is required.')
+
+    return await example_model.read.columns_by_string(query)
+
+
+# NOTE: creating many rows in one call inserts them in batches, a single
+# statement per batch, instead of one statement per row
+@response_and_request.route('example-items-create-many', max_concurrency=10)
+async def model_create_many_route(
+    items: List[ExampleItemData]
+) -> List[ExampleItemData]:
+    """Implement example handler creating many rows at once."""
+    if not items or not isinstance(items, list):
+        raise Exception(
+            'No Message: a list of items to create is required.')
+
+    # NOTE: validators compiled from a ModelData check every item before
+    # any of them are sent to the database, so a malformed message fails
+    # without a round trip, see `compiled`
+    return await example_model.create.many(
+        [validate_example_item(item) for item in items])
+
+
+class PageQuery(TypedDict, total=False):
+    """Message shape for requesting a page of example items."""
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=inherit-non-class
+    # pylint: disable=too-few-public-methods
+
+    string: str
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    after: Optional[str]
+    limit: int
+
+
+_validate_page_query = compile_validator(PageQuery, required=('string',))
+
+
+def validate_page_query(query: Any) -> PageQuery:
+    """Validate a request for a page, which must have a `limit` of 1 or more.
+
+    Raises ValidationError if it doesn't.
+    """
+    page_query = _validate_page_query(query)
+
+    if page_query.get('limit', 1) < 1:
+        raise ValidationError('limit', 'must be at least 1')
+
+    return page_query
+
+
+# NOTE: rather than reading every matching row at once, a route can return
+# a page of rows along with a continuation token (`after`) to send in the
+# request for the next page; pages are read in order of `_id` & each one
+# starts after the last, so later pages are as fast to read as the first
+@response_and_request.route('example-items-page', max_concurrency=10)
+async def model_page_route(query: Dict[str, Any]) -> Page[ExampleItemData]:
+    """Implement example handler reading a page of rows at a time.
+
+    Expects a `string` to match, & optionally the `after` token from the
+    previous page & a `limit` of 1 to 1000 rows.
+    """
+    page_query = validate_page_query(query)
+
+    return await example_model.read.page_by_string(
+        page_query['string'],
+        after=page_query.get('after'),
+        limit=min(page_query.get('limit', 100), 1000))
+
+
+# NOTE: a streaming route's handler is an async generator; what it yields is
+# sent to the requester in chunks as it's produced, instead of building the
+# whole response first, so memory use stays flat however many rows match
+@response_and_request.route(
+    'example-items-stream', max_concurrency=10, stream=True)
+async def model_stream_route(query: str) -> AsyncIterator[ExampleItemData]:
+    """Implement example handler streaming rows from the database."""
+    if query is None:
+        raise Exception(
+            'No Message: no message body was sent when one is required.')
+
+    async for item in example_model.read.iter_by_string(query):
+        yield item
+
+
+# NOTE: a synchronous handler doing CPU bound work would block every other
+# route while it runs if it ran on the event loop. Instead, giving an
+# executor runs it in a pool managed by the Runner: `process` for CPU bound
+# work like this, or `thread` for blocking i/o
+@response_and_request.route('json-summary', executor='process')
+def json_summary(data: Any) -> Dict[str, int]:
+    """Summarize a JSON document in a process pool."""
+    return lib.summarize_json(data)
+
+
 @service_to_service.route('queue-test')
 async def queue_test(data: str) -> None:
     """Simplified example of a queue consumer handler.
@@ -250,7 +792,29 @@ async def queue_test(data: str) -> None:
 # RUN SERVICE
 #
 
-runner = Runner()
+# NOTE: passing a number of processes greater than 1 runs a supervisor
+# process that forks that many copies of this service, each with its own
+# event loop, database connection, & AMQP consumers, then restarts any that
+# die & stops them all in order on SIGINT or SIGTERM
+# NOTE: the event loop is created with the factory for the implementation
+# chosen by the `LOOP` environment variable
+# NOTE: on exit, workers stop consuming, then the Runner waits up to
+# `drain_timeout` seconds for handlers already running to finish before
+# stopping the workers
+# NOTE: given a metrics port, the Runner serves Prometheus metrics for
+# every route at http://<host>:<metrics port>/metrics
+# NOTE: given a slow callback threshold, the Runner monitors the event loop,
+# recording its lag as a metric & logging the route & stack of anything
+# blocking it for longer than the threshold
+runner = Runner(
+    processes=PROCESSES,
+    drain_timeout=DRAIN_TIMEOUT,
+    loop_factory=get_loop_factory(LOOP),
+    metrics_port=METRICS_PORT,
+    slow_callback_threshold=SLOW_CALLBACK_THRESHOLD,
+    thread_pool_size=THREAD_POOL_SIZE,
+    process_pool_size=PROCESS_POOL_SIZE,
+    codec_pool_size=CODEC_POOL_SIZE)
 
 # Add database client to Runner's objects that need run inside asyncio
 # event loop
@@ -6,13 +6,69 @@ while defining application logic in main.py.
 
 import asyncio
 from logging import getLogger
+import os
 import signal
-from typing import Any, Protocol, Awaitable, Callable, List
+import time
+from typing import (
+    Any,
+    Protocol,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    runtime_checkable,
+)
+
+import executors
+import metrics
+from monitor import LoopMonitor
 
 
 LOGGER = getLogger(__name__)
 
 
+LoopFactory = Callable[[], asyncio.AbstractEventLoop]
+
+LOOPS = ('auto', 'asyncio', 'uvloop')
+
+
+def _uvloop_factory() -> Optional[LoopFactory]:
+    """Get uvloop's event loop factory, if uvloop is installed."""
+    # pylint: disable=import-outside-toplevel
+    try:
+        import uvloop  # type: ignore
+    except ImportError:
+        return None
+
+    factory: LoopFactory = uvloop.new_event_loop
+
+    return factory
+
+
+def get_loop_factory(name: str = 'auto') -> LoopFactory:
+    """Get a factory for the named event loop implementation.
+
+    Accepts 'asyncio' for the stock event loop, 'uvloop' for uvloop's
+    faster event loop, or 'auto' to use uvloop when it's installed. Falls
+    back to the stock event loop if uvloop is requested but not installed.
+    """
+    if name not in LOOPS:
+        raise ValueError(
+            f'Unknown event loop `{name}`, must be one of {", ".join(LOOPS)}')
+
+    if name in ('auto', 'uvloop'):
+        factory = _uvloop_factory()
+
+        if factory is not None:
+            return factory
+
+        if name == 'uvloop':
+            LOGGER.warning(
+                'uvloop is not installed, falling back to asyncio event loop')
+
+    return asyncio.new_event_loop
+
+
 class Connectable(Protocol):
     """Protocol specifying that object has connection methods.
 
@@ -46,19 +102,107 @@ class Runnable(Protocol):
         ...
 
 
+@runtime_checkable
+class Drainable(Protocol):
+    """Protocol specifying that a 'drainable' object.
+
+    Requires object to have a `drain` method that stops accepting new work,
+    then resolves once work already in progress is done or the given
+    timeout (in seconds) has passed.
+    """
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=too-few-public-methods
+
+    def drain(self, timeout: float) -> Awaitable[None]:
+        """Stop accepting work & wait for work in progress to finish."""
+        ...
+
+
 class Runner:
-    """Simple helper to handle graceful exits."""
+    """Simple helper to handle graceful exits.
+
+    By default, everything registered is run in a single asyncio event loop
+    in the current process. Giving `processes` greater than 1 instead runs
+    the current process as a supervisor that forks that many child
+    processes, each running every registered worker & database client in an
+    event loop of its own. Since workers & database clients only connect
+    once they're run, every child gets its own database connection & AMQP
+    consumers.
+
+    The event loop is created with `loop_factory` when given (see
+    `get_loop_factory`), otherwise asyncio's default loop is used.
+
+    When `metrics_port` is given, metrics are served over HTTP at
+    `/metrics` on that port. With multiple processes, each child process
+    serves its own metrics, on `metrics_port` plus the child's index.
+
+    When `slow_callback_threshold` is given, the event loop is monitored
+    for lag, logging what's running whenever the loop is blocked for longer
+    than the threshold (in seconds), see `monitor.LoopMonitor`.
+
+    Route handlers offloaded to a thread or process pool run in pools
+    sized by `thread_pool_size` & `process_pool_size` (defaulting to
+    concurrent.futures' defaults), created in each process & shut down on
+    exit, see `executors`. Large replies are encoded in a thread pool sized
+    by `codec_pool_size`.
+
+    On SIGINT or SIGTERM, any registered worker that is Drainable is
+    drained first, waiting up to `drain_timeout` seconds for the handlers it
+    is running to finish, before every worker is stopped & every database
+    client is disconnected.
+    """
 
     exiting: bool
+    signum: int
+    loop_factory: Optional[LoopFactory]
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    metrics_port: Optional[int]
+    slow_callback_threshold: Optional[float]
+    thread_pool_size: Optional[int]
+    process_pool_size: Optional[int]
+    codec_pool_size: Optional[int]
+    processes: int
+    index: int
+    drain_timeout: float
+    restart_delay: float
+    shutdown_timeout: float
+    children: List[int]
     databases: List[Connectable]
     workers: List[Runnable]
     stoppers: List[Callable[[], Awaitable[None]]]
 
-    def __init__(self) -> None:
-        signal.signal(signal.SIGINT, self._quit)
-        signal.signal(signal.SIGTERM, self._quit)
+    def __init__(
+        self,
+        processes: int = 1,
+        drain_timeout: float = 10.0,
+        restart_delay: float = 1.0,
+        shutdown_timeout: float = 30.0,
+        loop_factory: Optional[LoopFactory] = None,
+        metrics_port: Optional[int] = None,
+        slow_callback_threshold: Optional[float] = None,
+        thread_pool_size: Optional[int] = None,
+        process_pool_size: Optional[int] = None,
+        codec_pool_size: Optional[int] = None,
+    ) -> None:
+        if processes < 1:
+            raise ValueError('Runner requires at least 1 process.')
 
         self.exiting = False
+        self.signum = signal.SIGTERM
+        self.loop_factory = loop_factory
+        self.metrics_port = metrics_port
+        self.slow_callback_threshold = slow_callback_threshold
+        self.thread_pool_size = thread_pool_size
+        self.process_pool_size = process_pool_size
+        self.codec_pool_size = codec_pool_size
+        self.processes = processes
+        self.index = 0
+        self.drain_timeout = drain_timeout
+        self.restart_delay = restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.children = []
         self.databases = []
         self.workers = []
         self.stoppers = []
@@ -75,51 +219,230 @@ class Runner:
         """Gather registered workers & await them to execute in event loop."""
         return await asyncio.gather(*[worker.run() for worker in self.workers])
 
+    async def _drain_workers(self) -> Any:
+        """Stop workers consuming & wait for handlers already running."""
+        return await asyncio.gather(*[
+            worker.drain(self.drain_timeout) for worker in self.workers
+            if isinstance(worker, Drainable)])
+
     async def _stop_workers(self) -> Any:
         """Collect worker stop methods & await them."""
         return await asyncio.gather(*[stop() for stop in self.stoppers])
 
-    @staticmethod
-    def _quit(signum: int, _: Any) -> None:
+    def _quit(self, signum: int, _: Any) -> None:
         """Exit the process by raising an Exception."""
         LOGGER.info(f'Exit signal received: {signum}')
+        self.exiting = True
+        self.signum = signum
         raise SystemExit(0)
 
-    def register_database(self, database: Connectable) -> None:
-        """Add database to list to be connected to when application is run."""
-        self.databases.append(database)
+    def _drain(self, loop: asyncio.AbstractEventLoop, signum: int) -> None:
+        """Drain workers, then stop the event loop."""
+        if self.exiting:
+            return
 
-    def register_worker(self, worker: Runnable) -> None:
-        """Add worker to list to be run when application is run.
+        LOGGER.info(f'Exit signal received: {signum}, draining workers...')
+        self.exiting = True
+        self.signum = signum
 
-        Executes worker in asyncio event loop. Allows multiple workers
-        by taking all workers registered via this method, then using
-        asyncio.gather to execute all in parallel.
-        """
-        self.workers.append(worker)
+        drained = loop.create_task(self._drain_workers())
+        drained.add_done_callback(lambda _: loop.stop())
 
-    def run(self) -> None:
-        """Run all registered workers in asyncio loop.
+    def _handle_signals(self) -> None:
+        signal.signal(signal.SIGINT, self._quit)
+        signal.signal(signal.SIGTERM, self._quit)
 
-        Gracefully exit using SIGINT or SIGTERM.
-        """
-        # setup an event loop w/ asyncio
-        loop = asyncio.get_event_loop()
+    def _handle_signals_in_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._drain, loop, signum)
+
+    def _spawn(self, index: int) -> int:
+        """Fork a child process that runs everything in its own loop."""
+        pid = os.fork()
+
+        if pid == 0:
+            exit_code = 1
+
+            try:
+                self.index = index
+                self.children = []
+                self._run_in_process()
+                exit_code = 0
+            except BaseException:  # pylint: disable=broad-except
+                LOGGER.exception('Worker process failed')
+            finally:
+                # never return to the supervisor's code in a child
+                os._exit(exit_code)  # pylint: disable=protected-access
+
+        LOGGER.info(f'Started worker process {pid} ({index})')
+
+        return pid
+
+    def _respawn(self, pid: int, status: int) -> None:
+        """Replace a child process that exited unexpectedly."""
+        if pid not in self.children:
+            return
+
+        LOGGER.warning(
+            f'Worker process {pid} exited unexpectedly '
+            f'(status {status}), restarting in {self.restart_delay}s...')
+        # avoid forking in a tight loop if children die at startup
+        time.sleep(self.restart_delay)
+
+        index = self.children.index(pid)
+        self.children[index] = self._spawn(index)
+
+    def _wait_for_child(self, pid: int) -> bool:
+        """Wait up to `shutdown_timeout` for a child, True if it exited."""
+        deadline = time.monotonic() + self.shutdown_timeout
+
+        while time.monotonic() < deadline:
+            try:
+                exited, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                return True
+
+            if exited == pid:
+                return True
+
+            time.sleep(0.1)
+
+        return False
+
+    def _stop_children(self) -> None:
+        """Forward exit signal to each child in order & wait for it to exit."""
+        # ignore repeated signals to allow shutdown to finish in order
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+        for pid in self.children:
+            LOGGER.info(f'Stopping worker process {pid}...')
+
+            try:
+                os.kill(pid, self.signum)
+            except ProcessLookupError:
+                continue
+
+            if not self._wait_for_child(pid):
+                LOGGER.warning(
+                    f'Worker process {pid} did not exit within '
+                    f'{self.shutdown_timeout}s, killing it...')
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+
+        self.children = []
+
+    def _supervise(self) -> None:
+        """Fork child processes, restart them if they die, & stop on exit."""
+        self._handle_signals()
+
+        try:
+            for index in range(self.processes):
+                self.children.append(self._spawn(index))
+
+            while not self.exiting:
+                pid, status = os.wait()
+                self._respawn(pid, status)
+        except SystemExit:
+            LOGGER.info('SystemExit caught, stopping worker processes...')
+        finally:
+            self._stop_children()
+
+    def _create_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop_factory is None:
+            return asyncio.get_event_loop()
+
+        loop = self.loop_factory()
+        asyncio.set_event_loop(loop)
+
+        return loop
+
+    async def _serve_metrics(self) -> Optional[asyncio.AbstractServer]:
+        if self.metrics_port is None:
+            return None
+
+        return await metrics.serve(self.metrics_port + self.index)
+
+    def _start_monitor(
+        self,
+        loop: asyncio.AbstractEventLoop
+    ) -> Optional[LoopMonitor]:
+        if self.slow_callback_threshold is None:
+            return None
+
+        monitor = LoopMonitor(loop, threshold=self.slow_callback_threshold)
+        monitor.start()
+
+        return monitor
+
+    def _run_in_process(self) -> None:
+        """Run all registered workers in an asyncio loop in this process."""
+        # exit immediately if a signal is received while starting up
+        self._handle_signals()
+        # setup an event loop w/ asyncio, or the configured implementation
+        loop = self._create_loop()
+        LOGGER.info(f'Using event loop {type(loop).__module__}')
+        # start pools for offloaded handlers before opening connections or
+        # starting threads, so pool processes don't inherit them
+        executors.configure(
+            self.thread_pool_size,
+            self.process_pool_size,
+            self.codec_pool_size)
+        executors.start()
+        # watch the loop for lag & blocking callbacks, if enabled
+        monitor = self._start_monitor(loop)
         # tell it to establish database connection
         loop.run_until_complete(self._connect_databases())
         # tell it to start the workers & assign the result to variable
         # to be used later to stop the workers
         self.stoppers = loop.run_until_complete(self._run_workers())
+        # start serving metrics, if enabled
+        metrics_server = loop.run_until_complete(self._serve_metrics())
+        # once running, drain the workers on exit signal, which stops the
+        # loop when finished
+        self._handle_signals_in_loop(loop)
 
         try:
             loop.run_forever()
-        except SystemExit:
-            # but setup graceful exit when error is raised in self._quit
-            LOGGER.info('SystemExit caught, stopping workers...')
         finally:
+            LOGGER.info('Stopping workers...')
             # by allowing worker to stop completely before killing process
             loop.run_until_complete(self._stop_workers())
             # and by allowing database connection to close
             loop.run_until_complete(self._disconnect_databases())
+            # and by allowing offloaded handlers to finish
+            executors.shutdown()
+
+            if metrics_server is not None:
+                metrics_server.close()
+                loop.run_until_complete(metrics_server.wait_closed())
+
+            if monitor is not None:
+                monitor.stop()
 
         loop.close()
+
+    def register_database(self, database: Connectable) -> None:
+        """Add database to list to be connected to when application is run."""
+        self.databases.append(database)
+
+    def register_worker(self, worker: Runnable) -> None:
+        """Add worker to list to be run when application is run.
+
+        Executes worker in asyncio event loop. Allows multiple workers
+        by taking all workers registered via this method, then using
+        asyncio.gather to execute all in parallel.
+        """
+        self.workers.append(worker)
+
+    def run(self) -> None:
+        """Run all registered workers in asyncio loop.
+
+        Gracefully exit using SIGINT or SIGTERM, draining workers first.
+        When running multiple processes, the signal is forwarded to each
+        child process in turn.
+        """
+        if self.processes > 1:
+            self._supervise()
+        else:
+            self._run_in_process()
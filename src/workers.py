@@ -0,0 +1,433 @@
+"""AMQP Workers extended to be supervised by a Runner.
+
+Wraps amqp_worker's RPCWorker & QueueWorker to keep track of every route
+handler currently running & the Pattern used to consume messages. This
+allows a Runner to drain a worker on exit: stop consuming new messages,
+wait for the handlers already running to finish (up to a deadline), &
+only then close the worker's connection.
+
+Every route is also instrumented, recording request & error counts, number
+of handlers in progress, & handler latency as metrics, labeled by worker
+type & route path. Handlers run with their route's path as the current
+route, see `request_context`.
+
+Routes can be given limits, isolating them from each other so one slow
+route can't starve the rest:
+
+    max_concurrency: the most handlers that can run at once for the route,
+        messages received beyond this wait for a running handler to finish
+    prefetch: the most unacknowledged messages the broker will deliver to
+        the route at once, defaults to max_concurrency if given
+
+A route can also run a synchronous handler in a thread or process pool
+managed by the Runner, instead of on the event loop, by giving
+`executor='thread'` or `executor='process'`, see `executors`.
+
+Limits can also be set (or overridden) with environment variables named
+after the route, e.g. `ROUTE_EXAMPLE_ITEMS_MAX_CONCURRENCY` &
+`ROUTE_EXAMPLE_ITEMS_PREFETCH` for a route at `example-items`.
+
+An RPC route can stream its response by giving `stream=True` & an async
+generator as its handler. Items it yields are sent in chunks of
+`chunk_size` items as they're produced, so the whole response never has to
+be held in memory at once. The final reply's data is the number of items
+sent, see `patterns.send_chunk`.
+
+Use these in place of amqp_worker's workers; they're defined & used the
+same way.
+"""
+
+import asyncio
+from functools import wraps
+from logging import getLogger
+import os
+import re
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import amqp_worker as worker
+from amqp_worker.connection import Channel, ConnectionParameters
+
+from encoder import json_gzip_rpc_factory, json_gzip_queue_factory
+import executors
+import metrics
+import monitor
+import patterns
+from patterns import RPC, Master
+from request_context import handling_route
+
+
+LOGGER = getLogger(__name__)
+
+RouteHandler = Callable[..., Awaitable[Any]]
+
+DEFAULT_CHUNK_SIZE = 100
+
+ROUTE_REQUESTS = metrics.Counter(
+    'amqp_route_requests_total',
+    'Messages received by each route.',
+    ['worker', 'route'])
+ROUTE_ERRORS = metrics.Counter(
+    'amqp_route_errors_total',
+    'Messages whose route handler raised an exception.',
+    ['worker', 'route'])
+ROUTE_IN_FLIGHT = metrics.Gauge(
+    'amqp_route_in_flight',
+    'Route handlers currently running.',
+    ['worker', 'route'])
+ROUTE_DURATION = metrics.Histogram(
+    'amqp_route_duration_seconds',
+    'Time taken by route handlers.',
+    ['worker', 'route'])
+ROUTE_WAITING = metrics.Gauge(
+    'amqp_route_waiting',
+    'Messages waiting for a route\'s concurrency limit to allow handling.',
+    ['worker', 'route'])
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def _env_limit(path: str, name: str, default: Optional[int]) -> Optional[int]:
+    """Get a route's limit from the environment, if set."""
+    variable = f'ROUTE_{re.sub(r"[^A-Z0-9]", "_", path.upper())}_{name}'
+    env = os.getenv(variable)
+
+    if env is None:
+        return default
+
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+
+    raise TypeError(f'{variable} must be a positive integer, or unset')
+
+
+def route_limits(
+    path: str,
+    max_concurrency: Optional[int] = None,
+    prefetch: Optional[int] = None,
+) -> Tuple[Optional[int], Optional[int]]:
+    """Get a route's concurrency limit & prefetch count.
+
+    Values set in the environment take precedence over those given.
+    Prefetch defaults to the concurrency limit, so a route doesn't hold on
+    to messages it can't handle yet that another instance could.
+    """
+    max_concurrency = _env_limit(path, 'MAX_CONCURRENCY', max_concurrency)
+    prefetch = _env_limit(path, 'PREFETCH', prefetch)
+
+    if prefetch is None:
+        prefetch = max_concurrency
+
+    return max_concurrency, prefetch
+
+
+def limit(
+    worker_type: str,
+    path: str,
+    handler: RouteHandler,
+    max_concurrency: int,
+) -> RouteHandler:
+    """Wrap a route handler to limit how many calls can run at once."""
+    waiting = ROUTE_WAITING.labels(worker_type, path)
+    # semaphore is created on first call to bind it to the running loop
+    semaphore: Optional[asyncio.BoundedSemaphore] = None
+
+    @wraps(handler)
+    async def limited(*args: Any, **kwargs: Any) -> Any:
+        nonlocal semaphore
+
+        if semaphore is None:
+            semaphore = asyncio.BoundedSemaphore(max_concurrency)
+
+        waiting.inc()
+
+        try:
+            await semaphore.acquire()
+        finally:
+            waiting.dec()
+
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            semaphore.release()
+
+    return limited
+
+
+def stream_chunks(
+    handler: Callable[..., AsyncIterator[Any]],
+    chunk_size: int,
+) -> RouteHandler:
+    """Wrap an async generator to send what it yields in chunks.
+
+    Returns the number of items sent.
+    """
+    @wraps(handler)
+    async def streamed(*args: Any, **kwargs: Any) -> int:
+        chunk: List[Any] = []
+        count = 0
+
+        async for item in handler(*args, **kwargs):
+            chunk.append(item)
+            count += 1
+
+            if len(chunk) >= chunk_size:
+                await patterns.send_chunk(chunk)
+                chunk = []
+
+        # an empty stream still sends a chunk, marking the reply as streamed
+        if chunk or count == 0:
+            await patterns.send_chunk(chunk)
+
+        return count
+
+    return streamed
+
+
+def wrap_route(
+    worker_type: str,
+    path: str,
+    handler: Callable[..., Any],
+    max_concurrency: Optional[int],
+    executor: Optional[str],
+    chunk_size: Optional[int] = None,
+) -> RouteHandler:
+    """Wrap a route handler with metrics & its concurrency limit.
+
+    Handler is run in the given executor's pool, if any, or streamed in
+    chunks of the given size, if any.
+    """
+    if executor is not None and chunk_size is not None:
+        raise ValueError(
+            f'Route `{path}` streams its response, so its handler must run '
+            'on the event loop.')
+
+    if executor is not None:
+        handler = executors.offload(executor, f'{worker_type}:{path}', handler)
+
+    if chunk_size is not None:
+        handler = stream_chunks(handler, chunk_size)
+
+    wrapped = instrument(worker_type, path, handler)
+
+    if max_concurrency is not None:
+        wrapped = limit(worker_type, path, wrapped, max_concurrency)
+
+    return wrapped
+
+
+def instrument(
+    worker_type: str,
+    path: str,
+    handler: RouteHandler,
+) -> RouteHandler:
+    """Wrap a route handler to record metrics for every call."""
+    # name the route if its handler blocks the event loop
+    monitor.register_route(path, handler)
+    # look up label values once, instead of on every call
+    requests = ROUTE_REQUESTS.labels(worker_type, path)
+    errors = ROUTE_ERRORS.labels(worker_type, path)
+    in_flight = ROUTE_IN_FLIGHT.labels(worker_type, path)
+    duration = ROUTE_DURATION.labels(worker_type, path)
+
+    @wraps(handler)
+    async def instrumented(*args: Any, **kwargs: Any) -> Any:
+        requests.inc()
+        in_flight.inc()
+        start = time.perf_counter()
+
+        try:
+            # queries made by the handler are attributed to the route
+            with handling_route(path):
+                return await handler(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            in_flight.dec()
+            duration.observe(time.perf_counter() - start)
+
+    return instrumented
+
+
+class InFlight:
+    """Track tasks running route handlers, allowing them to be awaited.
+
+    A message's task is tracked from the time its handler is called until
+    the message is finished being processed, including sending a response
+    & acknowledging the message.
+    """
+
+    tasks: Set['asyncio.Task[Any]']
+
+    def __init__(self) -> None:
+        self.tasks = set()
+
+    def track(self, handler: RouteHandler) -> RouteHandler:
+        """Wrap a route handler to track the task it runs in."""
+        @wraps(handler)
+        async def tracked(*args: Any, **kwargs: Any) -> Any:
+            task = asyncio.current_task()
+
+            if task is not None and task not in self.tasks:
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+            return await handler(*args, **kwargs)
+
+        return tracked
+
+    async def drain(self, timeout: float) -> None:
+        """Wait for tracked tasks to finish, cancel any left after timeout.
+
+        Cancelling a task stops it before its message is acknowledged, so
+        the broker will redeliver the message once the worker disconnects.
+        """
+        if not self.tasks:
+            return
+
+        _, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+
+        if pending:
+            LOGGER.warning(
+                f'{len(pending)} handler(s) still running after {timeout}s, '
+                'cancelling them; their messages will be redelivered')
+
+            for task in pending:
+                task.cancel()
+
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+class RPCWorker(worker.RPCWorker):
+    """An RPCWorker that can be drained before it's stopped."""
+
+    in_flight: InFlight
+    prefetch: Dict[str, int]
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    pattern: Optional[RPC]
+
+    def __init__(
+        self,
+        connection_params: ConnectionParameters,
+        pattern_factory: Callable[[Channel], Awaitable[RPC]]
+        = json_gzip_rpc_factory,
+    ) -> None:
+        self.in_flight = InFlight()
+        self.prefetch = {}
+        self.pattern = None
+
+        async def capture_pattern(channel: Channel) -> RPC:
+            self.pattern = await pattern_factory(channel)
+            self.pattern.prefetch = self.prefetch
+
+            return self.pattern
+
+        super().__init__(connection_params, pattern_factory=capture_pattern)
+
+    def route(
+        self,
+        path: str,
+        max_concurrency: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        executor: Optional[str] = None,
+        stream: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Callable[[Callable[..., Any]], Any]:
+        """Register a route handler on a given path, see RPCWorker.route.
+
+        Optionally limit the route's concurrency & prefetch count, run a
+        synchronous handler in a thread or process pool, or stream the
+        items yielded by an async generator handler in chunks.
+        """
+        register = super().route(path)
+        max_concurrency, prefetch = route_limits(
+            path, max_concurrency, prefetch)
+
+        if prefetch is not None:
+            self.prefetch[path] = prefetch
+
+        def decorate(handler: Callable[..., Any]) -> Any:
+            return register(self.in_flight.track(wrap_route(
+                'rpc', path, handler, max_concurrency, executor,
+                chunk_size if stream else None)))
+
+        return decorate
+
+    async def drain(self, timeout: float) -> None:
+        """Stop consuming, then wait up to timeout for handlers to finish."""
+        if self.pattern is not None:
+            await self.pattern.cancel_consumers()
+
+        await self.in_flight.drain(timeout)
+
+
+class QueueWorker(worker.QueueWorker):
+    """A QueueWorker that can be drained before it's stopped."""
+
+    in_flight: InFlight
+    prefetch: Dict[str, int]
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    pattern: Optional[Master]
+
+    def __init__(
+        self,
+        connection_params: ConnectionParameters,
+        pattern_factory: Callable[[Channel], Master]
+        = json_gzip_queue_factory,
+    ) -> None:
+        self.in_flight = InFlight()
+        self.prefetch = {}
+        self.pattern = None
+
+        def capture_pattern(channel: Channel) -> Master:
+            self.pattern = pattern_factory(channel)
+            self.pattern.prefetch = self.prefetch
+
+            return self.pattern
+
+        super().__init__(connection_params, pattern_factory=capture_pattern)
+
+    def route(
+        self,
+        path: str,
+        max_concurrency: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        executor: Optional[str] = None,
+    ) -> Callable[[Callable[..., Any]], Any]:
+        """Register a route handler on a given path, see QueueWorker.route.
+
+        Optionally limit the route's concurrency & prefetch count, or run
+        a synchronous handler in a thread or process pool.
+        """
+        register = super().route(path)
+        max_concurrency, prefetch = route_limits(
+            path, max_concurrency, prefetch)
+
+        if prefetch is not None:
+            self.prefetch[path] = prefetch
+
+        def decorate(handler: Callable[..., Any]) -> Any:
+            return register(self.in_flight.track(wrap_route(
+                'queue', path, handler, max_concurrency, executor)))
+
+        return decorate
+
+    async def drain(self, timeout: float) -> None:
+        """Stop consuming, then wait up to timeout for handlers to finish."""
+        if self.pattern is not None:
+            await self.pattern.cancel_consumers()
+
+        await self.in_flight.drain(timeout)
@@ -0,0 +1,29 @@
+# pylint: disable=missing-module-docstring
+# pylint: disable=missing-class-docstring
+# pylint: disable=missing-function-docstring
+# pylint: disable=unused-argument
+# pylint: disable=multiple-statements
+
+from typing import Any, Callable, NamedTuple, Optional
+
+
+class ExtType(NamedTuple):
+    code: int
+    data: bytes
+
+
+# pylint: disable=unsubscriptable-object
+def packb(
+    o: Any,
+    default: Optional[Callable[[Any], Any]] = ...,
+    use_bin_type: bool = ...,
+    **kwargs: Any) -> bytes: ...
+
+
+# pylint: disable=unsubscriptable-object
+def unpackb(
+    packed: bytes,
+    raw: bool = ...,
+    ext_hook: Callable[[int, bytes], Any] = ...,
+    strict_map_key: bool = ...,
+    **kwargs: Any) -> Any: ...
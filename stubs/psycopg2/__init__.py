@@ -15,3 +15,17 @@ def connect(
     connection_factory: Optional[Any] = ...,
     cursor_factory: Optional[Any] = ...,
     **kwargs: Any) -> Any: ...
+
+
+class Error(Exception):
+    # pylint: disable=unsubscriptable-object
+    pgcode: Optional[str]
+    pgerror: Optional[str]
+
+
+class DatabaseError(Error):
+    ...
+
+
+class OperationalError(DatabaseError):
+    ...
@@ -15,10 +15,13 @@
 # JSONB_OID: int
 # JSONBARRAY_OID: int
 
+from typing import Any, Optional
+
+
 class Json:
-    pass
-    # adapted: Any = ...
-    # def __init__(self, adapted: Any, dumps: Optional[Any] = ...) -> None: ...
+    adapted: Any = ...
+    # pylint: disable=unsubscriptable-object
+    def __init__(self, adapted: Any, dumps: Optional[Any] = ...) -> None: ...
     # def __conform__(self, proto: Any): ...
     # def dumps(self, obj: Any): ...
     # def prepare(self, conn: Any) -> None: ...
@@ -6,7 +6,7 @@
 # pylint: disable=multiple-statements
 # pylint: disable=super-init-not-called
 
-from typing import Any
+from typing import Any, Callable, Optional, Tuple
 
 # from psycopg2._json import register_default_json as register_default_json, register_default_jsonb as register_default_jsonb
 # from psycopg2._psycopg import AsIs as AsIs, BINARYARRAY as BINARYARRAY, BOOLEAN as BOOLEAN, BOOLEANARRAY as BOOLEANARRAY, BYTES as BYTES, BYTESARRAY as BYTESARRAY, Binary as Binary, Boolean as Boolean, Column as Column, ConnectionInfo as ConnectionInfo, DATE as DATE, DATEARRAY as DATEARRAY, DATETIMEARRAY as DATETIMEARRAY, DECIMAL as DECIMAL, DECIMALARRAY as DECIMALARRAY, DateFromMx as DateFromMx, DateFromPy as DateFromPy, Diagnostics as Diagnostics, FLOAT as FLOAT, FLOATARRAY as FLOATARRAY, Float as Float, INTEGER as INTEGER, INTEGERARRAY as INTEGERARRAY, INTERVAL as INTERVAL, INTERVALARRAY as INTERVALARRAY, ISQLQuote as ISQLQuote, Int as Int, IntervalFromMx as IntervalFromMx, IntervalFromPy as IntervalFromPy, LONGINTEGER as LONGINTEGER, LONGINTEGERARRAY as LONGINTEGERARRAY, MXDATE as MXDATE, MXDATEARRAY as MXDATEARRAY, MXDATETIME as MXDATETIME, MXDATETIMEARRAY as MXDATETIMEARRAY, MXDATETIMETZ as MXDATETIMETZ, MXDATETIMETZARRAY as MXDATETIMETZARRAY, MXINTERVAL as MXINTERVAL, MXINTERVALARRAY as MXINTERVALARRAY, MXTIME as MXTIME, MXTIMEARRAY as MXTIMEARRAY, Notify as Notify, PYDATE as PYDATE, PYDATEARRAY as PYDATEARRAY, PYDATETIME as PYDATETIME, PYDATETIMEARRAY as PYDATETIMEARRAY, PYDATETIMETZ as PYDATETIMETZ, PYDATETIMETZARRAY as PYDATETIMETZARRAY, PYINTERVAL as PYINTERVAL, PYINTERVALARRAY as PYINTERVALARRAY, PYTIME as PYTIME, PYTIMEARRAY as PYTIMEARRAY, QueryCanceledError as QueryCanceledError, QuotedString as QuotedString, ROWIDARRAY as ROWIDARRAY, STRINGARRAY as STRINGARRAY, TIME as TIME, TIMEARRAY as TIMEARRAY, TimeFromMx as TimeFromMx, TimeFromPy as TimeFromPy, TimestampFromMx as TimestampFromMx, TimestampFromPy as TimestampFromPy, TransactionRollbackError as TransactionRollbackError, UNICODE as UNICODE, UNICODEARRAY as UNICODEARRAY, Xid as Xid, adapt as adapt, adapters as adapters, binary_types as binary_types, connection as connection, cursor as cursor, encodings as encodings, encrypt_password as encrypt_password, get_wait_callback as get_wait_callback, libpq_version as libpq_version, lobject as lobject, new_array_type as new_array_type, new_type as new_type, parse_dsn as parse_dsn, quote_ident as quote_ident, register_type as register_type, set_wait_callback as set_wait_callback, string_types as string_types
@@ -36,6 +36,25 @@ from typing import Any
 # TRANSACTION_STATUS_UNKNOWN: int
 
 
+class connection:
+    ...
+
+
+class QuotedString:
+    def __init__(self, value: str) -> None: ...
+
+
+# pylint: disable=unsubscriptable-object
+def new_type(
+    oids: Tuple[int, ...],
+    name: str,
+    castobj: Optional[Callable[[Optional[str], Any], Any]] = ...) -> Any: ...
+
+
+# pylint: disable=unsubscriptable-object
+def register_type(obj: Any, scope: Optional[Any] = ...) -> None: ...
+
+
 def register_adapter(typ: Any, callable: Any) -> None: ...
 
 # class SQL_IN:
@@ -52,10 +52,10 @@ from psycopg2._json import Json as Json
 #
 # class RealDictConnection(_connection):
 #     def cursor(self, *args: Any, **kwargs: Any): ...
-#
-#
-# class RealDictCursor(DictCursorBase):
-#     def __init__(self, *args: Any, **kwargs: Any) -> None: ...
+
+
+class RealDictCursor:
+    def __init__(self, *args: Any, **kwargs: Any) -> None: ...
 #     column_mapping: Any = ...
 #     def execute(self, query: Any, vars: Optional[Any] = ...): ...
 #     def callproc(self, procname: Any, vars: Optional[Any] = ...): ...
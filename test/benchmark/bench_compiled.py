@@ -0,0 +1,127 @@
+"""Benchmark compiled validators & row classes against naive equivalents.
+
+Validates items shaped like `ExampleItemData` with a validator compiled by
+`compiled.compile_validator` & with a naive validator that walks the
+TypedDict's type hints, checking each field with isinstance, on every
+call. Then compares the memory held by rows as dictionaries & as a row
+class compiled by `compiled.compile_row`.
+"""
+
+import time
+import tracemalloc
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    TypedDict,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+from uuid import UUID, uuid4
+
+from compiled import compile_row, compile_validator
+
+
+REPEAT = 5
+
+
+class ItemData(TypedDict):
+    """A copy of ExampleItemData, without needing db_wrapper installed."""
+
+    # pylint: disable=inherit-non-class
+    # pylint: disable=too-few-public-methods
+
+    _id: UUID
+    string: str
+    integer: int
+    # pylint: disable=unsubscriptable-object
+    json: Union[Dict[str, Any], List[Any]]
+
+
+def naive_validate(data: Any) -> Dict[str, Any]:
+    """Check each field against the TypedDict's type hints, read per call."""
+    if not isinstance(data, dict):
+        raise ValueError('expected an object')
+
+    result = {}
+
+    for field, hint in get_type_hints(ItemData).items():
+        if field not in data:
+            raise ValueError(f'`{field}` is required')
+
+        value = data[field]
+        options = get_args(hint) if get_origin(hint) is Union else (hint,)
+
+        if not isinstance(
+                value, tuple(get_origin(option) or option
+                             for option in options)):
+            if hint is UUID and isinstance(value, str):
+                value = str(UUID(value))
+            else:
+                raise ValueError(f'`{field}` expected {hint}')
+
+        result[field] = value
+
+    return result
+
+
+def items(count: int) -> List[Dict[str, Any]]:
+    """Build items shaped like ExampleItemData, as received in a message."""
+    return [{
+        '_id': str(uuid4()),
+        'string': f'item {index}',
+        'integer': index,
+        'json': {'a': index, 'b': [1, 2, 3]},
+    } for index in range(count)]
+
+
+def best_of(validate: Callable[[Any], Any], data: List[Any]) -> float:
+    """Get the fastest of several runs validating every item."""
+    timings = []
+
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+
+        for item in data:
+            validate(item)
+
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def memory(build: Callable[[], Any]) -> int:
+    """Get the bytes allocated by building (& holding) an object."""
+    tracemalloc.start()
+    held = build()  # pylint: disable=unused-variable
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size
+
+
+if __name__ == '__main__':
+    compiled_validate = compile_validator(ItemData)
+    ItemRow = compile_row(ItemData)
+
+    for count in (1_000, 100_000):
+        data = items(count)
+        naive = best_of(naive_validate, data)
+        compiled = best_of(compiled_validate, data)
+
+        print(
+            f'{count:>7} items  naive {naive * 1e3:>9.2f} ms  '
+            f'compiled {compiled * 1e3:>9.2f} ms  '
+            f'speedup {naive / compiled:>5.2f}x')
+
+    data = items(100_000)
+    as_dicts = memory(lambda: [dict(item) for item in data])
+    as_rows = memory(lambda: [ItemRow.from_dict(item) for item in data])
+
+    print(
+        f' 100000 rows   dicts {as_dicts / 1e6:>9.2f} MB  '
+        f'rows {as_rows / 1e6:>9.2f} MB  '
+        f'saved {1 - as_rows / as_dicts:>5.0%}')
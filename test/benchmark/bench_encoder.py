@@ -0,0 +1,73 @@
+"""Benchmark ExtendedJSONEncoder against its previous implementation.
+
+Encodes lists of rows shaped like `ExampleItemData`, each with a UUID
+`_id`, using the encoder in `src/encoder.py` & a copy of the encoder it
+replaced, which checked types with an isinstance chain & built debug log
+messages on every call.
+
+Requires amqp_worker to be installed.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, List
+from uuid import UUID, uuid4
+
+from amqp_worker.serializer import ResponseEncoder, JSONEncoderTypes
+
+from encoder import ExtendedJSONEncoder
+
+
+LOGGER = logging.getLogger(__name__)
+
+REPEAT = 5
+
+
+class PreviousJSONEncoder(ResponseEncoder):
+    """The encoder replaced by the serializer registry."""
+
+    def default(self, o: Any) -> JSONEncoderTypes:
+        """Add serialization for UUID."""
+        LOGGER.debug('Using custom serializer...')
+        LOGGER.debug(f'o: {o}')
+        LOGGER.debug(f'type: {type(o)}')
+
+        if isinstance(o, UUID):
+            LOGGER.debug('o is instance of UUID')
+            return str(o)
+
+        return ResponseEncoder.default(self, o)
+
+
+def rows(count: int) -> List[Dict[str, Any]]:
+    """Build rows shaped like ExampleItemData."""
+    return [{
+        '_id': uuid4(),
+        'string': f'item {index}',
+        'integer': index,
+        'json': {'a': index, 'b': [1, 2, 3]},
+    } for index in range(count)]
+
+
+def best_of(encode: Callable[[Any], str], data: Any) -> float:
+    """Get the fastest of several runs encoding data."""
+    timings = []
+
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        encode(data)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+if __name__ == '__main__':
+    for count in (100, 10_000, 100_000):
+        data = rows(count)
+        previous = best_of(PreviousJSONEncoder().encode, data)
+        current = best_of(ExtendedJSONEncoder().encode, data)
+
+        print(
+            f'{count:>7} rows  previous {previous * 1e3:>9.2f} ms  '
+            f'current {current * 1e3:>9.2f} ms  '
+            f'speedup {previous / current:>5.2f}x')
@@ -0,0 +1,93 @@
+"""Benchmark per-message overhead of event loop implementations.
+
+Simulates the dispatch path of the `test` & `dictionary` routes from
+`src/server.py` without a broker: a consumer task takes each message off a
+queue & runs the route handler in a task of its own, then resolves the
+caller's future with the result, just like an RPC reply. The `test` route
+sleeps for a short time instead of a full second to exercise timers
+without making the benchmark take forever.
+
+Run with `pj test bench`.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from start_server import get_loop_factory
+
+
+MESSAGES = 20_000
+CONCURRENCY = 100
+
+Handler = Callable[[Any], Awaitable[Any]]
+Call = Tuple[Any, 'asyncio.Future[Any]']
+
+
+async def test(data: str) -> str:
+    """Stand in for the `test` route, with a much shorter sleep."""
+    await asyncio.sleep(0.001)
+
+    return f'{data} that took forever'
+
+
+async def dictionary(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of the `dictionary` route."""
+    return {
+        **data,
+        'bar': 'baz'
+    }
+
+
+async def _consume(
+    queue: 'asyncio.Queue[Call]',
+    handler: Handler,
+) -> None:
+    async def respond(data: Any, reply: 'asyncio.Future[Any]') -> None:
+        reply.set_result(await handler(data))
+
+    while True:
+        data, reply = await queue.get()
+        asyncio.get_running_loop().create_task(respond(data, reply))
+
+
+async def _call_many(handler: Handler, message: Any) -> float:
+    loop = asyncio.get_running_loop()
+    queue: 'asyncio.Queue[Call]' = asyncio.Queue()
+    consumer = loop.create_task(_consume(queue, handler))
+
+    async def caller(count: int) -> None:
+        for _ in range(count):
+            reply = loop.create_future()
+            await queue.put((message, reply))
+            await reply
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[caller(MESSAGES // CONCURRENCY) for _ in range(CONCURRENCY)])
+    elapsed = time.perf_counter() - start
+
+    consumer.cancel()
+
+    return elapsed
+
+
+def bench(loop_name: str, route: str, handler: Handler, message: Any) -> None:
+    """Time MESSAGES calls to a handler in the named event loop."""
+    loop = get_loop_factory(loop_name)()
+
+    try:
+        elapsed = loop.run_until_complete(_call_many(handler, message))
+    finally:
+        loop.close()
+
+    print(
+        f'{route:<12}{type(loop).__module__:<20}'
+        f'{MESSAGES / elapsed:>12.0f} msg/s'
+        f'{elapsed / MESSAGES * 1e6:>12.1f} us/msg')
+
+
+if __name__ == '__main__':
+    for name in ('asyncio', 'uvloop'):
+        bench(name, 'test', test, 'message')
+        bench(name, 'dictionary', dictionary, {'dictionary': 'foo'})
@@ -0,0 +1,114 @@
+"""Benchmark per-call overhead of compiled queries against composing them.
+
+Runs `ExampleItemReader.all_by_string`'s query three ways against the
+development database (the same one the integration tests use):
+
+    composed: the previous implementation, composing the query with
+        `sql.SQL(...).format()` & a Literal on every call
+    bound: a compiled Query, run with bound parameters
+    prepared: a compiled Query, prepared once & run with `EXECUTE`
+
+Also times composing the query alone, without running it, to show the CPU
+cost saved on every call.
+
+Requires a running dev stack with a synced schema, see `pj dev` &
+`pj manage sync`.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+import db_wrapper as db
+from psycopg2 import sql
+
+from database import Client, Query
+
+
+CALLS = 5_000
+TABLE = sql.Identifier('example_item')
+
+
+def compose(string: str) -> sql.Composed:
+    """Compose the query the way all_by_string used to, on every call."""
+    return sql.SQL(
+        'SELECT * '
+        'FROM {table} '
+        'WHERE string = {string};'
+    ).format(
+        table=TABLE,
+        string=sql.Literal(string)
+    )
+
+
+QUERY = Query(sql.SQL(
+    'SELECT * '
+    'FROM {table} '
+    'WHERE string = {string};'
+).format(
+    table=TABLE,
+    string=sql.Placeholder()
+))
+
+
+async def time_calls(call: Callable[[str], Awaitable[Any]]) -> float:
+    """Get the mean time taken by a call."""
+    start = time.perf_counter()
+
+    for index in range(CALLS):
+        await call(f'match {index % 10}')
+
+    return (time.perf_counter() - start) / CALLS
+
+
+async def main() -> None:
+    """Run every benchmark & print the results."""
+    params = db.ConnectionParameters(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'test'),
+        password=os.getenv('DB_PASS', 'pass'),
+        database=os.getenv('DB_NAME', 'dev'))
+    prepared = Client(params)
+    bound = Client(params, prepare=False)
+    await prepared.connect()
+    await bound.connect()
+
+    try:
+        async with prepared.session() as session:
+            raw = session.connection.raw
+
+        start = time.perf_counter()
+        for index in range(CALLS):
+            compose(f'match {index % 10}').as_string(raw)
+        compose_only = (time.perf_counter() - start) / CALLS
+
+        start = time.perf_counter()
+        for index in range(CALLS):
+            (QUERY.text(raw), (f'match {index % 10}',))
+        compiled_only = (time.perf_counter() - start) / CALLS
+
+        print(
+            f'compose only  previous {compose_only * 1e6:>8.1f} us  '
+            f'compiled {compiled_only * 1e6:>8.1f} us')
+
+        results = {
+            'composed': await time_calls(
+                lambda string: bound.execute_and_return(compose(string))),
+            'bound': await time_calls(
+                lambda string: bound.run(QUERY, (string,))),
+            'prepared': await time_calls(
+                lambda string: prepared.run(QUERY, (string,))),
+        }
+
+        for name, mean in results.items():
+            print(
+                f'{name:>8}  {mean * 1e6:>8.1f} us/call  '
+                f'speedup {results["composed"] / mean:>5.2f}x')
+    finally:
+        await prepared.disconnect()
+        await bound.disconnect()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -4,27 +4,35 @@ a Queue for a Worker on an AMPQ broker.
 """
 
 import gzip
-import json
 from typing import Any
 
 import pika
 from pika.adapters.blocking_connection import BlockingChannel
 
+from helpers.rpc_client import JSON, encode
+
 Connection = pika.BlockingConnection
 Channel = BlockingChannel
 
 
 # pylint: disable=too-few-public-methods
 class Client:
-    """Set up Queue Producer."""
+    """Set up Queue Producer.
+
+    Messages are encoded as JSON, or as MessagePack when given
+    `content_type='application/msgpack'`.
+    """
 
     channel: Channel
+    content_type: str
 
     def __init__(
         self,
-        channel: Channel
+        channel: Channel,
+        content_type: str = JSON,
     ):
         self.channel = channel
+        self.content_type = content_type
 
     def publish(
         self,
@@ -39,8 +47,9 @@ class Client:
         self.channel.basic_publish(
             exchange='',
             routing_key=target_queue,
-            body=gzip.compress(json.dumps(message_as_dict).encode('UTF8')),
+            body=gzip.compress(encode(message_as_dict, self.content_type)),
             properties=pika.BasicProperties(
                 delivery_mode=2,  # make message persistent
+                content_type=self.content_type,
             )
         )
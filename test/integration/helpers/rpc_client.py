@@ -1,11 +1,16 @@
 """Test helper to handle making RPC requests to an AMPQ broker."""
 
+from collections import deque
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
 import gzip
 import json
 import uuid
 import time
-from typing import Any, Optional
+import zlib
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
 
+import msgpack
 import pika
 from pika.adapters.blocking_connection import BlockingChannel
 
@@ -13,26 +18,113 @@ Connection = pika.BlockingConnection
 Channel = BlockingChannel
 
 
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+
+
+# message type of each part of a streamed response
+CHUNK = 'chunk'
+
+# header giving the time, in seconds since the epoch, a request expires at
+DEADLINE_HEADER = 'x-deadline'
+
+
 class ResponseTimeout(Exception):
     pass
 
 
+class StreamError(Exception):
+    pass
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def decompress(body: bytes, encoding: Optional[str]) -> bytes:
+    """Decompress a response body according to its content encoding."""
+    if encoding == 'identity':
+        return body
+
+    if encoding == 'deflate':
+        return zlib.decompress(body)
+
+    # responses without an encoding are gzip compressed
+    return gzip.decompress(body)
+
+
+def encode(data: Any, content_type: str) -> bytes:
+    """Encode data as JSON, or MessagePack if given its content type."""
+    if content_type == MSGPACK:
+        result: bytes = msgpack.packb(data, use_bin_type=True)
+
+        return result
+
+    return json.dumps(data).encode('UTF8')
+
+
+# MessagePack extension types sent by the app, by their code
+EXT_TYPES: Dict[int, Callable[[bytes], Any]] = {
+    1: lambda data: uuid.UUID(bytes=data),
+    2: lambda data: datetime.fromisoformat(data.decode('ascii')),
+    3: lambda data: date.fromisoformat(data.decode('ascii')),
+    4: lambda data: time_of_day.fromisoformat(data.decode('ascii')),
+    5: lambda data: Decimal(data.decode('ascii')),
+}
+
+
+def ext_hook(code: int, data: bytes) -> Any:
+    """Restore a MessagePack extension type sent by the app."""
+    if code in EXT_TYPES:
+        return EXT_TYPES[code](data)
+
+    return msgpack.ExtType(code, data)
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def decode(body: bytes, content_type: Optional[str]) -> Any:
+    """Decode a body as MessagePack if marked as such, JSON otherwise."""
+    if content_type == MSGPACK:
+        return msgpack.unpackb(body, raw=False, ext_hook=ext_hook)
+
+    return json.loads(body.decode('UTF8'))
+
+
+def rehydrate(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Get a dictionary per row from a columnar response's data.
+
+    Columnar responses send `columns` once & each of their `rows` as a
+    list of values, in the same order.
+    """
+    columns = data['columns']
+
+    return [dict(zip(columns, row)) for row in data['rows']]
+
+
 # pylint: disable=too-few-public-methods
 class Client:
-    """Set up RPC response consumer with handler & provide request caller."""
+    """Set up RPC response consumer with handler & provide request caller.
+
+    Requests are encoded as JSON, or as MessagePack when given
+    `content_type='application/msgpack'`.
+    """
 
     channel: Channel
     connection: Connection
+    content_type: str
     correlation_id: str
     response: Any
+    chunks: Deque[List[Any]]
 
     def __init__(
         self,
         connection: Connection,
-        channel: Channel
+        channel: Channel,
+        content_type: str = JSON,
     ):
         self.connection = connection
         self.channel = channel
+        self.content_type = content_type
+        self.chunks = deque()
 
         print('declaring response queue')
 
@@ -49,22 +141,34 @@ class Client:
 
     def _on_response(self, _: Any, __: Any, props: Any, body: bytes) -> None:
         if self.correlation_id == props.correlation_id:
-            self.response = json.loads(gzip.decompress(body).decode('UTF8'))
-            print(f'Response received {self.response}')
+            response = decode(
+                decompress(body, props.content_encoding), props.content_type)
+
+            # a streamed response is sent as chunks, ending with the final
+            # response
+            if props.type == CHUNK:
+                self.chunks.append(response)
+                print(f'Chunk received {response}')
+            else:
+                self.response = response
+                print(f'Response received {self.response}')
 
     # PENDS python 3.9 support in pylint
     # pylint: disable=unsubscriptable-object
-    def call(
+    def _send(
             self,
             target_queue: str,
-            message: Optional[Any] = None,
-            timeout: int = 5000) -> Any:
-        """Send message as RPC Request to given queue & return Response."""
+            message: Optional[Any],
+            deadline: Optional[float] = None) -> None:
         self.response = None
+        self.chunks = deque()
         self.correlation_id = str(uuid.uuid4())
         message_props = pika.BasicProperties(
             reply_to=self.callback_queue,
-            correlation_id=self.correlation_id)
+            correlation_id=self.correlation_id,
+            content_type=self.content_type,
+            headers={DEADLINE_HEADER: time.time() + deadline}
+            if deadline is not None else None)
 
         message_as_dict = {
             'data': message,
@@ -76,7 +180,23 @@ class Client:
             exchange='',
             routing_key=target_queue,
             properties=message_props,
-            body=gzip.compress(json.dumps(message_as_dict).encode('UTF8')))
+            body=gzip.compress(encode(message_as_dict, self.content_type)))
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    def call(
+            self,
+            target_queue: str,
+            message: Optional[Any] = None,
+            timeout: int = 5000,
+            deadline: Optional[float] = None) -> Any:
+        """Send message as RPC Request to given queue & return Response.
+
+        A streamed Response is reassembled, its data being every item
+        received in every chunk. Given a deadline, the service stops
+        working on the Request that many seconds after it's sent.
+        """
+        self._send(target_queue, message, deadline)
         start_time = time.time()
 
         print('Message sent, waiting for response...')
@@ -91,4 +211,42 @@ class Client:
         # what it doesn't know is that connection.process_data_events()
         # will call _on_response, setting self.response when a response
         # is received on the callback queue defined in __init__
+        if self.chunks and self.response['success']:  # type: ignore
+            self.response['data'] = [
+                item for chunk in self.chunks for item in chunk]
+
         return self.response  # type: ignore
+
+    # PENDS python 3.9 support in pylint
+    # pylint: disable=unsubscriptable-object
+    def call_stream(
+            self,
+            target_queue: str,
+            message: Optional[Any] = None,
+            timeout: int = 5000,
+            deadline: Optional[float] = None) -> Iterator[Any]:
+        """Send message as RPC Request to a streaming route.
+
+        Yields items from the Response's chunks as they're received, then
+        raises StreamError if the final Response isn't successful. Given a
+        deadline, the service stops working on the Request that many
+        seconds after it's sent.
+        """
+        self._send(target_queue, message, deadline)
+        start_time = time.time()
+
+        while True:
+            while self.chunks:
+                yield from self.chunks.popleft()
+
+            if self.response is not None:
+                break
+
+            if (start_time + timeout) < time.time():
+                raise ResponseTimeout()
+
+            self.connection.process_data_events(time_limit=timeout)
+
+        # chunks are received in order, before the final Response
+        if not self.response['success']:  # type: ignore
+            raise StreamError(self.response['error'])  # type: ignore
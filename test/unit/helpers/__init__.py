@@ -1 +1,2 @@
 from .async_test import async_test
+from .models import Client, Database, Identifier, Model, Reader, Writer
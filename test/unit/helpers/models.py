@@ -0,0 +1,99 @@
+"""Stand-ins for a Model & its Client, for testing layers wrapping them."""
+
+import asyncio
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class Reader:
+    """Stands in for a Model's read methods, counting queries.
+
+    Given `wait`, each query waits until released, so calls overlap.
+    """
+
+    def __init__(self, wait: bool = False) -> None:
+        self.queries = 0
+        self.release = asyncio.Event()
+
+        if not wait:
+            self.release.set()
+
+    async def one_by_id(self, _id: str) -> Dict[str, Any]:
+        self.queries += 1
+        await self.release.wait()
+
+        if _id == 'missing':
+            raise LookupError(_id)
+
+        return {'_id': _id}
+
+    async def all_by_query(self, query: Dict[str, Any]) -> List[Any]:
+        self.queries += 1
+        await self.release.wait()
+
+        return [query]
+
+
+class Writer:
+    """Stands in for a Model's create, update, or delete methods."""
+
+    async def one(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return item
+
+
+class Identifier:
+    """Stands in for a table's sql.Identifier."""
+
+    strings = ('example',)
+
+
+class Client:
+    """Stands in for a database Client that can listen for notifications."""
+
+    def __init__(self) -> None:
+        self.listeners: Dict[str, List[Callable[[Optional[str]], None]]] = {}
+
+    def listen(
+        self,
+        channel: str,
+        callback: Callable[[Optional[str]], None],
+    ) -> None:
+        self.listeners.setdefault(channel, []).append(callback)
+
+    def notify(self, channel: str, payload: Optional[str]) -> None:
+        for callback in self.listeners.get(channel, []):
+            callback(payload)
+
+
+class Model:
+    """Stands in for a Model, see Reader for `wait`."""
+
+    def __init__(self, wait: bool = False) -> None:
+        self.client = Client()
+        self.table = Identifier()
+        self.read = Reader(wait)
+        self.create = Writer()
+        self.update = Writer()
+        self.delete = Writer()
+
+
+class Database:
+    """Stands in for a db_wrapper Client, recording the queries it's given.
+
+    Returns each of the given results in turn, then no rows.
+    """
+
+    def __init__(self, *results: Iterable[Any]) -> None:
+        self.queries: List[Any] = []
+        self.results = [list(result) for result in results]
+
+    async def execute(self, query: Any, params: Any = None) -> None:
+        self.queries.append(query)
+
+    async def execute_and_return(
+        self,
+        query: Any,
+        params: Any = None,
+    ) -> List[Any]:
+        self.queries.append(query)
+
+        return self.results.pop(0) if self.results else []
@@ -0,0 +1,164 @@
+"""Tests for src/batching.py"""
+# pylint: disable=missing-function-docstring
+
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+import unittest
+from unittest import TestCase
+
+# imported as the application's modules import it, so the metrics it
+# registers aren't registered again under another module name
+import batching
+from batching import BatchLoader, group_by
+
+from helpers import async_test
+
+
+class Rows:
+    """Stands in for a table, recording each batch of keys loaded."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.batches: List[List[str]] = []
+        self.fail = fail
+
+    async def load_many(self, keys: List[str]) -> Dict[str, str]:
+        self.batches.append(keys)
+        await asyncio.sleep(0)
+
+        if self.fail:
+            raise LookupError(keys)
+
+        return {key: key.upper() for key in keys if key != 'missing'}
+
+
+def loader(rows: Rows, **kwargs: Any) -> BatchLoader[str, Optional[str]]:
+    return BatchLoader(rows.load_many, default=lambda: None, **kwargs)
+
+
+class TestBatchLoader(TestCase):
+    """Tests for BatchLoader."""
+
+    @async_test
+    async def test_concurrent_loads_are_batched(self) -> None:
+        rows = Rows()
+        batched = loader(rows)
+        results = await asyncio.gather(*[batched.load(key) for key in 'abc'])
+
+        with self.subTest(msg='loaded once'):
+            self.assertEqual(rows.batches, [['a', 'b', 'c']])
+        with self.subTest(msg='each caller gets its own value'):
+            self.assertEqual(results, ['A', 'B', 'C'])
+
+    @async_test
+    async def test_repeated_keys_are_loaded_once(self) -> None:
+        rows = Rows()
+        batched = loader(rows)
+        results = await asyncio.gather(batched.load('a'), batched.load('a'))
+
+        with self.subTest(msg='loaded once'):
+            self.assertEqual(rows.batches, [['a']])
+        with self.subTest(msg='each caller gets the value'):
+            self.assertEqual(results, ['A', 'A'])
+
+    @async_test
+    async def test_sequential_loads_are_not_batched(self) -> None:
+        rows = Rows()
+        batched = loader(rows)
+
+        await batched.load('a')
+        await batched.load('b')
+
+        self.assertEqual(rows.batches, [['a'], ['b']])
+
+    @async_test
+    async def test_missing_keys_get_default(self) -> None:
+        batched = loader(Rows())
+
+        self.assertIsNone(await batched.load('missing'))
+
+    @async_test
+    async def test_full_batches_are_loaded_right_away(self) -> None:
+        rows = Rows()
+        batched = loader(rows, max_batch_size=2)
+        await asyncio.gather(*[batched.load(key) for key in 'abc'])
+
+        self.assertEqual(rows.batches, [['a', 'b'], ['c']])
+
+    @async_test
+    async def test_loads_within_window_are_batched(self) -> None:
+        rows = Rows()
+        batched = loader(rows, window=0.05)
+
+        async def later(key: str) -> Optional[str]:
+            await asyncio.sleep(0.01)
+            return await batched.load(key)
+
+        await asyncio.gather(batched.load('a'), later('b'))
+
+        self.assertEqual(rows.batches, [['a', 'b']])
+
+    @async_test
+    async def test_every_caller_gets_the_exception(self) -> None:
+        batched = loader(Rows(fail=True))
+        results = await asyncio.gather(
+            batched.load('a'), batched.load('b'), return_exceptions=True)
+
+        for result in results:
+            with self.subTest(result=result):
+                self.assertIsInstance(result, LookupError)
+
+    @async_test
+    async def test_cancelling_one_caller_leaves_the_others(self) -> None:
+        batched = loader(Rows())
+        cancelled = asyncio.ensure_future(batched.load('a'))
+        waiting = asyncio.ensure_future(batched.load('a'))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        self.assertEqual(await waiting, 'A')
+
+    @async_test
+    async def test_batch_runs_without_callers_deadlines(self) -> None:
+        # read from the module batching sets the deadline on
+        context = batching.request_context
+        deadlines = []
+
+        async def load_many(keys: List[str]) -> Dict[str, str]:
+            deadlines.append(context.DEADLINE.get())
+
+            return {key: key for key in keys}
+
+        batched = BatchLoader(load_many, default=lambda: None)
+
+        async def load(key: str, timeout: float) -> Optional[str]:
+            with context.deadline(time.time() + timeout):
+                return await batched.load(key)
+
+        results = await asyncio.gather(load('a', 0.001), load('b', 60))
+
+        with self.subTest(msg='loaded in one batch'):
+            self.assertEqual(results, ['a', 'b'])
+        with self.subTest(msg='without a deadline'):
+            self.assertEqual(deadlines, [None])
+
+
+class TestGroupBy(TestCase):
+    """Tests for group_by."""
+
+    def test_groups_rows_by_column(self) -> None:
+        rows = [
+            {'string': 'a', 'integer': 1},
+            {'string': 'b', 'integer': 2},
+            {'string': 'a', 'integer': 3},
+        ]
+
+        self.assertEqual(group_by(rows, 'string'), {
+            'a': [rows[0], rows[2]],
+            'b': [rows[1]],
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Tests for src/models/bulk.py"""
+# pylint: disable=missing-function-docstring
+
+
+import json
+from typing import Any, List
+import unittest
+from unittest import TestCase
+from uuid import uuid4
+
+from psycopg2 import sql
+
+# imported as the application imports it, so the metrics of the modules it
+# imports aren't registered again under other module names
+from models.bulk import RECORDSET_BATCH_SIZE, RECORDSET_MIN_ROWS, BulkCreate
+
+from helpers import Database, async_test
+
+
+def text(query: Any) -> str:
+    """Render a composed query, with `?` for each literal."""
+    if isinstance(query, sql.Literal):
+        return '?'
+
+    if isinstance(query, sql.Identifier):
+        return '.'.join(f'"{string}"' for string in query.strings)
+
+    if isinstance(query, sql.Composed):
+        return ''.join(text(part) for part in query.seq)
+
+    return str(query.string)
+
+
+def literals(query: Any) -> List[Any]:
+    """Get the values of every literal in a composed query."""
+    if isinstance(query, sql.Literal):
+        return [query.wrapped]
+
+    if isinstance(query, sql.Composed):
+        return [value for part in query.seq for value in literals(part)]
+
+    return []
+
+
+def items(count: int) -> List[Any]:
+    return [{'_id': str(uuid4()), 'string': 'a'} for _ in range(count)]
+
+
+def creator(database: Database) -> BulkCreate[Any]:
+    return BulkCreate(database, sql.Identifier('example'))
+
+
+class TestMany(TestCase):
+    """Tests for BulkCreate.many."""
+
+    @async_test
+    async def test_few_rows_are_inserted_as_values(self) -> None:
+        database = Database()
+
+        await creator(database).many(items(3))
+
+        self.assertEqual(
+            text(database.queries[0]),
+            'INSERT INTO "example" ("_id","string") '
+            'VALUES (?,?),(?,?),(?,?) RETURNING *;')
+
+    @async_test
+    async def test_many_rows_are_inserted_as_recordsets(self) -> None:
+        created = items(RECORDSET_MIN_ROWS + RECORDSET_BATCH_SIZE)
+        database = Database(created[:RECORDSET_BATCH_SIZE])
+
+        await creator(database).many(created)
+
+        with self.subTest(msg='batched'):
+            self.assertEqual(
+                len(database.queries),
+                -(-len(created) // RECORDSET_BATCH_SIZE))
+        with self.subTest(msg='each batch a JSON array'):
+            self.assertEqual(
+                json.loads(literals(database.queries[0])[0]),
+                created[:RECORDSET_BATCH_SIZE])
+        with self.subTest(msg='expanded by the database'):
+            self.assertIn(
+                'json_populate_recordset(NULL::"example", ?)',
+                text(database.queries[0]))
+
+    @async_test
+    async def test_rejects_items_with_different_columns(self) -> None:
+        with self.assertRaises(ValueError):
+            await creator(Database()).many([{'_id': 'a'}, {'string': 'b'}])
+
+    @async_test
+    async def test_no_items_make_no_query(self) -> None:
+        database = Database()
+
+        self.assertEqual(await creator(database).many([]), [])
+        self.assertEqual(database.queries, [])
+
+
+class TestUpsertMany(TestCase):
+    """Tests for BulkCreate.upsert_many."""
+
+    @async_test
+    async def test_updates_columns_not_in_key(self) -> None:
+        database = Database()
+
+        await creator(database).upsert_many(items(2))
+
+        self.assertEqual(
+            text(database.queries[0]),
+            'INSERT INTO "example" ("_id","string") VALUES (?,?),(?,?) '
+            'ON CONFLICT ("_id") DO UPDATE SET "string" = EXCLUDED."string" '
+            'RETURNING *;')
+
+    @async_test
+    async def test_does_nothing_without_columns_to_update(self) -> None:
+        database = Database()
+
+        await creator(database).upsert_many(
+            [{'_id': str(uuid4())}], key=('_id',))
+
+        self.assertIn(
+            'ON CONFLICT ("_id") DO NOTHING ', text(database.queries[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Tests for src/cache.py"""
+# pylint: disable=missing-function-docstring
+
+
+import unittest
+from unittest import TestCase
+
+from src.cache import CHANNEL, MISSING, LRUCache, cache_model
+
+from helpers import Model, async_test
+
+
+class Clock:
+    """A clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLRUCache(TestCase):
+    """Tests for LRUCache."""
+
+    def test_gets_value_until_it_expires(self) -> None:
+        clock = Clock()
+        cache = LRUCache(clock=clock)
+        cache.set('key', 'value', ttl=5)
+
+        with self.subTest(msg='before ttl'):
+            clock.now = 4.9
+            self.assertEqual(cache.get('key'), 'value')
+
+        with self.subTest(msg='after ttl'):
+            clock.now = 5
+            self.assertIs(cache.get('key'), MISSING)
+
+    def test_evicts_least_recently_used_when_full(self) -> None:
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1, ttl=10)
+        cache.set('b', 2, ttl=10)
+        cache.get('a')
+        cache.set('c', 3, ttl=10)
+
+        self.assertEqual(
+            [cache.get(key) for key in ('a', 'b', 'c')], [1, MISSING, 3])
+
+
+class TestCacheModel(TestCase):
+    """Tests for cache_model."""
+
+    @async_test
+    async def test_identical_reads_query_once(self) -> None:
+        model = cache_model(Model(), {'one_by_id': 10})
+
+        first = await model.read.one_by_id('a')
+        second = await model.read.one_by_id('a')
+
+        with self.subTest(msg='queried once'):
+            self.assertEqual(model.read.queries, 1)
+        with self.subTest(msg='same result'):
+            self.assertEqual(first, second)
+
+    @async_test
+    async def test_different_arguments_are_cached_separately(self) -> None:
+        model = cache_model(Model(), {'one_by_id': 10})
+
+        await model.read.one_by_id('a')
+        result = await model.read.one_by_id('b')
+
+        self.assertEqual(result, {'_id': 'b'})
+
+    @async_test
+    async def test_unhashable_arguments_are_not_cached(self) -> None:
+        model = cache_model(Model(), {'all_by_query': 10})
+
+        await model.read.all_by_query({'a': 1})
+        await model.read.all_by_query({'a': 1})
+
+        self.assertEqual(model.read.queries, 2)
+
+    @async_test
+    async def test_writes_clear_the_cache(self) -> None:
+        for query_set in ('create', 'update', 'delete'):
+            with self.subTest(query_set=query_set):
+                model = cache_model(Model(), {'one_by_id': 10})
+
+                await model.read.one_by_id('a')
+                await getattr(model, query_set).one({'_id': 'a'})
+                await model.read.one_by_id('a')
+
+                self.assertEqual(model.read.queries, 2)
+
+    @async_test
+    async def test_notifications_clear_the_cache_of_their_table(
+            self) -> None:
+        payloads = {
+            'change to table': ('{"table": "example", "_id": "a"}', 2),
+            'change to other table': ('{"table": "other", "_id": "a"}', 1),
+            'missed notifications': (None, 2),
+            'invalid payload': ('[]', 1),
+        }
+
+        for name, (payload, queries) in payloads.items():
+            with self.subTest(msg=name):
+                model = cache_model(Model(), {'one_by_id': 10})
+
+                await model.read.one_by_id('a')
+                model.client.notify(CHANNEL, payload)
+                await model.read.one_by_id('a')
+
+                self.assertEqual(model.read.queries, queries)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""Tests for src/coalesce.py"""
+# pylint: disable=missing-function-docstring
+
+
+import asyncio
+import time
+from typing import Any
+import unittest
+from unittest import TestCase
+
+from src import coalesce
+from src.cache import CHANNEL, cache_model
+from src.coalesce import SingleFlight, coalesce_model
+
+from helpers import Model, async_test
+
+
+def coalesced_model() -> Any:
+    return coalesce_model(Model(wait=True), ['one_by_id', 'all_by_query'])
+
+
+async def start(model: Any, *args: Any) -> 'asyncio.Future[Any]':
+    """Start a call & let it run until it waits for its query."""
+    call = asyncio.ensure_future(model.read.one_by_id(*args))
+    await asyncio.sleep(0)
+
+    return call
+
+
+class TestCoalesceModel(TestCase):
+    """Tests for coalesce_model."""
+
+    @async_test
+    async def test_concurrent_identical_calls_query_once(self) -> None:
+        model = coalesced_model()
+        calls = [await start(model, 'a') for _ in range(5)]
+        model.read.release.set()
+        results = await asyncio.gather(*calls)
+
+        with self.subTest(msg='queried once'):
+            self.assertEqual(model.read.queries, 1)
+        with self.subTest(msg='every call gets the result'):
+            self.assertEqual(results, [{'_id': 'a'}] * 5)
+
+    @async_test
+    async def test_different_arguments_query_separately(self) -> None:
+        model = coalesced_model()
+        calls = [await start(model, _id) for _id in ('a', 'b')]
+        model.read.release.set()
+        results = await asyncio.gather(*calls)
+
+        self.assertEqual(results, [{'_id': 'a'}, {'_id': 'b'}])
+
+    @async_test
+    async def test_sequential_calls_query_again(self) -> None:
+        model = coalesced_model()
+        model.read.release.set()
+
+        await model.read.one_by_id('a')
+        await model.read.one_by_id('a')
+
+        self.assertEqual(model.read.queries, 2)
+
+    @async_test
+    async def test_every_call_gets_the_exception(self) -> None:
+        model = coalesced_model()
+        calls = [await start(model, 'missing') for _ in range(3)]
+        model.read.release.set()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        for result in results:
+            with self.subTest(result=result):
+                self.assertIsInstance(result, LookupError)
+
+    @async_test
+    async def test_cancelling_one_call_leaves_the_others(self) -> None:
+        model = coalesced_model()
+        cancelled, waiting = [await start(model, 'a') for _ in range(2)]
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        model.read.release.set()
+
+        self.assertEqual(await waiting, {'_id': 'a'})
+
+    @async_test
+    async def test_cancelling_every_call_cancels_the_query(self) -> None:
+        flights = SingleFlight()
+        query = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def call() -> None:
+            try:
+                await query.wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        calls = [
+            asyncio.ensure_future(flights.do('key', call)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        for waiting in calls:
+            waiting.cancel()
+
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+        with self.subTest(msg='forgets the cancelled call'):
+            self.assertEqual(len(flights), 0)
+        with self.subTest(msg='later calls run anew'):
+            query.set()
+            self.assertEqual(await flights.do('key', call), (False, None))
+
+    @async_test
+    async def test_query_runs_without_callers_deadlines(self) -> None:
+        # read from the module coalesce sets the deadline on
+        context = coalesce.request_context
+        flights = SingleFlight()
+        query = asyncio.Event()
+        deadlines = []
+
+        async def call() -> str:
+            deadlines.append(context.DEADLINE.get())
+            await query.wait()
+
+            return 'result'
+
+        async def do(timeout: float) -> Any:
+            with context.deadline(time.time() + timeout):
+                return await flights.do('key', call)
+
+        calls = [asyncio.ensure_future(do(timeout)) for timeout in (0, 60)]
+        await asyncio.sleep(0)
+        query.set()
+        results = await asyncio.gather(*calls)
+
+        with self.subTest(msg='shared by both callers'):
+            self.assertEqual(results, [(False, 'result'), (True, 'result')])
+        with self.subTest(msg='without a deadline'):
+            self.assertEqual(deadlines, [None])
+
+    @async_test
+    async def test_unhashable_arguments_are_not_coalesced(self) -> None:
+        model = coalesced_model()
+        calls = [
+            asyncio.ensure_future(model.read.all_by_query({'a': 1}))
+            for _ in range(2)]
+        await asyncio.sleep(0)
+        model.read.release.set()
+        await asyncio.gather(*calls)
+
+        self.assertEqual(model.read.queries, 2)
+
+    @async_test
+    async def test_calls_after_a_write_query_again(self) -> None:
+        model = coalesced_model()
+        before = await start(model, 'a')
+        await model.update.one({'_id': 'a'})
+        after = await start(model, 'a')
+        model.read.release.set()
+        await asyncio.gather(before, after)
+
+        self.assertEqual(model.read.queries, 2)
+
+    @async_test
+    async def test_calls_after_a_notified_change_query_again(self) -> None:
+        model = cache_model(coalesced_model(), {'one_by_id': 10})
+        before = await start(model, 'a')
+        model.client.notify(CHANNEL, '{"table": "example"}')
+        after = await start(model, 'a')
+        model.read.release.set()
+        await asyncio.gather(before, after)
+
+        self.assertEqual(model.read.queries, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
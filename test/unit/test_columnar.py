@@ -0,0 +1,51 @@
+"""Tests for src/columnar.py"""
+# pylint: disable=missing-function-docstring
+
+
+import unittest
+from unittest import TestCase
+
+from src.columnar import Columnar, records
+
+
+ROWS = [
+    {'_id': 'a', 'string': 'match me', 'integer': 1},
+    {'_id': 'b', 'string': 'match me', 'integer': 2},
+]
+
+
+class TestColumnar(TestCase):
+    """Tests for Columnar."""
+
+    def test_from_dicts_names_columns_once(self) -> None:
+        result = Columnar.from_dicts(ROWS)
+
+        with self.subTest(msg='columns'):
+            self.assertEqual(result.columns, ('_id', 'string', 'integer'))
+        with self.subTest(msg='rows'):
+            self.assertEqual(result.rows, [
+                ('a', 'match me', 1),
+                ('b', 'match me', 2),
+            ])
+
+    def test_from_dicts_given_no_rows(self) -> None:
+        self.assertEqual(len(Columnar.from_dicts([])), 0)
+
+
+class TestRecords(TestCase):
+    """Tests for records."""
+
+    def test_rehydrates_columnar(self) -> None:
+        self.assertEqual(records(Columnar.from_dicts(ROWS)), ROWS)
+
+    def test_rehydrates_encoded_columnar(self) -> None:
+        encoded = {
+            'columns': ['_id', 'string', 'integer'],
+            'rows': [['a', 'match me', 1], ['b', 'match me', 2]],
+        }
+
+        self.assertEqual(records(encoded), ROWS)
+
+
+if __name__ == '__main__':
+    unittest.main()
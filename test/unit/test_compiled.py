@@ -0,0 +1,159 @@
+"""Tests for src/compiled.py"""
+# pylint: disable=missing-function-docstring
+
+
+from typing import Any, Dict, List, Optional, TypedDict, Union
+import unittest
+from unittest import TestCase
+from uuid import UUID, uuid4
+
+from src.columnar import Columnar
+from src.compiled import (
+    Row,
+    ValidationError,
+    compile_row,
+    compile_validator,
+)
+
+
+class InnerData(TypedDict):
+    """A TypedDict nested in another."""
+
+    # pylint: disable=inherit-non-class
+    # pylint: disable=too-few-public-methods
+
+    number: float
+
+
+class ItemData(TypedDict):
+    """A TypedDict shaped like a ModelData."""
+
+    # pylint: disable=inherit-non-class
+    # pylint: disable=too-few-public-methods
+
+    _id: UUID
+    string: str
+    integer: int
+    # pylint: disable=unsubscriptable-object
+    json: Union[Dict[str, Any], List[Any]]
+    array: List[str]
+    maybe: Optional[InnerData]
+
+
+ITEM_ID = uuid4()
+
+
+def valid_item() -> Dict[str, Any]:
+    return {
+        '_id': str(ITEM_ID),
+        'string': 'a',
+        'integer': 1,
+        'json': {'a': 1},
+        'array': ['a', 'b'],
+        'maybe': {'number': 1.5},
+    }
+
+
+validate_item = compile_validator(ItemData)
+
+
+class TestCompileValidator(TestCase):
+    """Tests for validators built by compile_validator."""
+
+    def test_valid_item_is_returned_as_is(self) -> None:
+        self.assertEqual(validate_item(valid_item()), valid_item())
+
+    def test_values_are_coerced(self) -> None:
+        coercions = {
+            'uuid object to string': ('_id', ITEM_ID, str(ITEM_ID)),
+            'uuid to canonical form': (
+                '_id', str(ITEM_ID).upper(), str(ITEM_ID)),
+            'int to float': ('maybe', {'number': 1}, {'number': 1.0}),
+        }
+
+        for name, (field, given, expected) in coercions.items():
+            with self.subTest(msg=name):
+                item = {**valid_item(), field: given}
+
+                self.assertEqual(validate_item(item)[field], expected)
+
+    def test_invalid_items_raise_with_path_to_field(self) -> None:
+        invalid = {
+            'not a uuid': ('_id', 'nope', '_id'),
+            'wrong type': ('string', 1, 'string'),
+            'bool as int': ('integer', True, 'integer'),
+            'no union option': ('json', 'text', 'json'),
+            'wrong item type': ('array', ['a', 2], 'array[1]'),
+            'nested field': ('maybe', {'number': 'one'}, 'maybe.number'),
+        }
+
+        for name, (field, given, path) in invalid.items():
+            with self.subTest(msg=name):
+                with self.assertRaises(ValidationError) as raised:
+                    validate_item({**valid_item(), field: given})
+
+                self.assertEqual(raised.exception.path, path)
+
+    def test_optional_field_may_be_none(self) -> None:
+        item = {**valid_item(), 'maybe': None}
+
+        self.assertIsNone(validate_item(item)['maybe'])
+
+    def test_missing_field_is_invalid(self) -> None:
+        item = valid_item()
+        del item['string']
+
+        with self.assertRaises(ValidationError):
+            validate_item(item)
+
+    def test_unknown_field_is_invalid(self) -> None:
+        with self.assertRaises(ValidationError):
+            validate_item({**valid_item(), 'unknown': 1})
+
+    def test_non_object_is_invalid(self) -> None:
+        for payload in (None, [], 'item'):
+            with self.subTest(payload=payload):
+                with self.assertRaises(ValidationError):
+                    validate_item(payload)
+
+    def test_only_given_fields_are_required(self) -> None:
+        validate = compile_validator(ItemData, required=('_id',))
+
+        self.assertEqual(
+            validate({'_id': str(ITEM_ID)}), {'_id': str(ITEM_ID)})
+
+
+ItemRow = compile_row(ItemData)
+
+
+class TestCompileRow(TestCase):
+    """Tests for row classes built by compile_row."""
+
+    def test_named_after_typed_dict(self) -> None:
+        self.assertEqual(ItemRow.__name__, 'ItemRow')
+
+    def test_has_no_instance_dict(self) -> None:
+        row = ItemRow.from_dict(valid_item())
+
+        self.assertFalse(hasattr(row, '__dict__'))
+
+    def test_base_row_is_abstract(self) -> None:
+        # pylint: disable=abstract-class-instantiated
+        with self.assertRaises(TypeError):
+            Row()  # type: ignore
+
+    def test_round_trips_dict(self) -> None:
+        self.assertEqual(
+            ItemRow.from_dict(valid_item()).as_dict(), valid_item())
+
+    def test_from_columnar_matches_columns_by_name(self) -> None:
+        item = valid_item()
+        columns = tuple(reversed(list(item)))
+        result = Columnar(columns, [tuple(item[name] for name in columns)])
+
+        self.assertEqual(
+            ItemRow.from_columnar(result), [ItemRow.from_dict(item)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for src/compression.py"""
+# pylint: disable=missing-function-docstring
+
+
+import gzip
+import unittest
+from unittest import TestCase
+import zlib
+
+from src.compression import CompressionPolicy, decompress
+
+
+BODY = b'{"data": "' + b'a' * 2048 + b'"}'
+
+
+class TestCompressionPolicy(TestCase):
+    """Tests for CompressionPolicy.compress."""
+
+    def test_leaves_bodies_smaller_than_min_size_uncompressed(self) -> None:
+        policy = CompressionPolicy(min_size=1024)
+
+        self.assertEqual(policy.compress(b'"short"'), (b'"short"', 'identity'))
+
+    def test_compresses_bodies_at_least_min_size_with_gzip(self) -> None:
+        policy = CompressionPolicy(min_size=1024)
+        body, encoding = policy.compress(BODY)
+
+        with self.subTest(msg='marks the body as gzip encoded'):
+            self.assertEqual(encoding, 'gzip')
+
+        with self.subTest(msg='body can be decompressed with gzip'):
+            self.assertEqual(gzip.decompress(body), BODY)
+
+    def test_can_compress_with_deflate(self) -> None:
+        policy = CompressionPolicy(min_size=0, encoding='deflate')
+        body, encoding = policy.compress(BODY)
+
+        with self.subTest(msg='marks the body as deflate encoded'):
+            self.assertEqual(encoding, 'deflate')
+
+        with self.subTest(msg='body can be decompressed with zlib'):
+            self.assertEqual(zlib.decompress(body), BODY)
+
+    def test_rejects_unknown_encodings(self) -> None:
+        with self.assertRaises(ValueError):
+            CompressionPolicy(encoding='br')
+
+    def test_rejects_levels_outside_1_to_9(self) -> None:
+        for level in (0, 10):
+            with self.subTest(level=level):
+                with self.assertRaises(ValueError):
+                    CompressionPolicy(level=level)
+
+
+class TestDecompress(TestCase):
+    """Tests for decompress."""
+
+    def test_decompresses_each_encoding(self) -> None:
+        for encoding in ('identity', 'gzip', 'deflate'):
+            with self.subTest(encoding=encoding):
+                body, used = CompressionPolicy(
+                    min_size=0 if encoding != 'identity' else len(BODY) + 1,
+                    encoding=encoding if encoding != 'identity' else 'gzip',
+                ).compress(BODY)
+
+                self.assertEqual(used, encoding)
+                self.assertEqual(decompress(body, encoding), BODY)
+
+    def test_bodies_without_an_encoding_are_gzip(self) -> None:
+        self.assertEqual(decompress(gzip.compress(BODY), None), BODY)
+
+    def test_rejects_unknown_encodings(self) -> None:
+        with self.assertRaises(ValueError):
+            decompress(BODY, 'br')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,538 @@
+"""Tests for src/database.py"""
+# pylint: disable=missing-function-docstring, protected-access
+
+
+import asyncio
+from hashlib import md5
+from typing import Any, List, Optional, Sequence, Tuple
+import unittest
+from unittest import TestCase
+
+import db_wrapper as db
+import psycopg2
+from psycopg2 import sql
+
+from columnar import Columnar
+# imported as the application's modules import it, so the metrics it
+# registers aren't registered again under another module name
+import database
+from database import Client, PoolOptions, PoolTimeout, Query
+from query_stats import QUERY_DURATION, QUERY_POOL_WAIT, QUERY_ROWS
+
+from helpers import Database, async_test
+
+
+PARAMS = db.ConnectionParameters(
+    host='localhost', user='postgres', password='postgres',
+    database='postgres')
+
+
+class DuplicatePreparedStatement(psycopg2.Error):
+    """Stands in for the error Postgres raises preparing a name twice."""
+
+    pgcode = '42P05'
+
+
+class Cursor:
+    """Stands in for a cursor, recording queries on its connection."""
+
+    def __init__(self, connection: 'Connection') -> None:
+        self.connection = connection
+        self.description: List[Any] = []
+
+    async def __aenter__(self) -> 'Cursor':
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        pass
+
+    async def execute(
+        self,
+        query: Any,
+        params: Optional[Sequence[Any]] = None,
+    ) -> None:
+        self.connection.queries.append((query, params))
+
+        if str(query).startswith('PREPARE') and self.connection.prepared:
+            raise DuplicatePreparedStatement()
+
+    async def fetchall(self) -> List[Any]:
+        return [{'connection': self.connection.name}]
+
+
+class Connection:
+    """Stands in for a pooled connection, recording its queries.
+
+    Given `prepared`, it says every statement is already prepared.
+    """
+
+    def __init__(self, name: str, prepared: bool = False) -> None:
+        self.name = name
+        self.prepared = prepared
+        self.raw = None
+        self.queries: List[Tuple[Any, Optional[Sequence[Any]]]] = []
+
+    def cursor(self, **_: Any) -> Cursor:
+        return Cursor(self)
+
+
+class Pool:
+    """Stands in for a pool of connections, waiting while none are free."""
+
+    def __init__(self, *connections: Connection) -> None:
+        self.free = list(connections)
+        self.size = len(connections)
+
+    @property
+    def freesize(self) -> int:
+        return len(self.free)
+
+    async def acquire(self) -> Connection:
+        while not self.free:
+            await asyncio.sleep(0.001)
+
+        return self.free.pop(0)
+
+    def release(self, connection: Connection) -> None:
+        self.free.append(connection)
+
+    def close(self) -> None:
+        pass
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+class Notification:
+    """Stands in for a notification received on a listening connection."""
+
+    def __init__(self, channel: str, payload: str) -> None:
+        self.channel = channel
+        self.payload = payload
+
+
+class Notifies:
+    """Stands in for a connection's queue of notifications.
+
+    An exception put on it is raised by `get` instead.
+    """
+
+    def __init__(self) -> None:
+        self.queue: 'asyncio.Queue[Any]' = asyncio.Queue()
+
+    def put_nowait(self, item: Any) -> None:
+        self.queue.put_nowait(item)
+
+    async def get(self) -> Any:
+        item = await self.queue.get()
+
+        if isinstance(item, Exception):
+            raise item
+
+        return item
+
+
+class ListenConnection(Connection):
+    """Stands in for a connection listening for notifications."""
+
+    def __init__(self) -> None:
+        super().__init__('listen')
+        self.notifies = Notifies()
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class ListeningClient(Client):
+    """A Client opening the given connections to listen on, in turn.
+
+    An exception given in place of a connection is raised instead.
+    """
+
+    def __init__(self, *connections: Any) -> None:
+        super().__init__(PARAMS)
+        self.connections = list(connections)
+
+    async def _open(self) -> Any:
+        connection = self.connections.pop(0)
+
+        if isinstance(connection, Exception):
+            raise connection
+
+        return connection
+
+    async def _create_pool(self, params: db.ConnectionParameters) -> Any:
+        return Pool(Connection('primary'))
+
+
+def client(*pools: Pool, **kwargs: Any) -> Client:
+    """Make a Client as if connected to a primary & maybe a replica pool."""
+    stubbed = Client(PARAMS, **kwargs)
+    stubbed._pools = dict(zip((database.PRIMARY, database.REPLICA), pools))
+
+    return stubbed
+
+
+def query() -> Query:
+    return Query(
+        sql.SQL('SELECT * FROM t WHERE s = {s}').format(s=sql.Placeholder()))
+
+
+def in_query(*values: sql.Composable) -> sql.Composable:
+    return sql.SQL('SELECT * FROM t WHERE i IN ({values})').format(
+        values=sql.SQL(', ').join(values))
+
+
+class TestQuery(TestCase):
+    """Tests for Query."""
+
+    def test_prepare_text_numbers_parameters(self) -> None:
+        prepared = Query(sql.SQL(
+            'SELECT * FROM t WHERE s LIKE \'a%%\' AND i = {i} AND j = {j}'
+        ).format(i=sql.Placeholder(), j=sql.Placeholder()))
+
+        text = prepared.prepare_text(None)
+
+        self.assertEqual(
+            text,
+            f'PREPARE {prepared.name} AS SELECT * FROM t '
+            'WHERE s LIKE \'a%\' AND i = $1 AND j = $2')
+
+    def test_statements_are_named_by_their_text(self) -> None:
+        first, second = query(), query()
+        first.prepare_text(None)
+        second.prepare_text(None)
+
+        with self.subTest(msg='named by a hash of the text'):
+            self.assertEqual(
+                first.name,
+                'q_' + md5(b'SELECT * FROM t WHERE s = %s').hexdigest())
+        with self.subTest(msg='same text, same name'):
+            self.assertEqual(first.name, second.name)
+        with self.subTest(msg='other text, other name'):
+            other = Query(in_query(sql.Placeholder()))
+            other.prepare_text(None)
+
+            self.assertNotEqual(other.name, first.name)
+
+    def test_bind_replaces_placeholders_with_literals(self) -> None:
+        bound = Query(in_query(sql.Placeholder(), sql.Placeholder())).bind(
+            (1, 2))
+
+        self.assertEqual(bound, in_query(sql.Literal(1), sql.Literal(2)))
+
+
+class TestPools(TestCase):
+    """Tests for which pool a Client's queries run on."""
+
+    @async_test
+    async def test_reads_run_on_replica(self) -> None:
+        stubbed = client(
+            Pool(Connection('primary')), Pool(Connection('replica')))
+
+        rows = await database.read_client(stubbed).execute_and_return(
+            'SELECT 1')
+
+        self.assertEqual(rows, [{'connection': 'replica'}])
+
+    @async_test
+    async def test_reads_run_on_primary_without_replica(self) -> None:
+        stubbed = client(Pool(Connection('primary')))
+
+        rows = await database.read_client(stubbed).execute_and_return(
+            'SELECT 1')
+
+        self.assertEqual(rows, [{'connection': 'primary'}])
+
+    @async_test
+    async def test_writes_run_on_primary(self) -> None:
+        stubbed = client(
+            Pool(Connection('primary')), Pool(Connection('replica')))
+
+        rows = await stubbed.execute_and_return('INSERT INTO t VALUES (1)')
+
+        self.assertEqual(rows, [{'connection': 'primary'}])
+
+    @async_test
+    async def test_connection_is_released(self) -> None:
+        pool = Pool(Connection('primary'))
+
+        await client(pool).execute('SELECT 1')
+
+        self.assertEqual(pool.freesize, 1)
+
+    @async_test
+    async def test_times_out_waiting_for_free_connection(self) -> None:
+        timeouts = database.POOL_TIMEOUTS.labels(database.PRIMARY)
+        waits = database.POOL_WAIT.labels(database.PRIMARY)
+        before = (timeouts.value, waits.count)
+        stubbed = client(Pool(), pool=PoolOptions(acquire_timeout=0.01))
+
+        with self.subTest(msg='raises PoolTimeout'):
+            with self.assertRaises(PoolTimeout):
+                await stubbed.execute('SELECT 1')
+        with self.subTest(msg='counted with its wait'):
+            self.assertEqual(
+                (timeouts.value, waits.count), (before[0] + 1, before[1] + 1))
+
+    @async_test
+    async def test_session_holds_one_connection(self) -> None:
+        first, second = Connection('first'), Connection('second')
+        pool = Pool(first, second)
+        stubbed = client(pool)
+
+        async with database.session(stubbed) as held:
+            await held.execute('DECLARE c CURSOR FOR SELECT 1')
+            # another query made meanwhile runs on the other connection
+            await stubbed.execute('SELECT 2')
+            await held.execute_and_return('FETCH 10 FROM c')
+
+        with self.subTest(msg='queries run on the held connection'):
+            self.assertEqual(
+                [text for text, _ in first.queries],
+                ['DECLARE c CURSOR FOR SELECT 1', 'FETCH 10 FROM c'])
+        with self.subTest(msg='released after the block'):
+            self.assertEqual(pool.freesize, 2)
+
+
+class TestPrepared(TestCase):
+    """Tests for the statements a Client prepares on each connection."""
+
+    @async_test
+    async def test_prepares_once_per_connection(self) -> None:
+        first, second = Connection('first'), Connection('second')
+        stubbed = client(Pool(first, second))
+        prepared = query()
+
+        # both held at once, so each query runs on another connection
+        async with stubbed.session() as held_first, \
+                stubbed.session() as held_second:
+            for held in (held_first, held_second, held_first):
+                await held.run(prepared, ('a',))
+
+        with self.subTest(msg='prepared once on the first connection'):
+            self.assertEqual(
+                [text.split()[0] for text, _ in first.queries],
+                ['PREPARE', 'EXECUTE', 'EXECUTE'])
+        with self.subTest(msg='prepared again on the second connection'):
+            self.assertEqual(
+                [text.split()[0] for text, _ in second.queries],
+                ['PREPARE', 'EXECUTE'])
+
+    @async_test
+    async def test_runs_statement_already_prepared(self) -> None:
+        connection = Connection('primary', prepared=True)
+        stubbed = client(Pool(connection))
+
+        rows = await stubbed.run(query(), ('a',))
+        await stubbed.run(query(), ('a',))
+
+        with self.subTest(msg='runs the query'):
+            self.assertEqual(rows, [{'connection': 'primary'}])
+        with self.subTest(msg='tracked as prepared'):
+            self.assertEqual(
+                [text.split()[0] for text, _ in connection.queries],
+                ['PREPARE', 'EXECUTE', 'EXECUTE'])
+
+
+class TestRun(TestCase):
+    """Tests for running a Query with Client.run & database.run."""
+
+    @async_test
+    async def test_runs_text_without_preparing(self) -> None:
+        connection = Connection('primary')
+
+        await client(Pool(connection), prepare=False).run(query(), ('a',))
+
+        self.assertEqual(
+            connection.queries, [('SELECT * FROM t WHERE s = %s', ('a',))])
+
+    @async_test
+    async def test_executes_with_a_placeholder_per_param(self) -> None:
+        connection = Connection('primary')
+        prepared = Query(in_query(sql.Placeholder(), sql.Placeholder()))
+
+        await database.run(client(Pool(connection)), prepared, (1, 2))
+
+        self.assertEqual(
+            connection.queries[-1],
+            (f'EXECUTE {prepared.name} (%s,%s)', (1, 2)))
+
+    @async_test
+    async def test_other_clients_run_query_bound(self) -> None:
+        rows = [{'_id': 'a', 'string': 'b'}]
+        stubbed = Database(rows)
+
+        result = await database.run(stubbed, query(), ('a',))
+
+        with self.subTest(msg='query bound to its params'):
+            self.assertEqual(stubbed.queries, [query().bind(('a',))])
+        with self.subTest(msg='rows returned'):
+            self.assertEqual(result, rows)
+
+    @async_test
+    async def test_other_clients_rows_converted_if_columnar(self) -> None:
+        rows = [{'_id': 'a', 'string': 'b'}]
+
+        result = await database.run(
+            Database(rows), query(), ('a',), columnar=True)
+
+        self.assertEqual(result, Columnar.from_dicts(rows))
+
+
+class TestRecording(TestCase):
+    """Tests for the stats a Client records of each query."""
+
+    @async_test
+    async def test_records_composed_query_by_fingerprint(self) -> None:
+        label = 'SELECT * FROM recorded WHERE i IN (?)'
+        duration, rows, waits = (
+            QUERY_DURATION.labels(label),
+            QUERY_ROWS.labels(label),
+            QUERY_POOL_WAIT.labels(label))
+        before = (duration.count, rows.sum, waits.count)
+
+        await client(Pool(Connection('primary'))).execute_and_return(
+            sql.SQL('SELECT * FROM recorded WHERE i IN ({values})').format(
+                values=sql.SQL(', ').join([sql.Placeholder()] * 3)),
+            (1, 2, 3))
+
+        self.assertEqual(
+            (duration.count, rows.sum, waits.count),
+            (before[0] + 1, before[1] + 1, before[2] + 1))
+
+    @async_test
+    async def test_records_wait_with_first_query_after_it(self) -> None:
+        first, second = (
+            QUERY_POOL_WAIT.labels('SELECT ?'),
+            QUERY_POOL_WAIT.labels('SELECT ? FROM waited'))
+        before = (first.count, second.count)
+
+        async with client(Pool(Connection('primary'))).session() as held:
+            await held.execute('SELECT 1')
+            await held.execute('SELECT 1 FROM waited')
+
+        self.assertEqual(
+            (first.count, second.count), (before[0] + 1, before[1]))
+
+    @async_test
+    async def test_records_prepared_query_by_its_text(self) -> None:
+        label = 'SELECT * FROM t WHERE s = ?'
+        duration, waits = (
+            QUERY_DURATION.labels(label), QUERY_POOL_WAIT.labels(label))
+        before = (duration.count, waits.count)
+
+        await client(Pool(Connection('primary'))).run(query(), ('a',))
+
+        with self.subTest(msg='execute recorded by query text'):
+            self.assertEqual(duration.count, before[0] + 1)
+        with self.subTest(msg='wait recorded with execute, not prepare'):
+            self.assertEqual(waits.count, before[1] + 1)
+
+
+class TestListen(TestCase):
+    """Tests for a Client listening for notifications."""
+
+    def setUp(self) -> None:
+        self.interval = database.LISTEN_CHECK_INTERVAL
+        database.LISTEN_CHECK_INTERVAL = 0.01
+
+    def tearDown(self) -> None:
+        database.LISTEN_CHECK_INTERVAL = self.interval
+
+    @async_test
+    async def test_calls_callbacks_with_payloads(self) -> None:
+        connection = ListenConnection()
+        stubbed = ListeningClient(connection)
+        payloads: List[Any] = []
+        stubbed.listen('changes', payloads.append)
+        stubbed.listen('other', lambda _: payloads.append('other'))
+        await stubbed.connect()
+
+        try:
+            connection.notifies.put_nowait(Notification('changes', 'a'))
+            await asyncio.sleep(0.001)
+        finally:
+            await stubbed.disconnect()
+
+        with self.subTest(msg='listened on every channel'):
+            self.assertEqual(
+                [query.seq[0].string for query, _ in connection.queries],
+                ['LISTEN ', 'LISTEN '])
+        with self.subTest(msg='only the channel\'s callbacks called'):
+            self.assertEqual(payloads, ['a'])
+        with self.subTest(msg='connection closed'):
+            self.assertTrue(connection.closed)
+
+    def test_must_listen_before_connecting(self) -> None:
+        stubbed = ListeningClient()
+        stubbed._listen_connection = ListenConnection()
+
+        with self.assertRaises(RuntimeError):
+            stubbed.listen('changes', print)
+
+    @async_test
+    async def test_reconnects_closed_connection(self) -> None:
+        first, second = ListenConnection(), ListenConnection()
+        stubbed = ListeningClient(first, OSError('refused'), second)
+        payloads: List[Any] = []
+        stubbed.listen('changes', payloads.append)
+        await stubbed.connect()
+        first.closed = True
+
+        try:
+            with self.assertLogs(database.LOGGER, 'ERROR'):
+                while stubbed._listen_connection is not second:
+                    await asyncio.sleep(0.01)
+
+            second.notifies.put_nowait(Notification('changes', 'a'))
+            await asyncio.sleep(0.001)
+        finally:
+            await stubbed.disconnect()
+
+        with self.subTest(msg='listened again'):
+            self.assertEqual(len(second.queries), 1)
+        with self.subTest(msg='told notifications may have been missed'):
+            self.assertEqual(payloads, [None, 'a'])
+
+    @async_test
+    async def test_reconnects_after_error(self) -> None:
+        first, second = ListenConnection(), ListenConnection()
+        stubbed = ListeningClient(first, second)
+        payloads: List[Any] = []
+        stubbed.listen('changes', payloads.append)
+        await stubbed.connect()
+
+        try:
+            first.notifies.put_nowait(psycopg2.OperationalError())
+            await asyncio.sleep(0.001)
+        finally:
+            await stubbed.disconnect()
+
+        with self.subTest(msg='reconnected'):
+            self.assertTrue(first.closed)
+        with self.subTest(msg='told notifications may have been missed'):
+            self.assertEqual(payloads, [None])
+
+    @async_test
+    async def test_failing_callback_doesnt_stop_others(self) -> None:
+        connection = ListenConnection()
+        stubbed = ListeningClient(connection)
+        payloads: List[Any] = []
+        stubbed.listen('changes', lambda _: 1 / 0)
+        stubbed.listen('changes', payloads.append)
+        await stubbed.connect()
+
+        try:
+            with self.assertLogs(database.LOGGER, 'ERROR'):
+                connection.notifies.put_nowait(Notification('changes', 'a'))
+                await asyncio.sleep(0.001)
+        finally:
+            await stubbed.disconnect()
+
+        self.assertEqual(payloads, ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
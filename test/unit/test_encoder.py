@@ -0,0 +1,86 @@
+"""Tests for src/encoder.py"""
+# pylint: disable=missing-function-docstring
+
+
+import json
+from typing import Any
+import unittest
+from unittest import TestCase
+from uuid import uuid4
+
+from compression import CompressionPolicy, decompress
+# imported as the application imports it, so the metrics of the modules it
+# imports aren't registered again under other module names
+from encoder import ExtendedJSONEncoder
+import msgpack_codec
+import patterns
+from patterns import RPC
+from raw_json import RawJSON
+
+from helpers import async_test
+
+
+DOCUMENT = '{"b": [1, 2],   "a": null}'
+
+
+class Channel:
+    """Stands in for an aio_pika Channel."""
+
+
+def rpc() -> Any:
+    pattern = RPC(Channel())
+    pattern.json_encoder = ExtendedJSONEncoder()
+    pattern.compression = CompressionPolicy(min_size=0)
+    pattern.offload_min_size = 100
+
+    return pattern
+
+
+class TestExtendedJSONEncoder(TestCase):
+    """Tests for ExtendedJSONEncoder."""
+
+    def test_raw_json_is_spliced_as_is(self) -> None:
+        self.assertEqual(
+            ExtendedJSONEncoder().encode({'json': RawJSON(DOCUMENT)}),
+            f'{{"json": {DOCUMENT}}}')
+
+    def test_raw_json_is_spliced_with_other_types(self) -> None:
+        _id = uuid4()
+
+        self.assertEqual(
+            json.loads(ExtendedJSONEncoder().encode(
+                [{'_id': _id, 'json': RawJSON(DOCUMENT)}])),
+            [{'_id': str(_id), 'json': json.loads(DOCUMENT)}])
+
+
+class TestReplies(TestCase):
+    """Tests for replies holding RawJSON, encoded by an RPC pattern."""
+
+    def tearDown(self) -> None:
+        patterns.executors.shutdown()
+
+    @async_test
+    async def test_json_reply_compressed_in_codec_pool_splices(
+        self
+    ) -> None:
+        data = [{'json': RawJSON(DOCUMENT)}] * 10
+
+        body, encoding = await rpc().serialize_reply(
+            'route', data, patterns.JSON_CONTENT_TYPE)
+
+        self.assertEqual(
+            decompress(body, encoding).decode('utf8'),
+            '[' + ', '.join([f'{{"json": {DOCUMENT}}}'] * 10) + ']')
+
+    @async_test
+    async def test_msgpack_reply_holds_parsed_document(self) -> None:
+        body, encoding = await rpc().serialize_reply(
+            'route', {'json': RawJSON(DOCUMENT)}, msgpack_codec.CONTENT_TYPE)
+
+        self.assertEqual(
+            msgpack_codec.unpack(decompress(body, encoding)),
+            {'json': json.loads(DOCUMENT)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""Tests for src/models/example_item.py"""
+# pylint: disable=missing-function-docstring
+
+
+import asyncio
+import unittest
+from unittest import TestCase
+
+from psycopg2 import sql
+
+# imported as the application imports it, so the metrics of the modules it
+# imports aren't registered again under other module names
+from models.example_item import ExampleItemReader
+
+from helpers import Database, async_test
+
+
+def reader(database: Database) -> ExampleItemReader:
+    return ExampleItemReader(database, sql.Identifier('example_item'))
+
+
+class TestAllByString(TestCase):
+    """Tests for ExampleItemReader.all_by_string."""
+
+    @async_test
+    async def test_concurrent_calls_read_once(self) -> None:
+        database = Database([
+            {'string': 'a', 'integer': 1},
+            {'string': 'b', 'integer': 2},
+            {'string': 'a', 'integer': 3},
+        ])
+        read = reader(database)
+
+        a_rows, b_rows, c_rows = await asyncio.gather(
+            read.all_by_string('a'),
+            read.all_by_string('b'),
+            read.all_by_string('c'))
+
+        with self.subTest(msg='one query'):
+            self.assertEqual(len(database.queries), 1)
+        with self.subTest(msg='each caller gets its rows'):
+            self.assertEqual(
+                ([row['integer'] for row in a_rows],
+                 [row['integer'] for row in b_rows],
+                 c_rows),
+                ([1, 3], [2], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
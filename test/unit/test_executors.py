@@ -0,0 +1,78 @@
+"""Tests for src/executors.py"""
+# pylint: disable=missing-function-docstring
+
+
+import threading
+import unittest
+from unittest import TestCase
+
+from src import executors
+
+from helpers import async_test
+
+
+def thread_name(prefix: str) -> str:
+    return f'{prefix} {threading.current_thread().name}'
+
+
+def square(number: int) -> int:
+    return number * number
+
+
+class TestOffload(TestCase):
+    """Tests for method offload."""
+
+    def tearDown(self) -> None:
+        executors.shutdown()
+
+    @async_test
+    async def test_runs_handler_in_thread_pool(self) -> None:
+        handler = executors.offload('thread', 'rpc:thread-name', thread_name)
+
+        result = await handler('ran in')
+
+        self.assertTrue(result.startswith('ran in handler'))
+
+    @async_test
+    async def test_runs_handler_in_process_pool(self) -> None:
+        handler = executors.offload('process', 'rpc:square', square)
+
+        result = await handler(12)
+
+        self.assertEqual(result, 144)
+
+    def test_rejects_async_handlers(self) -> None:
+        async def handler() -> None:
+            pass
+
+        with self.assertRaises(TypeError):
+            executors.offload('thread', 'rpc:async', handler)
+
+    def test_rejects_unknown_executors(self) -> None:
+        with self.assertRaises(ValueError):
+            executors.offload('fiber', 'rpc:square', square)
+
+
+class TestGetPool(TestCase):
+    """Tests for method get_pool."""
+
+    def tearDown(self) -> None:
+        executors.shutdown()
+
+    def test_codec_pool_is_separate_from_handler_thread_pool(self) -> None:
+        self.assertIsNot(
+            executors.get_pool(executors.CODEC), executors.get_pool('thread'))
+
+    def test_codec_pool_runs_in_codec_threads(self) -> None:
+        name = executors.get_pool(executors.CODEC).submit(
+            thread_name, 'ran in').result()
+
+        self.assertTrue(name.startswith('ran in codec'))
+
+    def test_routes_cant_be_offloaded_to_codec_pool(self) -> None:
+        with self.assertRaises(ValueError):
+            executors.offload(executors.CODEC, 'rpc:square', square)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,5 +34,29 @@ class TestDoALongThing(TestCase):
         self.assertEqual(result, 'that took forever')
 
 
+class TestSummarizeJson(TestCase):
+    """Tests for method summarize_json."""
+
+    def test_scalar_is_one_value_with_no_depth(self) -> None:
+        result = lib.summarize_json('a string')
+
+        self.assertEqual(result, {'keys': 0, 'values': 1, 'depth': 0})
+
+    def test_counts_keys_in_nested_objects(self) -> None:
+        result = lib.summarize_json({'a': {'b': 1, 'c': 2}})
+
+        self.assertEqual(result['keys'], 3)
+
+    def test_counts_values_in_arrays(self) -> None:
+        result = lib.summarize_json({'a': [1, 2, 3], 'b': None})
+
+        self.assertEqual(result['values'], 4)
+
+    def test_measures_deepest_nesting(self) -> None:
+        result = lib.summarize_json({'a': [{'b': [1]}], 'c': 1})
+
+        self.assertEqual(result['depth'], 4)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,77 @@
+"""Tests for src/models/lookups.py"""
+# pylint: disable=missing-function-docstring
+
+
+import asyncio
+from typing import Any, List
+import unittest
+from unittest import TestCase
+from uuid import uuid4
+
+from psycopg2 import sql
+
+# imported as the application imports it, so the metrics of the modules it
+# imports aren't registered again under other module names
+from models.lookups import BatchRead
+
+from helpers import Database, async_test
+
+
+def literals(query: Any) -> List[Any]:
+    """Get the values of every literal in a composed query."""
+    if isinstance(query, sql.Literal):
+        return [query.wrapped]
+
+    if isinstance(query, sql.Composed):
+        return [value for part in query.seq for value in literals(part)]
+
+    return []
+
+
+def reader(database: Database) -> BatchRead[Any]:
+    return BatchRead(database, sql.Identifier('example'))
+
+
+class TestLoadById(TestCase):
+    """Tests for BatchRead.load_by_id."""
+
+    @async_test
+    async def test_concurrent_loads_read_once(self) -> None:
+        ids = [str(uuid4()) for _ in range(3)]
+        database = Database([{'_id': _id} for _id in ids[:2]])
+        read = reader(database)
+
+        rows = await asyncio.gather(*[read.load_by_id(_id) for _id in ids])
+
+        with self.subTest(msg='one query for every id'):
+            self.assertEqual(
+                [literals(query) for query in database.queries], [[ids]])
+        with self.subTest(msg='each caller gets its row, or None'):
+            self.assertEqual(rows, [{'_id': ids[0]}, {'_id': ids[1]}, None])
+
+    @async_test
+    async def test_ids_are_normalized(self) -> None:
+        _id = str(uuid4())
+        read = reader(Database([{'_id': _id}]))
+
+        row = await read.load_by_id(_id.upper())
+
+        self.assertEqual(row, {'_id': _id})
+
+    @async_test
+    async def test_malformed_id_fails_alone(self) -> None:
+        _id = str(uuid4())
+        read = reader(Database([{'_id': _id}]))
+
+        malformed, row = await asyncio.gather(
+            read.load_by_id('nope'), read.load_by_id(_id),
+            return_exceptions=True)
+
+        with self.subTest(msg='malformed id raises'):
+            self.assertIsInstance(malformed, ValueError)
+        with self.subTest(msg='other ids are read'):
+            self.assertEqual(row, {'_id': _id})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""Tests for src/metrics.py"""
+# pylint: disable=missing-function-docstring
+
+
+import asyncio
+import unittest
+from unittest import TestCase
+
+from src import metrics
+
+from helpers import async_test
+
+
+class TestCounter(TestCase):
+    """Tests for Counter metrics."""
+
+    def setUp(self) -> None:
+        self.registry = metrics.Registry()
+        self.counter = metrics.Counter(
+            'requests_total', 'Requests.', ['route'], registry=self.registry)
+
+    def test_starts_at_zero(self) -> None:
+        self.assertEqual(self.counter.labels('test').value, 0)
+
+    def test_increments_per_label_value(self) -> None:
+        self.counter.labels('test').inc()
+        self.counter.labels('test').inc(2)
+        self.counter.labels('other').inc()
+
+        with self.subTest():
+            self.assertEqual(self.counter.labels('test').value, 3)
+        with self.subTest():
+            self.assertEqual(self.counter.labels('other').value, 1)
+
+    def test_requires_all_labels(self) -> None:
+        with self.assertRaises(ValueError):
+            self.counter.labels()
+
+    def test_renders_samples_with_labels(self) -> None:
+        self.counter.labels('test').inc()
+
+        rendered = self.registry.render()
+
+        with self.subTest():
+            self.assertIn('# TYPE requests_total counter', rendered)
+        with self.subTest():
+            self.assertIn('requests_total{route="test"} 1', rendered)
+
+
+class TestGauge(TestCase):
+    """Tests for Gauge metrics."""
+
+    def test_goes_up_and_down(self) -> None:
+        gauge = metrics.Gauge(
+            'in_flight', 'In flight.', registry=metrics.Registry())
+        value = gauge.labels()
+
+        value.inc()
+        value.inc()
+        value.dec()
+
+        self.assertEqual(value.value, 1)
+
+
+class TestHistogram(TestCase):
+    """Tests for Histogram metrics."""
+
+    def setUp(self) -> None:
+        self.registry = metrics.Registry()
+        self.histogram = metrics.Histogram(
+            'duration_seconds',
+            'Duration.',
+            buckets=[0.1, 1],
+            registry=self.registry)
+
+    def test_renders_cumulative_buckets(self) -> None:
+        for value in (0.05, 0.5, 0.5, 5):
+            self.histogram.labels().observe(value)
+
+        rendered = self.registry.render()
+
+        for line in [
+                'duration_seconds_bucket{le="0.1"} 1',
+                'duration_seconds_bucket{le="1"} 3',
+                'duration_seconds_bucket{le="+Inf"} 4',
+                'duration_seconds_sum 6.05',
+                'duration_seconds_count 4',
+        ]:
+            with self.subTest(line=line):
+                self.assertIn(line, rendered)
+
+
+class TestMetric(TestCase):
+    """Tests for the Metric base class."""
+
+    def test_is_abstract(self) -> None:
+        with self.assertRaises(TypeError):
+            # pylint: disable=abstract-class-instantiated
+            metrics.Metric(  # type: ignore
+                'a_total', 'A.', registry=metrics.Registry())
+
+
+class TestRegistry(TestCase):
+    """Tests for Registry."""
+
+    def test_rejects_duplicate_names(self) -> None:
+        registry = metrics.Registry()
+        metrics.Counter('a_total', 'A.', registry=registry)
+
+        with self.assertRaises(ValueError):
+            metrics.Counter('a_total', 'A.', registry=registry)
+
+
+class TestServe(TestCase):
+    """Tests for method serve."""
+
+    @async_test
+    async def test_serves_metrics_over_http(self) -> None:
+        registry = metrics.Registry()
+        metrics.Counter('a_total', 'A.', registry=registry).labels().inc()
+        server = await metrics.serve(0, '127.0.0.1', registry)
+        port = server.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        response = (await reader.read()).decode('utf8')
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+        with self.subTest():
+            self.assertTrue(response.startswith('HTTP/1.1 200 OK'))
+        with self.subTest():
+            self.assertIn('a_total 1', response)
+
+    @async_test
+    async def test_responds_not_found_to_other_paths(self) -> None:
+        server = await metrics.serve(0, '127.0.0.1', metrics.Registry())
+        port = server.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET / HTTP/1.1\r\n\r\n')
+        response = (await reader.read()).decode('utf8')
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+        self.assertTrue(response.startswith('HTTP/1.1 404'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Tests for src/monitor.py"""
+# pylint: disable=missing-function-docstring
+
+
+import asyncio
+import time
+import unittest
+from unittest import TestCase
+
+# imported as the application's modules import it, so the metrics it
+# registers aren't registered again under another module name
+import monitor
+
+from helpers import async_test
+
+
+async def blocking_route(data: str) -> str:
+    time.sleep(0.2)
+
+    return data
+
+
+class TestLoopMonitor(TestCase):
+    """Tests for LoopMonitor."""
+
+    @async_test
+    async def test_reports_stall_with_route_name(self) -> None:
+        monitor.register_route('blocking-route', blocking_route)
+        stalls = monitor.LOOP_STALLS.labels('blocking-route')
+        before = stalls.value
+        loop_monitor = monitor.LoopMonitor(
+            asyncio.get_running_loop(), threshold=0.05, interval=0.01)
+        loop_monitor.start()
+
+        try:
+            with self.assertLogs(monitor.LOGGER, 'WARNING') as logs:
+                await asyncio.sleep(0.05)
+                await blocking_route('data')
+                await asyncio.sleep(0.05)
+        finally:
+            loop_monitor.stop()
+
+        with self.subTest():
+            self.assertGreater(stalls.value, before)
+        with self.subTest():
+            self.assertIn('blocking-route', logs.output[0])
+        with self.subTest():
+            self.assertIn('time.sleep(0.2)', logs.output[0])
+
+    @async_test
+    async def test_records_lag_while_not_blocked(self) -> None:
+        # pylint: disable=protected-access
+        before = monitor._LAG.count
+        loop_monitor = monitor.LoopMonitor(
+            asyncio.get_running_loop(), threshold=0.05, interval=0.01)
+        loop_monitor.start()
+
+        try:
+            await asyncio.sleep(0.1)
+        finally:
+            loop_monitor.stop()
+
+        self.assertGreater(monitor._LAG.count, before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Tests for src/msgpack_codec.py"""
+# pylint: disable=missing-function-docstring
+
+
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+import unittest
+from unittest import TestCase
+from uuid import uuid4
+
+from src.msgpack_codec import pack, unpack
+
+
+class Color(Enum):
+    """An example enum."""
+
+    RED = 'red'
+
+
+def fallback(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+
+    raise TypeError(f'Unsupported type {type(value)}')
+
+
+class TestPack(TestCase):
+    """Tests for pack & unpack."""
+
+    def test_round_trips_extension_types(self) -> None:
+        values = (
+            uuid4(),
+            datetime(2021, 3, 1, 12, 30, tzinfo=timezone.utc),
+            date(2021, 3, 1),
+            time(12, 30, 15),
+            Decimal('10.25'),
+            b'\x00\x01',
+        )
+
+        for value in values:
+            with self.subTest(type=type(value).__name__):
+                self.assertEqual(unpack(pack({'v': value}, fallback)), {
+                    'v': value})
+
+    def test_packs_subclasses_as_their_base_type(self) -> None:
+        class Money(Decimal):
+            """An example Decimal subclass."""
+
+        self.assertEqual(
+            unpack(pack(Money('10.25'), fallback)), Decimal('10.25'))
+
+    def test_converts_other_types_with_fallback(self) -> None:
+        self.assertEqual(unpack(pack([Color.RED], fallback)), ['red'])
+
+    def test_raises_when_fallback_cant_convert(self) -> None:
+        with self.assertRaises(TypeError):
+            pack(object(), fallback)
+
+
+if __name__ == '__main__':
+    unittest.main()
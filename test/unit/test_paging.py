@@ -0,0 +1,171 @@
+"""Tests for src/models/paging.py"""
+# pylint: disable=missing-function-docstring
+
+
+import asyncio
+import time
+from typing import Any, List
+import unittest
+from unittest import TestCase
+from uuid import uuid4
+
+from psycopg2 import sql
+
+# imported as the application imports it, so the metrics of the modules it
+# imports aren't registered again under other module names
+from models.paging import KeysetRead, decode_token, encode_token
+import request_context
+
+from helpers import Database, async_test
+
+
+def rows(count: int) -> List[Any]:
+    return [{'_id': str(uuid4())} for _ in range(count)]
+
+
+def statement(query: Any) -> str:
+    """Get the first word of a composed query."""
+    if isinstance(query, sql.Composed):
+        query = query.seq[0]
+
+    return str(query.string.split()[0].rstrip(';'))
+
+
+class DeadlineDatabase(Database):
+    """Stands in for a Client, refusing queries once the deadline passes."""
+
+    async def execute(self, query: Any, params: Any = None) -> None:
+        request_context.check_deadline()
+        await super().execute(query, params)
+
+    async def execute_and_return(
+        self,
+        query: Any,
+        params: Any = None,
+    ) -> List[Any]:
+        request_context.check_deadline()
+
+        return await super().execute_and_return(query, params)
+
+
+def reader(database: Database) -> KeysetRead[Any]:
+    return KeysetRead(database, sql.Identifier('example'))
+
+
+CONDITION = sql.SQL('TRUE')
+
+
+class TestToken(TestCase):
+    """Tests for encode_token & decode_token."""
+
+    def test_decodes_encoded_id(self) -> None:
+        _id = str(uuid4())
+
+        self.assertEqual(decode_token(encode_token(_id)), _id)
+
+    def test_rejects_invalid_token(self) -> None:
+        with self.assertRaises(ValueError):
+            decode_token('nope')
+
+
+class TestPageWhere(TestCase):
+    """Tests for KeysetRead.page_where."""
+
+    @async_test
+    async def test_full_page_has_token_for_next(self) -> None:
+        page_rows = rows(2)
+
+        page = await reader(Database(page_rows)).page_where(CONDITION, limit=2)
+
+        self.assertEqual(
+            decode_token(page.after or ''), page_rows[-1]['_id'])
+
+    @async_test
+    async def test_short_or_empty_page_is_last(self) -> None:
+        for count in (0, 1):
+            with self.subTest(rows=count):
+                page = await reader(Database(rows(count))).page_where(
+                    CONDITION, limit=2)
+
+                self.assertIsNone(page.after)
+
+    @async_test
+    async def test_rejects_limit_less_than_one(self) -> None:
+        for limit in (0, -1):
+            with self.subTest(limit=limit):
+                database = Database()
+
+                with self.assertRaises(ValueError):
+                    await reader(database).page_where(CONDITION, limit=limit)
+
+                self.assertEqual(database.queries, [])
+
+    @async_test
+    async def test_iter_reads_every_page(self) -> None:
+        pages = [rows(2), rows(2), rows(1)]
+
+        read = [
+            row async for row in reader(Database(*pages)).iter_where(
+                CONDITION, batch_size=2)]
+
+        self.assertEqual(read, [row for page in pages for row in page])
+
+
+class TestIterCursor(TestCase):
+    """Tests for KeysetRead.iter_cursor."""
+
+    @async_test
+    async def test_fetches_batches_until_a_short_one(self) -> None:
+        batches = [rows(2), rows(1)]
+        database = Database(*batches)
+
+        read = [
+            row async for row in reader(database).iter_cursor(
+                sql.SQL('SELECT * FROM example'), batch_size=2)]
+
+        with self.subTest(msg='every row read'):
+            self.assertEqual(read, batches[0] + batches[1])
+        with self.subTest(msg='cursor read within a transaction'):
+            self.assertEqual(
+                [statement(query) for query in database.queries],
+                ['BEGIN', 'DECLARE', 'FETCH', 'FETCH', 'COMMIT'])
+
+    @async_test
+    async def test_ends_transaction_when_stopped_early(self) -> None:
+        database = Database(rows(2), rows(2))
+        cursor = reader(database).iter_cursor(
+            sql.SQL('SELECT * FROM example'), batch_size=2)
+
+        async for _ in cursor:
+            break
+
+        await cursor.aclose()  # type: ignore
+
+        self.assertEqual(statement(database.queries[-1]), 'COMMIT')
+
+    @async_test
+    async def test_ends_transaction_after_deadline(self) -> None:
+        database = DeadlineDatabase(rows(2), rows(2))
+
+        with request_context.deadline(time.time() + 0.05):
+            cursor = reader(database).iter_cursor(
+                sql.SQL('SELECT * FROM example'), batch_size=2)
+
+            async for _ in cursor:
+                await asyncio.sleep(0.1)
+                break
+
+            await cursor.aclose()  # type: ignore
+
+        self.assertEqual(statement(database.queries[-1]), 'COMMIT')
+
+    @async_test
+    async def test_rejects_batch_size_less_than_one(self) -> None:
+        with self.assertRaises(ValueError):
+            async for _ in reader(Database()).iter_cursor(
+                    sql.SQL('SELECT * FROM example'), batch_size=0):
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
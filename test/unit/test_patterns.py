@@ -0,0 +1,140 @@
+"""Tests for src/patterns.py"""
+# pylint: disable=missing-function-docstring
+
+
+import json
+import threading
+from typing import Any, List, Optional, Tuple
+import unittest
+from unittest import TestCase
+
+from compression import CompressionPolicy, decompress
+# imported as the application's modules import it, so the metrics it
+# registers aren't registered again under another module name
+import patterns
+from patterns import RPC
+
+from helpers import async_test
+
+
+class Policy(CompressionPolicy):
+    """Compresses like a CompressionPolicy, recording the thread it ran in."""
+
+    def __init__(self) -> None:
+        super().__init__(min_size=0)
+        self.threads: List[str] = []
+
+    def compress(self, body: bytes) -> Tuple[bytes, str]:
+        self.threads.append(threading.current_thread().name)
+
+        return super().compress(body)
+
+
+class Queue:
+    """Stands in for an aio_pika Queue, recording when it's consumed."""
+
+    def __init__(self, channel: 'Channel', name: str) -> None:
+        self.channel = channel
+        self.name = name
+
+    async def consume(self, *_: Any, **__: Any) -> str:
+        self.channel.events.append(('consume', self.name))
+
+        return f'ctag-{self.name}'
+
+
+class Channel:
+    """Stands in for an aio_pika Channel, recording qos & consumers."""
+
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, Any]] = []
+
+    async def set_qos(self, prefetch_count: int) -> None:
+        self.events.append(('qos', prefetch_count))
+
+    async def declare_queue(self, name: str, **_: Any) -> Queue:
+        return Queue(self, name)
+
+
+# PENDS python 3.9 support in pylint
+# pylint: disable=unsubscriptable-object
+def rpc(offload_min_size: Optional[int]) -> Any:
+    pattern = RPC(Channel())
+    pattern.json_encoder = json.JSONEncoder()
+    pattern.compression = Policy()
+    pattern.offload_min_size = offload_min_size
+
+    return pattern
+
+
+class TestSerializeReply(TestCase):
+    """Tests for RPC.serialize_reply."""
+
+    def tearDown(self) -> None:
+        patterns.executors.shutdown()
+
+    @async_test
+    async def test_compresses_large_replies_in_codec_pool(self) -> None:
+        pattern = rpc(offload_min_size=100)
+
+        # decided by each reply's own size, not the route's last reply's
+        for data in ('small', 'large' * 100, 'small'):
+            body, encoding = await pattern.serialize_reply(
+                'route', data, patterns.JSON_CONTENT_TYPE)
+
+            with self.subTest(msg='compressed', data=data[:5]):
+                self.assertEqual(
+                    json.loads(decompress(body, encoding)), data)
+
+        self.assertEqual(
+            [name.split('_')[0] for name in pattern.compression.threads],
+            ['MainThread', 'codec', 'MainThread'])
+
+    @async_test
+    async def test_compresses_inline_without_min_size(self) -> None:
+        pattern = rpc(offload_min_size=None)
+
+        await pattern.serialize_reply(
+            'route', 'large' * 100, patterns.JSON_CONTENT_TYPE)
+
+        self.assertEqual(pattern.compression.threads, ['MainThread'])
+
+    @async_test
+    async def test_records_offloaded_compression_metrics(self) -> None:
+        pattern = rpc(offload_min_size=100)
+        duration = patterns.COMPRESSION_DURATION.labels('offloaded-route')
+        before = duration.count
+
+        await pattern.serialize_reply(
+            'offloaded-route', 'large' * 100, patterns.JSON_CONTENT_TYPE)
+
+        self.assertEqual(duration.count, before + 1)
+
+
+async def limited_route(data: Any) -> Any:
+    return data
+
+
+async def unlimited_route(data: Any) -> Any:
+    return data
+
+
+class TestRegister(TestCase):
+    """Tests for RPC.register."""
+
+    @async_test
+    async def test_consumes_each_route_with_its_prefetch(self) -> None:
+        channel = Channel()
+        pattern = RPC(channel)
+        pattern.prefetch = {'limited': 5}
+
+        await pattern.register('limited', limited_route)
+        await pattern.register('unlimited', unlimited_route)
+
+        self.assertEqual(channel.events, [
+            ('qos', 5), ('consume', 'limited'),
+            ('qos', patterns.UNLIMITED), ('consume', 'unlimited')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""Tests for src/query_stats.py"""
+# pylint: disable=missing-function-docstring
+
+
+import unittest
+from unittest import TestCase
+
+from psycopg2 import sql
+
+# imported as the application's modules import it, so the metrics it
+# registers aren't registered again under another module name
+import query_stats
+from query_stats import fingerprint, record, template
+
+
+class TestFingerprint(TestCase):
+    """Tests for fingerprint."""
+
+    def test_replaces_values(self) -> None:
+        queries = {
+            'string literal': (
+                "SELECT * FROM t WHERE s = 'it''s'",
+                'SELECT * FROM t WHERE s = ?'),
+            'number literal': (
+                'SELECT * FROM t LIMIT 100',
+                'SELECT * FROM t LIMIT ?'),
+            'psycopg2 parameter': (
+                'SELECT * FROM t WHERE s = %s',
+                'SELECT * FROM t WHERE s = ?'),
+            'prepared parameter': (
+                'PREPARE q AS SELECT * FROM t WHERE s = $1',
+                'PREPARE q AS SELECT * FROM t WHERE s = ?'),
+            'list of values': (
+                'SELECT * FROM t WHERE i IN (1, 2, 3)',
+                'SELECT * FROM t WHERE i IN (?)'),
+            'array of values': (
+                "SELECT * FROM t WHERE s = ANY(ARRAY['a', 'b'])",
+                'SELECT * FROM t WHERE s = ANY(?)'),
+            'generated name': (
+                'FETCH 10 FROM "cursor_0123456789abcdef0123456789abcdef";',
+                'FETCH ? FROM "cursor_?"'),
+        }
+
+        for name, (query, expected) in queries.items():
+            with self.subTest(msg=name):
+                self.assertEqual(fingerprint(query), expected)
+
+    def test_keeps_digits_in_names(self) -> None:
+        self.assertEqual(
+            fingerprint('SELECT col1 FROM "table2"'),
+            'SELECT col1 FROM "table2"')
+
+    def test_collapses_whitespace(self) -> None:
+        self.assertEqual(
+            fingerprint('SELECT *\n  FROM t\n  WHERE i = 1'),
+            'SELECT * FROM t WHERE i = ?')
+
+    def test_same_for_different_values(self) -> None:
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE s = 'a' LIMIT 1"),
+            fingerprint("SELECT * FROM t WHERE s = 'bcd' LIMIT 20"))
+
+    def test_long_text_is_truncated_without_caching(self) -> None:
+        # pylint: disable=protected-access
+        before = query_stats._cached_normalize.cache_info().currsize
+        values = ', '.join(str(value) for value in range(10000))
+
+        result = fingerprint(
+            f'SELECT * FROM t WHERE i IN ({values}) AND s = \'{"a" * 9}\'')
+
+        with self.subTest(msg='normalized'):
+            self.assertEqual(
+                result, 'SELECT * FROM t WHERE i IN (?) AND s = ?')
+        with self.subTest(msg='not cached'):
+            self.assertEqual(
+                query_stats._cached_normalize.cache_info().currsize, before)
+        with self.subTest(msg='truncated'):
+            self.assertLessEqual(
+                len(fingerprint('SELECT ' + 'a' * 10000)),
+                query_stats.MAX_TEXT_LENGTH)
+
+
+class TestTemplate(TestCase):
+    """Tests for template."""
+
+    def test_replaces_literals_and_placeholders(self) -> None:
+        query = sql.SQL('SELECT * FROM t WHERE s = {} AND i IN ({})').format(
+            sql.Placeholder(),
+            sql.SQL(', ').join(sql.Literal(value) for value in range(3)))
+
+        self.assertEqual(
+            template(query, None),
+            'SELECT * FROM t WHERE s = ? AND i IN (?, ?, ?)')
+
+
+class TestRecord(TestCase):
+    """Tests for record."""
+
+    def test_records_duration_and_rows_by_fingerprint(self) -> None:
+        query = 'SELECT * FROM recorded WHERE i = 1'
+        duration = query_stats.QUERY_DURATION.labels(fingerprint(query))
+        rows = query_stats.QUERY_ROWS.labels(fingerprint(query))
+        before = (duration.count, rows.sum)
+
+        record(query, 0.01, 3)
+        record('SELECT * FROM recorded WHERE i = 2', 0.01, 2)
+
+        self.assertEqual(
+            (duration.count, rows.sum), (before[0] + 2, before[1] + 5))
+
+    def test_records_pool_wait_by_fingerprint(self) -> None:
+        waits = query_stats.QUERY_POOL_WAIT.labels(
+            fingerprint('SELECT * FROM waited'))
+        before = waits.count
+
+        record('SELECT * FROM waited', 0.01, 1, waited=0.02)
+        record('SELECT * FROM waited', 0.01, 1)
+
+        self.assertEqual(waits.count, before + 1)
+
+    def test_logs_slow_query_with_route(self) -> None:
+        slow = query_stats.SLOW_QUERIES.labels('slow-route')
+        before = slow.value
+
+        with self.assertLogs(query_stats.LOGGER, 'WARNING') as logs:
+            # set the route on the module query_stats reads it from
+            with query_stats.request_context.handling_route('slow-route'):
+                record(
+                    "SELECT * FROM t WHERE s = 'secret'", 0.3, 1,
+                    waited=0.3, slow_threshold=0.5)
+
+        with self.subTest(msg='counted by route'):
+            self.assertEqual(slow.value, before + 1)
+        with self.subTest(msg='logged with route'):
+            self.assertIn('slow-route', logs.output[0])
+        with self.subTest(msg='logged without values'):
+            self.assertNotIn('secret', logs.output[0])
+
+    def test_fast_query_is_not_logged(self) -> None:
+        with self.assertRaises(AssertionError):
+            with self.assertLogs(query_stats.LOGGER, 'WARNING'):
+                record('SELECT 1', 0.1, 1, slow_threshold=0.5)
+
+    def test_fingerprints_beyond_limit_are_labeled_other(self) -> None:
+        # pylint: disable=protected-access
+        labeled = set(query_stats._labeled)
+        query_stats._labeled.update(
+            f'SELECT * FROM filler{index}'
+            for index in range(query_stats.MAX_FINGERPRINTS))
+
+        try:
+            other = query_stats.QUERY_DURATION.labels('other')
+            before = other.count
+
+            record('SELECT * FROM unlabeled', 0.01, 0)
+
+            self.assertEqual(other.count, before + 1)
+        finally:
+            query_stats._labeled.clear()
+            query_stats._labeled.update(labeled)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Tests for src/raw_json.py"""
+# pylint: disable=missing-function-docstring
+
+
+import json
+from typing import Any
+import unittest
+from unittest import TestCase
+
+from src.raw_json import RawJSON, fragments, placeholder, splice
+
+
+def encode(data: Any) -> str:
+    with fragments() as found:
+        text = json.dumps(data, default=placeholder)
+
+    return splice(text, found)
+
+
+class TestSplice(TestCase):
+    """Tests for encoding RawJSON values with fragments & splice."""
+
+    def test_raw_json_is_spliced_as_is(self) -> None:
+        text = '{"b": [1, 2],   "a": null}'
+
+        self.assertEqual(
+            encode({'json': RawJSON(text)}), f'{{"json": {text}}}')
+
+    def test_every_value_is_spliced_in_place(self) -> None:
+        data = {
+            'items': [
+                {'json': RawJSON('{"n": 1}')},
+                {'json': RawJSON('[]')},
+            ],
+            'other': RawJSON('"text"'),
+        }
+
+        self.assertEqual(json.loads(encode(data)), {
+            'items': [{'json': {'n': 1}}, {'json': []}],
+            'other': 'text',
+        })
+
+    def test_other_strings_are_left_alone(self) -> None:
+        strings = ['\x00', '\x000:0\x00', '\\u0000']
+
+        for string in strings:
+            with self.subTest(string=string):
+                self.assertEqual(json.loads(encode([string])), [string])
+
+    def test_parsed_outside_of_fragments(self) -> None:
+        self.assertEqual(placeholder(RawJSON('{"a": 1}')), {'a': 1})
+
+
+class TestRawJSON(TestCase):
+    """Tests for RawJSON."""
+
+    def test_load_parses_text(self) -> None:
+        self.assertEqual(RawJSON('{"a": [1]}').load(), {'a': [1]})
+
+    def test_equal_by_text(self) -> None:
+        with self.subTest(msg='same text'):
+            self.assertEqual(RawJSON('{}'), RawJSON('{}'))
+        with self.subTest(msg='different text'):
+            self.assertNotEqual(RawJSON('{}'), RawJSON('[]'))
+
+
+if __name__ == '__main__':
+    unittest.main()
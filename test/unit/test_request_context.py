@@ -0,0 +1,103 @@
+"""Tests for src/request_context.py"""
+# pylint: disable=missing-function-docstring
+
+
+import asyncio
+import time
+import unittest
+from unittest import TestCase
+
+from src.request_context import (
+    DeadlineExceeded,
+    check_deadline,
+    current_route,
+    deadline,
+    handling_route,
+    parse_deadline,
+    remaining,
+    shared_context,
+)
+
+from helpers import async_test
+
+
+class TestHandlingRoute(TestCase):
+    """Tests for handling_route."""
+
+    def test_sets_route_within_block(self) -> None:
+        with handling_route('a-route'):
+            self.assertEqual(current_route(), 'a-route')
+
+        self.assertIsNone(current_route())
+
+    @async_test
+    async def test_route_is_seen_by_tasks_started_within(self) -> None:
+        async def route() -> object:
+            await asyncio.sleep(0)
+
+            return current_route()
+
+        with handling_route('a-route'):
+            task = asyncio.create_task(route())
+
+        self.assertEqual(await task, 'a-route')
+
+
+class TestDeadline(TestCase):
+    """Tests for deadline, remaining, & check_deadline."""
+
+    def test_no_deadline_by_default(self) -> None:
+        with self.subTest(msg='remaining'):
+            self.assertIsNone(remaining())
+        with self.subTest(msg='check'):
+            check_deadline()
+
+    def test_remaining_counts_down_to_deadline(self) -> None:
+        with deadline(time.time() + 10):
+            left = remaining()
+
+        self.assertTrue(left is not None and 9 < left <= 10)
+
+    def test_check_raises_once_deadline_passes(self) -> None:
+        with deadline(time.time() - 1):
+            with self.assertRaises(DeadlineExceeded):
+                check_deadline()
+
+    def test_deadline_is_reset_after_block(self) -> None:
+        with deadline(time.time() - 1):
+            pass
+
+        self.assertIsNone(remaining())
+
+
+class TestSharedContext(TestCase):
+    """Tests for shared_context."""
+
+    def test_keeps_route_without_deadline(self) -> None:
+        with handling_route('a-route'), deadline(time.time() + 10):
+            context = shared_context()
+
+            with self.subTest(msg='route kept'):
+                self.assertEqual(context.run(current_route), 'a-route')
+            with self.subTest(msg='deadline dropped'):
+                self.assertIsNone(context.run(remaining))
+            with self.subTest(msg='caller keeps its deadline'):
+                self.assertIsNotNone(remaining())
+
+
+class TestParseDeadline(TestCase):
+    """Tests for parse_deadline."""
+
+    def test_reads_number_or_text(self) -> None:
+        for value in (1700000000.5, '1700000000.5', b'1700000000.5'):
+            with self.subTest(value=value):
+                self.assertEqual(parse_deadline(value), 1700000000.5)
+
+    def test_ignores_anything_else(self) -> None:
+        for value in (None, True, 'soon', [], 'nan', 'inf'):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_deadline(value))
+
+
+if __name__ == '__main__':
+    unittest.main()
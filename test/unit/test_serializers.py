@@ -0,0 +1,100 @@
+"""Tests for src/serializers.py"""
+# pylint: disable=missing-function-docstring
+
+
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+import unittest
+from unittest import TestCase
+from uuid import UUID
+
+from src.serializers import SERIALIZERS, SerializerRegistry
+
+
+class Color(Enum):
+    """An example enum."""
+
+    RED = 'red'
+
+
+@dataclass
+class Point:
+    """An example dataclass."""
+
+    x: int
+    y: int
+
+
+class TestDefaultSerializers(TestCase):
+    """Tests for serializers registered by default."""
+
+    def serialize(self, value: object) -> object:
+        serializer = SERIALIZERS.find(type(value))
+        assert serializer is not None
+
+        return serializer(value)
+
+    def test_uuid_to_string(self) -> None:
+        value = UUID('12345678-1234-5678-1234-567812345678')
+
+        self.assertEqual(
+            self.serialize(value), '12345678-1234-5678-1234-567812345678')
+
+    def test_datetime_to_iso_8601(self) -> None:
+        value = datetime(2021, 3, 1, 12, 30, tzinfo=timezone.utc)
+
+        self.assertEqual(self.serialize(value), '2021-03-01T12:30:00+00:00')
+
+    def test_date_to_iso_8601(self) -> None:
+        self.assertEqual(self.serialize(date(2021, 3, 1)), '2021-03-01')
+
+    def test_decimal_to_string(self) -> None:
+        self.assertEqual(self.serialize(Decimal('1.10')), '1.10')
+
+    def test_bytes_to_base64(self) -> None:
+        self.assertEqual(self.serialize(b'bytes'), 'Ynl0ZXM=')
+
+    def test_enum_to_value(self) -> None:
+        self.assertEqual(self.serialize(Color.RED), 'red')
+
+    def test_dataclass_to_dict(self) -> None:
+        self.assertEqual(self.serialize(Point(1, 2)), {'x': 1, 'y': 2})
+
+    def test_unregistered_type_has_no_serializer(self) -> None:
+        self.assertIsNone(SERIALIZERS.find(object))
+
+
+class TestSerializerRegistry(TestCase):
+    """Tests for SerializerRegistry."""
+
+    def test_subclass_uses_nearest_serializer_in_mro(self) -> None:
+        class Base:
+            pass
+
+        class Child(Base):
+            pass
+
+        registry = SerializerRegistry()
+        registry.register(Base, lambda _: 'base')
+
+        self.assertEqual(registry.find(Child)(Child()), 'base')  # type: ignore
+
+    def test_registering_replaces_cached_lookups(self) -> None:
+        class Base:
+            pass
+
+        class Child(Base):
+            pass
+
+        registry = SerializerRegistry()
+        registry.register(Base, lambda _: 'base')
+        registry.find(Child)
+        registry.register(Child, lambda _: 'child')
+
+        self.assertEqual(registry.find(Child)(Child()), 'child')  # type: ignore
+
+
+if __name__ == '__main__':
+    unittest.main()
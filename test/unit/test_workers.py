@@ -0,0 +1,94 @@
+"""Tests for src/workers.py"""
+# pylint: disable=missing-function-docstring
+
+
+import asyncio
+import os
+from typing import Any
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+# imported as the application imports it, so the metrics it & the modules
+# it imports register aren't registered again under other module names
+import workers
+from workers import route_limits
+
+from helpers import async_test
+
+
+class TestRouteLimits(TestCase):
+    """Tests for route_limits."""
+
+    def test_given_limits_are_used_without_env(self) -> None:
+        with patch.dict(os.environ, clear=True):
+            self.assertEqual(
+                route_limits('example-items', max_concurrency=2, prefetch=4),
+                (2, 4))
+
+    def test_env_takes_precedence(self) -> None:
+        with patch.dict(os.environ, {
+                'ROUTE_EXAMPLE_ITEMS_MAX_CONCURRENCY': '3',
+                'ROUTE_EXAMPLE_ITEMS_PREFETCH': '6'}, clear=True):
+            self.assertEqual(
+                route_limits('example-items', max_concurrency=2, prefetch=4),
+                (3, 6))
+
+    def test_prefetch_defaults_to_max_concurrency(self) -> None:
+        with self.subTest(msg='given'), patch.dict(os.environ, clear=True):
+            self.assertEqual(
+                route_limits('example-items', max_concurrency=2), (2, 2))
+        with self.subTest(msg='from env'), patch.dict(os.environ, {
+                'ROUTE_EXAMPLE_ITEMS_MAX_CONCURRENCY': '3'}, clear=True):
+            self.assertEqual(route_limits('example-items'), (3, 3))
+
+    def test_no_limits_by_default(self) -> None:
+        with patch.dict(os.environ, clear=True):
+            self.assertEqual(route_limits('example-items'), (None, None))
+
+    def test_rejects_invalid_env_values(self) -> None:
+        for value in ('0', '-1', 'many', ''):
+            with self.subTest(value=value), patch.dict(os.environ, {
+                    'ROUTE_EXAMPLE_ITEMS_PREFETCH': value}, clear=True):
+                with self.assertRaises(TypeError):
+                    route_limits('example-items')
+
+
+class TestLimit(TestCase):
+    """Tests for limit."""
+
+    @async_test
+    async def test_bounds_concurrent_calls(self) -> None:
+        running = 0
+        most_running = 0
+        release = asyncio.Event()
+
+        async def handler(data: Any) -> Any:
+            nonlocal running, most_running
+            running += 1
+            most_running = max(most_running, running)
+            await release.wait()
+            running -= 1
+
+            return data
+
+        limited = workers.limit('rpc', 'bounded-route', handler, 2)
+        waiting = workers.ROUTE_WAITING.labels('rpc', 'bounded-route')
+        calls = asyncio.gather(*[limited(data) for data in range(5)])
+        await asyncio.sleep(0.01)
+
+        with self.subTest(msg='calls beyond the limit wait'):
+            self.assertEqual((running, waiting.value), (2, 3))
+
+        release.set()
+
+        with self.subTest(msg='every call is handled'):
+            self.assertEqual(await calls, list(range(5)))
+        with self.subTest(msg='never more than the limit at once'):
+            self.assertEqual(most_running, 2)
+        with self.subTest(msg='none left waiting'):
+            self.assertEqual(waiting.value, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()